@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """
+    Result of a background load.
+
+    :param value: Return value of the load, None if the load failed.
+    :param error: Error of the failed load, None if the load succeeded.
+    :param latency: Duration of the load in seconds.
+    :param loaded_at: time.monotonic() when the load was completed.
+    """
+
+    value: Any
+    error: Optional[str]
+    latency: float
+    loaded_at: float
+
+    @property
+    def age(self) -> float:
+        """:return: Seconds since the load was completed."""
+        return time.monotonic() - self.loaded_at
+
+
+class BackgroundCache:
+    """
+    Runs a load, e.g. a health check, in a background thread every TTL seconds and
+    caches its result, so that the requests, e.g. the probes of the health check
+    endpoints, are served from the cache instead of querying the service on every
+    request, and a slow service does not make the requests time out.
+
+    The thread is started on first use, i.e. in the process serving the requests
+    (and again, if the process has been forked since).
+
+    :param name: Name of the cache and its thread.
+    :param load: Function returning the value to cache, raising an exception if it
+        fails.
+    :param get_ttl: Function returning the seconds between the loads.
+    """
+
+    def __init__(
+        self, name: str, load: Callable[[], Any], get_ttl: Callable[[], float]
+    ):
+        self.name = name
+        self.load = load
+        self.get_ttl = get_ttl
+        self._result: Optional[CachedResult] = None
+        self._loaded = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def get_result(self, wait: float = 0) -> Optional[CachedResult]:
+        """
+        :param wait: Seconds to wait for the first load if it has not completed yet.
+        :return: The result of the last load, or None if no load has completed yet.
+        """
+        self._start()
+        if wait and not self._loaded.is_set():
+            self._loaded.wait(wait)
+        return self._result
+
+    def refresh(self) -> CachedResult:
+        """Run the load now and cache its result."""
+        start = time.monotonic()
+        try:
+            value, error = self.load(), None
+        except Exception as e:
+            logger.warning(f"Loading {self.name} failed: {e}")
+            value, error = None, str(e) or e.__class__.__name__
+        end = time.monotonic()
+        self._result = CachedResult(
+            value=value, error=error, latency=end - start, loaded_at=end
+        )
+        self._loaded.set()
+        return self._result
+
+    def stop(self) -> None:
+        """Stop the background loads and forget the cached result, e.g. in tests."""
+        with self._lock:
+            self._stopped.set()
+            if self._thread:
+                self._thread.join()
+            self._thread = None
+            self._result = None
+            self._loaded.clear()
+            self._stopped.clear()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"cache-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self.refresh()
+            self._stopped.wait(self.get_ttl())
@@ -1,12 +1,170 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
 from django.conf import settings
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch.serializer import NdjsonSerializer
+
+# Request timeouts of the operations in seconds, overridden by the setting
+# ES_REQUEST_TIMEOUTS, see get_elasticsearch_client()
+DEFAULT_REQUEST_TIMEOUTS = {"default": 10.0, "import": 60.0, "health_check": 5.0}
+
+# Index aliases of the imported data, whose health and metrics are exported
+INDEX_ALIASES = (
+    "location",
+    "ontology_word",
+    "ontology_tree",
+    "administrative_division",
+    "helsinki_common_administrative_division",
+)
+
+# Mapping metadata field of the completion time of an index's import
+IMPORT_COMPLETED_AT_META = "import_completed_at"
+
+_clients: Dict[str, Elasticsearch] = {}
+_clients_lock = threading.Lock()
+
+# Body sizes of the NDJSON requests sent in the current context, see
+# measure_ndjson_request_bytes()
+_ndjson_request_bytes: ContextVar[Optional[List[int]]] = ContextVar(
+    "ndjson_request_bytes", default=None
+)
+
+
+class MeasuringNdjsonSerializer(NdjsonSerializer):
+    """
+    NDJSON serializer of e.g. the bulk requests, recording the size of the request
+    bodies it serializes for measure_ndjson_request_bytes().
+    """
+
+    def dumps(self, data: Any) -> bytes:
+        body = super().dumps(data)
+        sizes = _ndjson_request_bytes.get()
+        if sizes is not None:
+            sizes.append(len(body))
+        return body
+
 
+_SERIALIZERS = {"application/x-ndjson": MeasuringNdjsonSerializer()}
 
-def get_elasticsearch_client():
+
+@contextmanager
+def measure_ndjson_request_bytes() -> Iterator[List[int]]:
     """
-    Returns an Elasticsearch client configured according to current settings.
+    Measure the body sizes of the NDJSON requests, e.g. the bulk requests, sent in
+    the block by the current thread or task, as serialized for sending them.
+
+    :return: The list the sizes in bytes are appended to.
     """
-    basic_auth = (
-        (settings.ES_USERNAME, settings.ES_PASSWORD) if settings.ES_USERNAME else None
+    sizes: List[int] = []
+    token = _ndjson_request_bytes.set(sizes)
+    try:
+        yield sizes
+    finally:
+        _ndjson_request_bytes.reset(token)
+
+
+def get_request_timeout(operation: str = "default") -> float:
+    """:return: The request timeout of the operation, or the default one."""
+    timeouts = {**DEFAULT_REQUEST_TIMEOUTS, **settings.ES_REQUEST_TIMEOUTS}
+    return float(timeouts.get(operation, timeouts["default"]))
+
+
+def get_elasticsearch_client(operation: str = "default") -> Elasticsearch:
+    """
+    Returns the process wide Elasticsearch client configured according to current
+    settings, with the request timeout of the operation, e.g. "import" or
+    "health_check" (see get_request_timeout()). The timed out requests of the
+    imports are not retried, see _get_request_options().
+
+    The client and its connection pool are created on first use and shared by the
+    importers, the health checks and the metrics of the process, and created again
+    only if the settings change.
+
+    With setting ES_BACKEND="fake" the client is connected to an in-process fake
+    cluster instead, see common.fake_elasticsearch.
+    """
+    options = _get_client_options()
+    key = repr(sorted(options.items()))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = Elasticsearch(**options)
+        client = _clients[key]
+    return client.options(**_get_request_options(operation))
+
+
+def reset_elasticsearch_clients() -> None:
+    """Forget the shared clients, e.g. after mocking the Elasticsearch class."""
+    with _clients_lock:
+        _clients.clear()
+
+
+def get_async_elasticsearch_client(operation: str = "default") -> AsyncElasticsearch:
+    """
+    Returns an AsyncElasticsearch client configured according to current settings
+    like get_elasticsearch_client(), on httpx. The client is bound to the event loop
+    it is first used in, so it is not shared, but needs to be closed in the same
+    loop, e.g. by using it as an async context manager.
+
+    With setting ES_BACKEND="fake" the client is connected to the in-process fake
+    cluster instead, see common.fake_elasticsearch.
+    """
+    options = _get_client_options(use_async=True)
+    client = AsyncElasticsearch(**options)
+    return client.options(**_get_request_options(operation))
+
+
+def _get_request_options(operation: str) -> dict:
+    """:return: Request options of the operation's copy of the client."""
+    options = {"request_timeout": get_request_timeout(operation)}
+    if operation == "import":
+        # A timed out bulk request may still have been carried out, and retrying it
+        # would duplicate the documents with generated IDs, e.g. the divisions'
+        options["retry_on_timeout"] = False
+    return options
+
+
+def _get_client_options(use_async: bool = False) -> dict:
+    """:return: Arguments of the (Async)Elasticsearch client from the settings."""
+    options = {
+        "connections_per_node": settings.ES_CONNECTIONS_PER_NODE,
+        "http_compress": settings.ES_HTTP_COMPRESS,
+        "max_retries": settings.ES_MAX_RETRIES,
+        "retry_on_timeout": settings.ES_RETRY_ON_TIMEOUT,
+        "request_timeout": get_request_timeout(),
+        "serializers": _SERIALIZERS,
+    }
+    if settings.ES_BACKEND == "fake":
+        from common.fake_elasticsearch import (
+            FAKE_ELASTICSEARCH_URI,
+            FakeElasticsearchAsyncNode,
+            FakeElasticsearchNode,
+        )
+
+        return {
+            **options,
+            "hosts": FAKE_ELASTICSEARCH_URI,
+            "node_class": (
+                FakeElasticsearchAsyncNode if use_async else FakeElasticsearchNode
+            ),
+        }
+
+    options.update(
+        hosts=settings.ES_URI,
+        basic_auth=(
+            (settings.ES_USERNAME, settings.ES_PASSWORD)
+            if settings.ES_USERNAME
+            else None
+        ),
     )
-    return Elasticsearch(hosts=settings.ES_URI, basic_auth=basic_auth)
+    if use_async:
+        options["node_class"] = "httpxasync"
+    if settings.ES_SNIFF:
+        options.update(
+            sniff_on_start=True,
+            sniff_on_node_failure=True,
+            min_delay_between_sniffing=60,
+        )
+    return options
@@ -0,0 +1,854 @@
+"""
+In-process fake Elasticsearch backend for load and throughput testing without a
+running cluster.
+
+The fake is plugged in as the Elasticsearch client's transport node, i.e. the real
+Elasticsearch client and its helpers (e.g. elasticsearch.helpers.bulk) serialize the
+requests as usual, but instead of sending them over HTTP FakeElasticsearchNode
+serves them from an in-memory FakeElasticsearchCluster. Enable it with setting
+ES_BACKEND="fake", see get_elasticsearch_client(). FakeElasticsearchAsyncNode serves
+the requests of AsyncElasticsearch the same way, see
+get_async_elasticsearch_client().
+
+Only the subset of the REST API used by the importers is implemented: document
+index/get/update/delete, bulk, simple and scrolled searches, and creating, deleting,
+aliasing, mapping and getting statistics of indices. Every request is recorded to
+FakeElasticsearchCluster.stats, and can be delayed by a simulated latency.
+"""
+
+import asyncio
+import gzip
+import json
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from django.conf import settings
+from elastic_transport import (
+    ApiResponseMeta,
+    BaseAsyncNode,
+    BaseNode,
+    HttpHeaders,
+    NodeConfig,
+)
+from elastic_transport._node import NodeApiResponse
+
+FAKE_ELASTICSEARCH_URI = "http://fake-elasticsearch:9200"
+
+Response = Tuple[int, Optional[dict]]
+
+
+class FakeElasticsearchError(Exception):
+    """Raised by the request handlers, returned to the client as an error response."""
+
+    def __init__(self, status: int, error_type: str, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.error_type = error_type
+        self.reason = reason
+
+    def as_response(self) -> Response:
+        return self.status, {
+            "error": {"type": self.error_type, "reason": self.reason},
+            "status": self.status,
+        }
+
+
+def index_not_found(index: str) -> FakeElasticsearchError:
+    return FakeElasticsearchError(
+        404, "index_not_found_exception", f"no such index [{index}]"
+    )
+
+
+@dataclass
+class FakeIndex:
+    name: str
+    aliases: Set[str] = field(default_factory=set)
+    mappings: dict = field(default_factory=dict)
+    settings: dict = field(default_factory=dict)
+    documents: Dict[str, dict] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    # Sequence numbers of the documents' last writes, for optimistic concurrency
+    seq_nos: Dict[str, int] = field(default_factory=dict)
+    max_seq_no: int = -1
+
+    def write(self, _id: str, document: dict) -> int:
+        self.documents[_id] = document
+        self.max_seq_no += 1
+        self.seq_nos[_id] = self.max_seq_no
+        return self.max_seq_no
+
+    def check_seq_no(self, _id: str, params: dict) -> None:
+        """Check the if_seq_no condition of a write, if any."""
+        if "if_seq_no" in params and self.seq_nos.get(_id) != int(params["if_seq_no"]):
+            raise FakeElasticsearchError(
+                409,
+                "version_conflict_engine_exception",
+                f"[{_id}]: version conflict, required seqNo [{params['if_seq_no']}]",
+            )
+
+    @property
+    def size_in_bytes(self) -> int:
+        return sum(len(json.dumps(doc)) for doc in self.documents.values())
+
+
+@dataclass
+class FakeElasticsearchStats:
+    """Requests made to the fake cluster."""
+
+    # Request count by API, e.g. "bulk" or "indices.create"
+    requests: Dict[str, int] = field(default_factory=dict)
+    request_bytes: int = 0
+    response_bytes: int = 0
+    # Documents written with bulk requests
+    bulk_documents: int = 0
+    simulated_latency_seconds: float = 0.0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+
+def _merge_mappings(target: dict, source: dict) -> dict:
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_mappings(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def _filter_source(source: Any, includes: List[str], prefix: str = "") -> Any:
+    """Filter the document source to the included field paths, e.g. "venue.meta.id"."""
+    if isinstance(source, list):
+        return [_filter_source(item, includes, prefix) for item in source]
+    if not isinstance(source, dict):
+        return source
+    result = {}
+    for key, value in source.items():
+        path = f"{prefix}{key}"
+        if any(fnmatchcase(path, include) for include in includes):
+            result[key] = value
+        elif any(include.startswith(f"{path}.") for include in includes):
+            result[key] = _filter_source(value, includes, f"{path}.")
+    return result
+
+
+SHARDS = {"total": 1, "successful": 1, "skipped": 0, "failed": 0}
+
+
+class FakeElasticsearchCluster:
+    """
+    In-memory Elasticsearch cluster state and REST API request handling.
+
+    :param latency_seconds: Simulated latency added to every request.
+    :param bytes_per_second: Simulated throughput, i.e. every request is further
+        delayed by its request body size divided by this. 0 for unlimited.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, bytes_per_second: int = 0):
+        self.latency_seconds = latency_seconds
+        self.bytes_per_second = bytes_per_second
+        self.indices: Dict[str, FakeIndex] = {}
+        self.stats = FakeElasticsearchStats()
+        # Remaining hits and page size of open scrolls by scroll ID
+        self.scrolls: Dict[str, Tuple[List[dict], int]] = {}
+        self._lock = threading.RLock()
+        # (HTTP method, path pattern, API name, handler)
+        self._routes: List[Tuple[str, re.Pattern, str, Callable[..., Response]]] = [
+            (method, re.compile(f"^{pattern}$"), api, handler)
+            for method, pattern, api, handler in [
+                ("GET", "/", "info", self._info),
+                ("HEAD", "/", "ping", self._ping),
+                ("GET", "/_cluster/health", "cluster.health", self._cluster_health),
+                ("POST", "/_bulk", "bulk", self._bulk),
+                ("PUT", "/_bulk", "bulk", self._bulk),
+                ("POST", "/(?P<index>[^_/][^/]*)/_bulk", "bulk", self._bulk),
+                ("POST", "/_aliases", "indices.update_aliases", self._update_aliases),
+                ("(?:GET|POST)", "/_search/scroll", "scroll", self._scroll),
+                ("DELETE", "/_search/scroll", "clear_scroll", self._clear_scroll),
+                (
+                    "GET",
+                    "/_alias/(?P<name>[^/]+)",
+                    "indices.get_alias",
+                    self._get_alias,
+                ),
+                (
+                    "HEAD",
+                    "/_alias/(?P<name>[^/]+)",
+                    "indices.exists_alias",
+                    self._exists_alias,
+                ),
+                (
+                    "GET",
+                    "/(?P<index>[^_/][^/]*)/_alias(?:/(?P<name>[^/]+))?",
+                    "indices.get_alias",
+                    self._get_alias,
+                ),
+                (
+                    "DELETE",
+                    "/(?P<index>[^/]+)/_alias(?:es)?/(?P<name>[^/]+)",
+                    "indices.delete_alias",
+                    self._delete_alias,
+                ),
+                (
+                    "PUT",
+                    "/(?P<index>[^_/][^/]*)/_mapping",
+                    "indices.put_mapping",
+                    self._put_mapping,
+                ),
+                (
+                    "GET",
+                    "/(?P<index>[^_/][^/]*)/_mapping",
+                    "indices.get_mapping",
+                    self._get_mapping,
+                ),
+                (
+                    "GET",
+                    "/(?P<index>[^_/][^/]*)/_stats(?:/(?P<metric>[^/]+))?",
+                    "indices.stats",
+                    self._stats,
+                ),
+                (
+                    "POST",
+                    "/(?P<index>[^_/][^/]*)/_refresh",
+                    "indices.refresh",
+                    self._refresh,
+                ),
+                ("POST", "/(?P<index>[^_/][^/]*)/_search", "search", self._search),
+                ("GET", "/(?P<index>[^_/][^/]*)/_search", "search", self._search),
+                ("POST", "/(?P<index>[^_/][^/]*)/_count", "count", self._count),
+                ("GET", "/(?P<index>[^_/][^/]*)/_count", "count", self._count),
+                ("POST", "/(?P<index>[^_/][^/]*)/_doc", "index", self._index),
+                (
+                    "(?:PUT|POST)",
+                    "/(?P<index>[^_/][^/]*)/_doc/(?P<id>[^/]+)",
+                    "index",
+                    self._index,
+                ),
+                (
+                    "(?:PUT|POST)",
+                    "/(?P<index>[^_/][^/]*)/_create/(?P<id>[^/]+)",
+                    "create",
+                    self._create,
+                ),
+                (
+                    "GET",
+                    "/(?P<index>[^_/][^/]*)/_doc/(?P<id>[^/]+)",
+                    "get",
+                    self._get,
+                ),
+                (
+                    "DELETE",
+                    "/(?P<index>[^_/][^/]*)/_doc/(?P<id>[^/]+)",
+                    "delete",
+                    self._delete,
+                ),
+                (
+                    "POST",
+                    "/(?P<index>[^_/][^/]*)/_update/(?P<id>[^/]+)",
+                    "update",
+                    self._update,
+                ),
+                ("PUT", "/(?P<index>[^_/][^/]*)", "indices.create", self._create_index),
+                ("DELETE", "/(?P<index>[^/]+)", "indices.delete", self._delete_index),
+                ("GET", "/(?P<index>[^_/][^/]*)", "indices.get", self._get_index),
+                ("HEAD", "/(?P<index>[^_/][^/]*)", "indices.exists", self._exists),
+            ]
+        ]
+
+    def reset(self) -> None:
+        """Remove all indices and clear the statistics."""
+        with self._lock:
+            self.indices.clear()
+            self.scrolls.clear()
+            self.stats = FakeElasticsearchStats()
+
+    def perform_request(
+        self, method: str, target: str, body: Optional[bytes]
+    ) -> Tuple[int, Optional[bytes], float]:
+        """
+        Handle a REST API request.
+
+        :return: HTTP status, response body and simulated latency in seconds.
+        """
+        url = urlsplit(target)
+        path = unquote(url.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        request_bytes = len(body or b"")
+
+        for route_method, pattern, api, handler in self._routes:
+            match = pattern.match(path)
+            if match and re.fullmatch(route_method, method):
+                break
+        else:
+            api, match, handler = "unknown", None, None
+
+        latency = self.latency_seconds
+        if self.bytes_per_second:
+            latency += request_bytes / self.bytes_per_second
+        if latency:
+            time.sleep(latency)
+
+        with self._lock:
+            try:
+                if handler is None:
+                    raise FakeElasticsearchError(
+                        400,
+                        "unsupported_operation_exception",
+                        f"{method} {path} is not supported by the fake backend",
+                    )
+                status, response = handler(
+                    body=body,
+                    params=params,
+                    **{k: v for k, v in match.groupdict().items() if v is not None},
+                )
+            except FakeElasticsearchError as e:
+                status, response = e.as_response()
+
+            response_body = (
+                json.dumps(response).encode("utf-8") if response is not None else None
+            )
+            self.stats.requests[api] = self.stats.requests.get(api, 0) + 1
+            self.stats.request_bytes += request_bytes
+            self.stats.response_bytes += len(response_body or b"")
+            self.stats.simulated_latency_seconds += latency
+
+        return status, response_body, latency
+
+    # Index name resolution
+
+    def resolve(self, expression: str, allow_no_indices: bool = False) -> List[str]:
+        """
+        Resolve a comma separated list of index names, aliases and wildcard patterns
+        to index names.
+        """
+        names: List[str] = []
+        for part in expression.split(","):
+            if part in ("_all", "*") or "*" in part:
+                pattern = "*" if part == "_all" else part
+                names += [
+                    name
+                    for name, index in self.indices.items()
+                    if fnmatchcase(name, pattern)
+                    or any(fnmatchcase(alias, pattern) for alias in index.aliases)
+                ]
+            elif part in self.indices:
+                names.append(part)
+            elif aliased := [
+                name for name, index in self.indices.items() if part in index.aliases
+            ]:
+                names += aliased
+            elif not allow_no_indices:
+                raise index_not_found(part)
+        return list(dict.fromkeys(names))
+
+    def _write_index(self, name: str) -> FakeIndex:
+        """
+        :return: The index to write to using the given index name or alias, created
+            if it does not exist like Elasticsearch does by default.
+        """
+        if name in self.indices:
+            return self.indices[name]
+        aliased = [index for index in self.indices.values() if name in index.aliases]
+        if len(aliased) > 1:
+            raise FakeElasticsearchError(
+                400,
+                "illegal_argument_exception",
+                f"no write index is defined for alias [{name}]",
+            )
+        if aliased:
+            return aliased[0]
+        self.indices[name] = FakeIndex(name=name)
+        return self.indices[name]
+
+    # Handlers
+
+    def _info(self, **kwargs) -> Response:
+        return 200, {
+            "name": "fake-elasticsearch",
+            "cluster_name": "fake",
+            "version": {"number": "9.0.0", "build_flavor": "default"},
+            "tagline": "You Know, for Search",
+        }
+
+    def _ping(self, **kwargs) -> Response:
+        return 200, None
+
+    def _cluster_health(self, **kwargs) -> Response:
+        return 200, {
+            "cluster_name": "fake",
+            "status": "green",
+            "timed_out": False,
+            "number_of_nodes": 1,
+            "number_of_data_nodes": 1,
+            "active_primary_shards": len(self.indices),
+            "active_shards": len(self.indices),
+            "unassigned_shards": 0,
+        }
+
+    def _create_index(self, index: str, body: Optional[bytes], **kwargs) -> Response:
+        if index in self.indices:
+            raise FakeElasticsearchError(
+                400,
+                "resource_already_exists_exception",
+                f"index [{index}] already exists",
+            )
+        data = json.loads(body) if body else {}
+        self.indices[index] = FakeIndex(
+            name=index,
+            aliases=set(data.get("aliases", {})),
+            mappings=data.get("mappings", {}),
+            settings=data.get("settings", {}),
+        )
+        return 200, {"acknowledged": True, "shards_acknowledged": True, "index": index}
+
+    def _delete_index(self, index: str, **kwargs) -> Response:
+        for name in self.resolve(index):
+            del self.indices[name]
+        return 200, {"acknowledged": True}
+
+    def _get_index(self, index: str, **kwargs) -> Response:
+        return 200, {
+            name: {
+                "aliases": {alias: {} for alias in self.indices[name].aliases},
+                "mappings": self.indices[name].mappings,
+                "settings": {
+                    "index": {
+                        **self.indices[name].settings.get("index", {}),
+                        "creation_date": str(int(self.indices[name].created_at * 1000)),
+                    }
+                },
+            }
+            for name in self.resolve(index)
+        }
+
+    def _exists(self, index: str, **kwargs) -> Response:
+        return (200 if self.resolve(index, allow_no_indices=True) else 404), None
+
+    def _get_alias(self, name: str = "*", index: str = "*", **kwargs) -> Response:
+        result = {
+            index_name: {
+                "aliases": {
+                    alias: {}
+                    for alias in self.indices[index_name].aliases
+                    if any(fnmatchcase(alias, n) for n in name.split(","))
+                }
+            }
+            for index_name in self.resolve(index, allow_no_indices=True)
+        }
+        result = {k: v for k, v in result.items() if v["aliases"] or name == "*"}
+        if not result and name != "*":
+            return 404, {"error": f"alias [{name}] missing", "status": 404}
+        return 200, result
+
+    def _exists_alias(self, name: str, **kwargs) -> Response:
+        status, _ = self._get_alias(name=name)
+        return status, None
+
+    def _delete_alias(self, index: str, name: str, **kwargs) -> Response:
+        removed = False
+        for index_name in self.resolve(index, allow_no_indices=True):
+            aliases = self.indices[index_name].aliases
+            for alias in [a for a in aliases if fnmatchcase(a, name)]:
+                aliases.discard(alias)
+                removed = True
+        if not removed:
+            raise FakeElasticsearchError(
+                404, "aliases_not_found_exception", f"aliases [{name}] missing"
+            )
+        return 200, {"acknowledged": True}
+
+    def _plan_alias_action(self, action: dict) -> List[Callable[[], None]]:
+        """
+        Validate an update_aliases action.
+
+        :return: The changes to apply for the action.
+        """
+        (action_type, params), *_ = action.items()
+        index_names = self.resolve(
+            params.get("index") or ",".join(params.get("indices", []))
+        )
+        if action_type == "remove_index":
+            return [lambda name=name: self.indices.pop(name) for name in index_names]
+
+        alias_pattern = params.get("alias") or ",".join(params.get("aliases", []))
+        if action_type == "add":
+            return [
+                lambda name=name: self.indices[name].aliases.add(alias_pattern)
+                for name in index_names
+            ]
+
+        matches = [
+            (name, alias)
+            for name in index_names
+            for alias in self.indices[name].aliases
+            if fnmatchcase(alias, alias_pattern)
+        ]
+        if not matches and params.get("must_exist", True):
+            raise FakeElasticsearchError(
+                404, "aliases_not_found_exception", f"aliases [{alias_pattern}] missing"
+            )
+        return [
+            lambda name=name, alias=alias: self.indices[name].aliases.discard(alias)
+            for name, alias in matches
+        ]
+
+    def _update_aliases(self, body: Optional[bytes], **kwargs) -> Response:
+        actions = json.loads(body or b"{}").get("actions", [])
+        # Validate all the actions before applying any, the update is atomic
+        changes = [
+            change for action in actions for change in self._plan_alias_action(action)
+        ]
+        for change in changes:
+            change()
+        return 200, {"acknowledged": True}
+
+    def _put_mapping(self, index: str, body: Optional[bytes], **kwargs) -> Response:
+        mapping = json.loads(body or b"{}")
+        for name in self.resolve(index):
+            _merge_mappings(self.indices[name].mappings, mapping)
+        return 200, {"acknowledged": True}
+
+    def _get_mapping(self, index: str, **kwargs) -> Response:
+        return 200, {
+            name: {"mappings": self.indices[name].mappings}
+            for name in self.resolve(index)
+        }
+
+    def _stats(self, index: str, **kwargs) -> Response:
+        indices = {}
+        for name in self.resolve(index):
+            primaries = {
+                "docs": {"count": len(self.indices[name].documents), "deleted": 0},
+                "store": {"size_in_bytes": self.indices[name].size_in_bytes},
+            }
+            indices[name] = {"primaries": primaries, "total": primaries}
+        totals = {
+            "docs": {
+                "count": sum(i["primaries"]["docs"]["count"] for i in indices.values()),
+                "deleted": 0,
+            },
+            "store": {
+                "size_in_bytes": sum(
+                    i["primaries"]["store"]["size_in_bytes"] for i in indices.values()
+                )
+            },
+        }
+        return 200, {
+            "_all": {"primaries": totals, "total": totals},
+            "indices": indices,
+        }
+
+    def _refresh(self, index: str, **kwargs) -> Response:
+        self.resolve(index)
+        return 200, {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+
+    def _index_document(
+        self,
+        index: str,
+        document: dict,
+        _id: Optional[str],
+        op_type: str = "index",
+        params: Optional[dict] = None,
+    ) -> Tuple[int, dict]:
+        fake_index = self._write_index(index)
+        _id = _id or uuid.uuid4().hex
+        exists = _id in fake_index.documents
+        if exists and op_type == "create":
+            raise FakeElasticsearchError(
+                409,
+                "version_conflict_engine_exception",
+                f"[{_id}]: version conflict, document already exists",
+            )
+        fake_index.check_seq_no(_id, params or {})
+        seq_no = fake_index.write(_id, document)
+        return (200 if exists else 201), {
+            "_index": fake_index.name,
+            "_id": _id,
+            "_seq_no": seq_no,
+            "_primary_term": 1,
+            "result": "updated" if exists else "created",
+        }
+
+    def _update_document(self, index: str, _id: str, body: dict) -> Tuple[int, dict]:
+        fake_index = self._write_index(index)
+        if _id not in fake_index.documents:
+            if "upsert" in body or body.get("doc_as_upsert"):
+                return self._index_document(
+                    index, body.get("upsert", body.get("doc", {})), _id
+                )
+            raise FakeElasticsearchError(
+                404, "document_missing_exception", f"[{_id}]: document missing"
+            )
+        document = _merge_mappings(fake_index.documents[_id], body.get("doc", {}))
+        seq_no = fake_index.write(_id, document)
+        return 200, {
+            "_index": fake_index.name,
+            "_id": _id,
+            "_seq_no": seq_no,
+            "_primary_term": 1,
+            "result": "updated",
+        }
+
+    def _index(
+        self, index: str, body: Optional[bytes], id: Optional[str] = None, **kwargs
+    ) -> Response:
+        params = kwargs["params"]
+        return self._index_document(
+            index, json.loads(body or b"{}"), id, params.get("op_type", "index"), params
+        )
+
+    def _create(self, index: str, body: Optional[bytes], id: str, **kwargs) -> Response:
+        return self._index_document(index, json.loads(body or b"{}"), id, "create")
+
+    def _update(self, index: str, id: str, body: Optional[bytes], **kwargs) -> Response:
+        return self._update_document(index, id, json.loads(body or b"{}"))
+
+    def _get(self, index: str, id: str, **kwargs) -> Response:
+        for name in self.resolve(index):
+            if id in self.indices[name].documents:
+                return 200, {
+                    "_index": name,
+                    "_id": id,
+                    "_seq_no": self.indices[name].seq_nos[id],
+                    "_primary_term": 1,
+                    "found": True,
+                    "_source": self.indices[name].documents[id],
+                }
+        return 404, {"_index": index, "_id": id, "found": False}
+
+    def _delete(self, index: str, id: str, params: dict, **kwargs) -> Response:
+        fake_index = self._write_index(index)
+        fake_index.check_seq_no(id, params)
+        fake_index.seq_nos.pop(id, None)
+        if fake_index.documents.pop(id, None) is None:
+            return 404, {"_index": fake_index.name, "_id": id, "result": "not_found"}
+        return 200, {"_index": fake_index.name, "_id": id, "result": "deleted"}
+
+    def _matching_documents(
+        self, index: str, query: dict
+    ) -> List[Tuple[str, str, dict]]:
+        """
+        :return: (index, id, source) of documents matching the query. Only match_all
+            and ids queries are supported.
+        """
+        if "ids" in query:
+            ids = set(query["ids"]["values"])
+            accept = lambda _id: _id in ids  # noqa: E731
+        elif not query or "match_all" in query:
+            accept = lambda _id: True  # noqa: E731
+        else:
+            raise FakeElasticsearchError(
+                400,
+                "unsupported_operation_exception",
+                f"query {list(query)} is not supported by the fake backend",
+            )
+        return [
+            (name, _id, source)
+            for name in self.resolve(index, allow_no_indices=True)
+            for _id, source in self.indices[name].documents.items()
+            if accept(_id)
+        ]
+
+    def _search(self, index: str, body: Optional[bytes], params: dict, **kwargs):
+        data = json.loads(body or b"{}")
+        includes = data.get("_source", params.get("_source"))
+        if isinstance(includes, dict):
+            includes = includes.get("includes")
+        elif isinstance(includes, str):
+            includes = includes.split(",")
+        hits = [
+            {
+                "_index": name,
+                "_id": _id,
+                "_score": 1.0,
+                "_source": (
+                    _filter_source(source, includes)
+                    if isinstance(includes, list)
+                    else source
+                ),
+            }
+            for name, _id, source in self._matching_documents(
+                index, data.get("query", {})
+            )
+        ]
+        if includes is False:
+            for hit in hits:
+                del hit["_source"]
+        start = int(data.get("from", params.get("from", 0)))
+        size = int(data.get("size", params.get("size", 10)))
+        response = self._search_response(hits, hits[start : start + size])
+        if "scroll" in params:
+            response["_scroll_id"] = scroll_id = uuid.uuid4().hex
+            self.scrolls[scroll_id] = (hits[start + size :], size)
+        return 200, response
+
+    @staticmethod
+    def _search_response(hits: List[dict], page: List[dict]) -> dict:
+        return {
+            "took": 0,
+            "timed_out": False,
+            "_shards": SHARDS,
+            "hits": {
+                "total": {"value": len(hits), "relation": "eq"},
+                "max_score": 1.0 if hits else None,
+                "hits": page,
+            },
+        }
+
+    def _scroll(self, body: Optional[bytes], params: dict, **kwargs) -> Response:
+        scroll_id = json.loads(body or b"{}").get("scroll_id", params.get("scroll_id"))
+        if scroll_id not in self.scrolls:
+            raise FakeElasticsearchError(
+                404, "search_context_missing_exception", "No search context found"
+            )
+        hits, size = self.scrolls[scroll_id]
+        self.scrolls[scroll_id] = (hits[size:], size)
+        response = self._search_response(hits, hits[:size])
+        response["_scroll_id"] = scroll_id
+        return 200, response
+
+    def _clear_scroll(self, body: Optional[bytes], **kwargs) -> Response:
+        scroll_ids = json.loads(body or b"{}").get("scroll_id", [])
+        if isinstance(scroll_ids, str):
+            scroll_ids = [scroll_ids]
+        freed = [self.scrolls.pop(scroll_id, None) for scroll_id in scroll_ids]
+        return 200, {"succeeded": True, "num_freed": sum(map(bool, freed))}
+
+    def _count(self, index: str, body: Optional[bytes], **kwargs) -> Response:
+        query = json.loads(body or b"{}").get("query", {})
+        return 200, {"count": len(self._matching_documents(index, query))}
+
+    def _bulk(
+        self, body: Optional[bytes], index: Optional[str] = None, **kwargs
+    ) -> Response:
+        lines = [json.loads(line) for line in (body or b"").splitlines() if line]
+        items = []
+        position = 0
+        while position < len(lines):
+            (action, metadata), *_ = lines[position].items()
+            position += 1
+            source = None
+            if action != "delete":
+                source = lines[position]
+                position += 1
+            target = metadata.get("_index", index)
+            _id = metadata.get("_id")
+            try:
+                if action in ("index", "create"):
+                    status, result = self._index_document(target, source, _id, action)
+                elif action == "update":
+                    status, result = self._update_document(target, _id, source)
+                else:
+                    status, result = self._delete(target, _id, metadata)
+                result["status"] = status
+            except FakeElasticsearchError as e:
+                result = {
+                    "_index": target,
+                    "_id": _id,
+                    "status": e.status,
+                    "error": {"type": e.error_type, "reason": e.reason},
+                }
+            items.append({action: result})
+        self.stats.bulk_documents += len(items)
+        return 200, {
+            "took": 0,
+            "errors": any("error" in next(iter(item.values())) for item in items),
+            "items": items,
+        }
+
+
+def _perform_fake_request(
+    config: NodeConfig,
+    method: str,
+    target: str,
+    body: Optional[bytes],
+    headers: Optional[HttpHeaders],
+) -> NodeApiResponse:
+    if body and headers and headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    status, response_body, latency = get_fake_elasticsearch_cluster().perform_request(
+        method, target, body
+    )
+    response_headers = HttpHeaders({"x-elastic-product": "Elasticsearch"})
+    if response_body is not None:
+        response_headers["content-type"] = "application/json"
+    return NodeApiResponse(
+        ApiResponseMeta(
+            status=status,
+            http_version="1.1",
+            headers=response_headers,
+            duration=latency,
+            node=config,
+        ),
+        response_body or b"",
+    )
+
+
+class FakeElasticsearchNode(BaseNode):
+    """
+    elastic_transport node serving the requests from the process wide
+    FakeElasticsearchCluster instead of sending them over HTTP.
+    """
+
+    _CLIENT_META_HTTP_CLIENT = ("fake", "1.0")
+
+    def perform_request(
+        self,
+        method: str,
+        target: str,
+        body: Optional[bytes] = None,
+        headers: Optional[HttpHeaders] = None,
+        request_timeout: Any = None,
+    ) -> NodeApiResponse:
+        return _perform_fake_request(self.config, method, target, body, headers)
+
+
+class FakeElasticsearchAsyncNode(BaseAsyncNode):
+    """
+    Async variant of FakeElasticsearchNode for AsyncElasticsearch. The requests are
+    served in a thread, so that the simulated latencies of concurrent requests
+    overlap like the network round trips of real ones.
+    """
+
+    _CLIENT_META_HTTP_CLIENT = ("fake", "1.0")
+
+    async def perform_request(
+        self,
+        method: str,
+        target: str,
+        body: Optional[bytes] = None,
+        headers: Optional[HttpHeaders] = None,
+        request_timeout: Any = None,
+    ) -> NodeApiResponse:
+        return await asyncio.to_thread(
+            _perform_fake_request, self.config, method, target, body, headers
+        )
+
+    async def close(self) -> None:
+        pass
+
+
+_fake_elasticsearch_cluster: Optional[FakeElasticsearchCluster] = None
+_fake_elasticsearch_cluster_lock = threading.Lock()
+
+
+def get_fake_elasticsearch_cluster() -> FakeElasticsearchCluster:
+    """
+    :return: The process wide fake cluster, created on first use with the simulated
+        latency configured in settings.
+    """
+    global _fake_elasticsearch_cluster
+    with _fake_elasticsearch_cluster_lock:
+        if _fake_elasticsearch_cluster is None:
+            _fake_elasticsearch_cluster = FakeElasticsearchCluster(
+                latency_seconds=settings.ES_FAKE_LATENCY_SECONDS,
+                bytes_per_second=settings.ES_FAKE_BYTES_PER_SECOND,
+            )
+        return _fake_elasticsearch_cluster
@@ -10,7 +10,18 @@ class CustomHealthChecksAppConfig(AppConfig):
     name = "custom_health_checks"
 
     def ready(self):
-        from .backends import DatabaseHealthCheck
+        from common.elasticsearch import INDEX_ALIASES
+
+        from .backends import (
+            DatabaseHealthCheck,
+            ElasticsearchHealthCheck,
+            IndexHealthCheck,
+        )
 
         plugin_dir.register(DatabaseHealthCheck)
         logger.info("Registered DatabaseHealthCheck to health_check plugins.")
+        plugin_dir.register(ElasticsearchHealthCheck)
+        logger.info("Registered ElasticsearchHealthCheck to health_check plugins.")
+        for alias in INDEX_ALIASES:
+            plugin_dir.register(IndexHealthCheck, alias=alias)
+        logger.info("Registered IndexHealthCheck to health_check plugins.")
@@ -1,7 +1,24 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from django.conf import settings
 from django.db import connection
 from health_check.backends import BaseHealthCheckBackend
 from health_check.exceptions import ServiceUnavailable
 
+from common.cache import BackgroundCache, CachedResult
+from common.elasticsearch import (
+    get_elasticsearch_client,
+    get_request_timeout,
+    IMPORT_COMPLETED_AT_META,
+    INDEX_ALIASES,
+)
+
+# Maximum ages of the aliases' imports in seconds by alias, overridden by the
+# setting ES_INDEX_MAX_AGE_SECONDS
+DEFAULT_INDEX_MAX_AGES = {"default": 2 * 24 * 60 * 60}
+
 
 class DatabaseHealthCheck(BaseHealthCheckBackend):
     """
@@ -24,3 +41,192 @@ class DatabaseHealthCheck(BaseHealthCheckBackend):
 
     def identifier(self):
         return self.__class__.__name__  # Display name on the endpoint.
+
+
+def get_cached_result(cache: BackgroundCache) -> Optional[CachedResult]:
+    """
+    :return: The result of the cached Elasticsearch check. The first check of the
+        process is waited for at most its request timeout.
+    """
+    return cache.get_result(wait=get_request_timeout("health_check"))
+
+
+def raise_for_cached_result(result: Optional[CachedResult]) -> None:
+    """
+    :raise ServiceUnavailable: If the cached Elasticsearch check has not completed
+        yet, its result is older than ES_HEALTH_CHECK_MAX_AGE seconds, or the check
+        failed.
+    """
+    if result is None:
+        raise ServiceUnavailable("Elasticsearch health has not been checked yet")
+    if result.age > settings.ES_HEALTH_CHECK_MAX_AGE:
+        raise ServiceUnavailable(
+            f"Elasticsearch health check is stale, last checked {result.age:.0f} s ago"
+        )
+    if result.error:
+        raise ServiceUnavailable(f"Elasticsearch connection failed: {result.error}")
+
+
+def get_elasticsearch_cluster_health() -> dict:
+    """:return: The health of the Elasticsearch cluster."""
+    return get_elasticsearch_client("health_check").cluster.health().body
+
+
+elasticsearch_health = BackgroundCache(
+    "elasticsearch",
+    get_elasticsearch_cluster_health,
+    get_ttl=lambda: settings.ES_HEALTH_CHECK_TTL,
+)
+
+
+class ElasticsearchHealthCheck(BaseHealthCheckBackend):
+    """
+    Custom health check for the Elasticsearch cluster, served from the cluster
+    health checked in the background every ES_HEALTH_CHECK_TTL seconds.
+
+    Reported as unavailable if the cluster is unreachable or red, or if the last
+    check is older than ES_HEALTH_CHECK_MAX_AGE seconds. The status includes the
+    latency and the age of the last check.
+
+    Not critical, i.e. does not fail the health check endpoint used as the liveness
+    probe, because restarting the service would not fix an Elasticsearch outage.
+    """
+
+    critical_service = False
+
+    def __init__(self):
+        super().__init__()
+        self.result = None
+
+    def check_status(self):
+        self.result = get_cached_result(elasticsearch_health)
+        raise_for_cached_result(self.result)
+        if self.result.value.get("status") == "red":
+            raise ServiceUnavailable("Elasticsearch cluster status is red")
+
+    def pretty_status(self):
+        status = super().pretty_status()
+        if self.result is None:
+            return status
+        return (
+            f"{status} (latency {self.result.latency * 1000:.0f} ms, "
+            f"age {self.result.age:.0f} s)"
+        )
+
+    def identifier(self):
+        return self.__class__.__name__  # Display name on the endpoint.
+
+
+@dataclass(frozen=True)
+class IndexHealth:
+    """
+    Health of an index alias.
+
+    :param index: The index the alias points to, None if it does not exist.
+    :param doc_count: Document count of the index.
+    :param import_completed_at: time.time() when the import of the index was
+        completed, None if unknown, e.g. for indices imported before it was stored.
+    :param wip_index: The index being imported, None if no import is in progress.
+    """
+
+    index: Optional[str] = None
+    doc_count: int = 0
+    import_completed_at: Optional[float] = None
+    wip_index: Optional[str] = None
+
+
+def get_index_health() -> Dict[str, IndexHealth]:
+    """
+    :return: The health of the index aliases by alias, from the aliases and the
+        mapping metadata of the aliases' indices and their document counts, i.e.
+        with two requests for all the aliases.
+    """
+    es = get_elasticsearch_client("health_check")
+    # The aliases point to the indices "<alias>_1" and "<alias>_2", see Importer
+    patterns = ",".join(f"{alias}_*" for alias in INDEX_ALIASES)
+    indices = es.indices.get(index=patterns, features=["aliases", "mappings"])
+    stats = es.indices.stats(index=patterns, metric="docs")["indices"]
+    doc_counts = {name: i["primaries"]["docs"]["count"] for name, i in stats.items()}
+
+    aliases = {name: index["aliases"] for name, index in indices.items()}
+    health = {}
+    for alias in INDEX_ALIASES:
+        active = next((name for name, a in aliases.items() if alias in a), None)
+        # Without a previous index, the alias points to the wip index during imports
+        wip = next((name for name, a in aliases.items() if f"{alias}_wip" in a), None)
+        meta = indices[active]["mappings"].get("_meta", {}) if active else {}
+        health[alias] = IndexHealth(
+            index=active,
+            doc_count=doc_counts.get(active, 0),
+            import_completed_at=meta.get(IMPORT_COMPLETED_AT_META),
+            wip_index=wip,
+        )
+    return health
+
+
+index_health = BackgroundCache(
+    "indices", get_index_health, get_ttl=lambda: settings.ES_HEALTH_CHECK_TTL
+)
+
+
+def get_index_max_age(alias: str) -> float:
+    """:return: The maximum age of the alias's import in seconds."""
+    max_ages = {**DEFAULT_INDEX_MAX_AGES, **settings.ES_INDEX_MAX_AGE_SECONDS}
+    return float(max_ages.get(alias, max_ages["default"]))
+
+
+class IndexHealthCheck(BaseHealthCheckBackend):
+    """
+    Custom health check for an index alias, e.g. "location", served from the health
+    of all the aliases checked in the background with the Elasticsearch health.
+
+    Reported as unavailable if the alias does not exist, its index is empty, or its
+    import was completed more than ES_INDEX_MAX_AGE_SECONDS ago. The status
+    includes the document count, the age of the import and whether a new import is
+    in progress.
+
+    Not critical, i.e. does not fail the health check endpoint, because restarting
+    the service would not fix a stale or an empty index.
+    """
+
+    critical_service = False
+
+    def __init__(self, alias: str):
+        super().__init__()
+        self.alias = alias
+        self.health: Optional[IndexHealth] = None
+
+    def check_status(self):
+        result = get_cached_result(index_health)
+        raise_for_cached_result(result)
+        self.health = result.value[self.alias]
+        if self.health.index is None:
+            raise ServiceUnavailable(f"Index alias {self.alias} does not exist")
+        if self.health.doc_count == 0:
+            raise ServiceUnavailable(f"Index {self.health.index} is empty")
+        if (age := self.get_age()) is not None and age > get_index_max_age(self.alias):
+            raise ServiceUnavailable(
+                f"Index {self.health.index} is stale, imported {age:.0f} s ago"
+            )
+
+    def get_age(self) -> Optional[float]:
+        """:return: Seconds since the import of the alias's index was completed."""
+        if self.health is None or self.health.import_completed_at is None:
+            return None
+        return time.time() - self.health.import_completed_at
+
+    def pretty_status(self):
+        status = super().pretty_status()
+        if self.health is None:
+            return status
+        details = [f"{self.health.doc_count} documents"]
+        if (age := self.get_age()) is not None:
+            details.append(f"age {age:.0f} s")
+        if self.health.wip_index:
+            details.append(f"import to {self.health.wip_index} in progress")
+        return f"{status} ({', '.join(details)})"
+
+    def identifier(self):
+        return (
+            f"{self.__class__.__name__}:{self.alias}"  # Display name on the endpoint.
+        )
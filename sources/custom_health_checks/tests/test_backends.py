@@ -1,10 +1,21 @@
+import re
+import time
+from dataclasses import replace
 from unittest.mock import patch
 
 import pytest
 from django.db import OperationalError
 from health_check.exceptions import ServiceUnavailable
 
-from custom_health_checks.backends import DatabaseHealthCheck
+from common.elasticsearch import get_elasticsearch_client
+from common.fake_elasticsearch import get_fake_elasticsearch_cluster
+from custom_health_checks.backends import (
+    DatabaseHealthCheck,
+    elasticsearch_health,
+    ElasticsearchHealthCheck,
+    index_health,
+    IndexHealthCheck,
+)
 
 
 @patch("django.db.connection.cursor")
@@ -42,3 +53,164 @@ def test_database_check_status_with_real_database(db):  # Use the 'db' fixture
         health_check.check_status()  # Should not raise an exception
     except ServiceUnavailable as e:
         pytest.fail(f"Database health check failed: {e}")
+
+
+@pytest.fixture
+def fake_cluster(settings):
+    settings.ES_BACKEND = "fake"
+    settings.ES_HEALTH_CHECK_TTL = 3600
+    cluster = get_fake_elasticsearch_cluster()
+    cluster.reset()
+    elasticsearch_health.stop()
+    yield cluster
+    elasticsearch_health.stop()
+    cluster.reset()
+
+
+def test_elasticsearch_check_status_is_cached(fake_cluster):
+    """
+    Test that the probes are served from the cluster health checked in the
+    background, instead of querying the cluster on every probe.
+    """
+    for _ in range(3):
+        health_check = ElasticsearchHealthCheck()
+        health_check.run_check()
+        assert health_check.errors == []
+    assert fake_cluster.stats.requests == {"cluster.health": 1}
+    assert re.fullmatch(
+        r"working \(latency \d+ ms, age \d+ s\)", health_check.pretty_status()
+    )
+
+
+def test_elasticsearch_check_status_is_refreshed(fake_cluster, settings):
+    settings.ES_HEALTH_CHECK_TTL = 0.01
+    ElasticsearchHealthCheck().check_status()
+    time.sleep(0.1)
+    assert fake_cluster.stats.requests["cluster.health"] > 1
+
+
+def test_elasticsearch_check_status_failure(fake_cluster, mocker):
+    mocker.patch.object(
+        elasticsearch_health, "load", side_effect=ConnectionError("Refused")
+    )
+    with pytest.raises(ServiceUnavailable) as exc_info:
+        ElasticsearchHealthCheck().check_status()
+    assert "Elasticsearch connection failed: Refused" in str(exc_info.value)
+    assert not ElasticsearchHealthCheck.critical_service
+
+
+def test_elasticsearch_check_status_red(fake_cluster, mocker):
+    mocker.patch.object(elasticsearch_health, "load", return_value={"status": "red"})
+    with pytest.raises(ServiceUnavailable) as exc_info:
+        ElasticsearchHealthCheck().check_status()
+    assert "Elasticsearch cluster status is red" in str(exc_info.value)
+
+
+def test_elasticsearch_check_status_stale(fake_cluster, settings):
+    """
+    Test that a stale result is reported as unavailable, e.g. if the checks hang.
+    """
+    settings.ES_HEALTH_CHECK_MAX_AGE = 60
+    ElasticsearchHealthCheck().check_status()
+    result = elasticsearch_health.get_result()
+    elasticsearch_health._result = replace(result, loaded_at=result.loaded_at - 61)
+
+    with pytest.raises(ServiceUnavailable) as exc_info:
+        ElasticsearchHealthCheck().check_status()
+    assert "Elasticsearch health check is stale, last checked 61 s ago" in str(
+        exc_info.value
+    )
+
+
+def create_index(
+    es, index: str, aliases: list, doc_count: int, imported_ago: float = None
+):
+    es.indices.create(index=index, aliases={alias: {} for alias in aliases})
+    for i in range(doc_count):
+        es.index(index=index, id=str(i), document={"id": i})
+    if imported_ago is not None:
+        es.indices.put_mapping(
+            index=index, meta={"import_completed_at": time.time() - imported_ago}
+        )
+
+
+def run_index_health_check(alias: str) -> IndexHealthCheck:
+    health_check = IndexHealthCheck(alias=alias)
+    health_check.run_check()
+    return health_check
+
+
+@pytest.fixture
+def index_health_cache():
+    index_health.stop()
+    yield
+    index_health.stop()
+
+
+def test_index_check_status(fake_cluster, index_health_cache):
+    es = get_elasticsearch_client()
+    create_index(es, "location_1", ["location"], doc_count=2, imported_ago=100)
+    create_index(es, "location_2", ["location_wip"], doc_count=1)
+    create_index(
+        es, "ontology_word_1", ["ontology_word"], doc_count=3, imported_ago=100
+    )
+
+    location = run_index_health_check("location")
+    ontology_word = run_index_health_check("ontology_word")
+
+    assert location.errors == []
+    assert re.fullmatch(
+        r"working \(2 documents, age 10\d s, import to location_2 in progress\)",
+        location.pretty_status(),
+    )
+    assert ontology_word.errors == []
+    assert re.fullmatch(
+        r"working \(3 documents, age 10\d s\)", ontology_word.pretty_status()
+    )
+    # The health of all the aliases is checked at once in the background
+    assert fake_cluster.stats.requests["indices.get"] == 1
+    assert fake_cluster.stats.requests["indices.stats"] == 1
+
+
+def test_index_check_status_first_import(fake_cluster, index_health_cache):
+    """
+    Test the first import, whose wip index the alias points to before it completes.
+    """
+    es = get_elasticsearch_client()
+    create_index(es, "location_1", ["location", "location_wip"], doc_count=2)
+
+    health_check = run_index_health_check("location")
+
+    assert health_check.errors == []
+    assert health_check.pretty_status() == (
+        "working (2 documents, import to location_1 in progress)"
+    )
+
+
+@pytest.mark.parametrize(
+    "index,error",
+    [
+        (None, "Index alias location does not exist"),
+        (("location_1", 0, 100), "Index location_1 is empty"),
+        (("location_1", 2, 1000), "Index location_1 is stale, imported 1000 s ago"),
+    ],
+)
+def test_index_check_status_failure(
+    fake_cluster, index_health_cache, settings, index, error
+):
+    settings.ES_INDEX_MAX_AGE_SECONDS = {"location": 500}
+    if index:
+        name, doc_count, imported_ago = index
+        create_index(
+            get_elasticsearch_client(),
+            name,
+            ["location"],
+            doc_count=doc_count,
+            imported_ago=imported_ago,
+        )
+
+    health_check = run_index_health_check("location")
+
+    assert health_check.status == 0
+    assert error in health_check.pretty_status()
+    assert not health_check.critical_service
@@ -4,21 +4,38 @@ from django.test import Client
 from django.urls import reverse
 from health_check.exceptions import ServiceUnavailable
 
+from common.cache import CachedResult
+from common.elasticsearch import INDEX_ALIASES
+from custom_health_checks.backends import elasticsearch_health
 
+
+@patch("custom_health_checks.backends.IndexHealthCheck.check_status")
+@patch("custom_health_checks.backends.ElasticsearchHealthCheck.check_status")
 @patch("custom_health_checks.backends.DatabaseHealthCheck.check_status")
-def test_healthz_success(mock_check_status, client: Client):  # Use the 'client' fixture
+def test_healthz_success(
+    mock_check_status, mock_es_check_status, mock_index_check_status, client: Client
+):
     """
     Test /healthz endpoint with successful health checks.
     """
     mock_check_status.return_value = None  # Simulate successful check
+    mock_es_check_status.return_value = None
     url = reverse("healthz")
     response = client.get(url)
     assert response.status_code == 200
-    assert response.content == b'{"DatabaseHealthCheck": "working"}'
+    assert response.json() == {
+        "DatabaseHealthCheck": "working",
+        "ElasticsearchHealthCheck": "working",
+        **{f"IndexHealthCheck:{alias}": "working" for alias in INDEX_ALIASES},
+    }
 
 
+@patch("custom_health_checks.backends.IndexHealthCheck.check_status")
+@patch("custom_health_checks.backends.ElasticsearchHealthCheck.check_status")
 @patch("custom_health_checks.backends.DatabaseHealthCheck.check_status")
-def test_healthz_database_error(mock_check_status, client: Client):
+def test_healthz_database_error(
+    mock_check_status, mock_es_check_status, mock_index_check_status, client: Client
+):
     """
     Test /healthz endpoint with a database error.
     """
@@ -27,3 +44,48 @@ def test_healthz_database_error(mock_check_status, client: Client):
     response = client.get(url)
     assert response.status_code == 500
     assert b"Database error" in response.content
+
+
+@patch("custom_health_checks.backends.IndexHealthCheck.check_status")
+@patch("custom_health_checks.backends.DatabaseHealthCheck.check_status")
+def test_healthz_elasticsearch_error(
+    mock_check_status, mock_index_check_status, client: Client, mocker
+):
+    """
+    Test /healthz endpoint with an Elasticsearch error, which is not critical.
+    """
+    mocker.patch.object(
+        elasticsearch_health,
+        "get_result",
+        return_value=CachedResult(
+            value=None, error="Connection refused", latency=0.005, loaded_at=0
+        ),
+    )
+    mocker.patch("common.cache.time.monotonic", return_value=2)
+    url = reverse("healthz")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["ElasticsearchHealthCheck"] == (
+        "unavailable: Elasticsearch connection failed: Connection refused "
+        "(latency 5 ms, age 2 s)"
+    )
+
+
+@patch("custom_health_checks.backends.ElasticsearchHealthCheck.check_status")
+@patch("custom_health_checks.backends.DatabaseHealthCheck.check_status")
+def test_healthz_index_error(
+    mock_check_status, mock_es_check_status, client: Client, mocker
+):
+    """
+    Test /healthz endpoint with an empty index, which is not critical.
+    """
+    mocker.patch(
+        "custom_health_checks.backends.IndexHealthCheck.check_status",
+        side_effect=ServiceUnavailable("Index location_1 is empty"),
+    )
+    url = reverse("healthz")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["IndexHealthCheck:location"] == (
+        "unavailable: Index location_1 is empty"
+    )
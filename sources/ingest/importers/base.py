@@ -1,18 +1,148 @@
+import asyncio
+import functools
 import logging
+import time
 from abc import ABC, abstractmethod
 from dataclasses import asdict, is_dataclass
-from typing import Generic, List, Optional, Tuple, TypeVar
+from itertools import islice
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
+from django.conf import settings
+from elasticsearch import AsyncElasticsearch, Elasticsearch
 from elasticsearch.exceptions import NotFoundError
+from elasticsearch.helpers import async_streaming_bulk, BulkIndexError
 from elasticsearch.helpers import bulk as elasticsearch_bulk
+from elasticsearch.helpers import scan as elasticsearch_scan
 
-from common.elasticsearch import get_elasticsearch_client
+from common.elasticsearch import (
+    get_async_elasticsearch_client,
+    get_elasticsearch_client,
+    IMPORT_COMPLETED_AT_META,
+    measure_ndjson_request_bytes,
+)
+from ingest.importers.utils.checkpoint import ImportCheckpoint
+from ingest.importers.utils.instrumentation import ImportStats
+from ingest.importers.utils.sharding import Shard, ShardCoordination
+from ingest.importers.utils.tracing import trace_span
+from ingest.locks import ImporterLock
 
 logger = logging.getLogger(__name__)
 
-
 IndexableData = TypeVar("IndexableData")
 
+# Documents per bulk request of add_data_stream()
+BULK_CHUNK_SIZE = 500
+
+# How many of a bulk request's failed documents are logged
+MAX_LOGGED_BULK_ERRORS = 10
+
+
+async def _iterate_async(iterable) -> AsyncIterator:
+    """Iterate over a sync or an async iterable asynchronously."""
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+def _reporting_shard_failure(init):
+    """
+    Wrap an importer's __init__() to report the failure of its shard, e.g. of the
+    coordinator fetching the base data, so that the workers do not wait for it.
+    """
+
+    @functools.wraps(init)
+    def wrapper(self, *args, **kwargs):
+        try:
+            init(self, *args, **kwargs)
+        except Exception:
+            if getattr(self, "shard_coordination", None):
+                self.shard_coordination.report(success=False)
+            raise
+
+    return wrapper
+
+
+class ImportValidationError(Exception):
+    """Raised when the imported data is not valid to be swapped active."""
+
+
+class RollbackError(Exception):
+    """Raised when an alias cannot be rolled back to its previous index."""
+
+
+def get_mapping_errors(expected: dict, actual: dict, path: str = "") -> List[str]:
+    """
+    Compare the field types of an index mapping to the expected ones.
+
+    :return: Descriptions of the fields missing or having another type than expected.
+    """
+    errors = []
+    actual_properties = actual.get("properties", {})
+    for name, field_mapping in expected.get("properties", {}).items():
+        field_path = f"{path}{name}"
+        actual_field_mapping = actual_properties.get(name)
+        if actual_field_mapping is None:
+            errors.append(f"field {field_path} is missing")
+        elif field_mapping.get("type", "object") != actual_field_mapping.get(
+            "type", "object"
+        ):
+            errors.append(
+                f"field {field_path} has type "
+                f"{actual_field_mapping.get('type', 'object')}, expected "
+                f"{field_mapping.get('type', 'object')}"
+            )
+        else:
+            errors += get_mapping_errors(
+                field_mapping, actual_field_mapping, f"{field_path}."
+            )
+    return errors
+
+
+def rollback_alias(es: Elasticsearch, alias: str) -> str:
+    """
+    Swap an importer's alias back to its previous index, which is kept after imports
+    with settings.IMPORT_KEEP_PREVIOUS_INDEX until the next import starts.
+
+    :return: The index the alias points to after the rollback.
+    :raise RollbackError: If there is no previous index or an import is in progress.
+    """
+    try:
+        [active_index] = es.indices.get_alias(name=alias)
+    except (NotFoundError, ValueError):
+        raise RollbackError(f"Alias {alias} does not point to a single index.")
+    if es.options(ignore_status=404).indices.exists_alias(name=f"{alias}_wip"):
+        raise RollbackError(f"Import of {alias} is in progress.")
+    previous_index = f"{alias}_2" if active_index == f"{alias}_1" else f"{alias}_1"
+    if not es.indices.exists(index=previous_index):
+        raise RollbackError(f"Previous index {previous_index} of {alias} not found.")
+
+    es.indices.update_aliases(
+        body={
+            "actions": [
+                {"add": {"index": previous_index, "alias": alias}},
+                {"remove": {"index": active_index, "alias": alias}},
+            ]
+        }
+    )
+    logger.info(f"Rolled {alias} back from {active_index} to {previous_index}")
+    return previous_index
+
 
 class Importer(ABC, Generic[IndexableData]):
     """Base class for importers.
@@ -22,7 +152,9 @@ class Importer(ABC, Generic[IndexableData]):
     to import multiple kinds of data with the same importer) and implement run(), which
     will be called and should carry out the actual importing / ingesting process.
     Basically it should call apply_mapping() once at the beginning if needed, and then
-    add documents using add_data() method.
+    add documents using add_data() method. The settings that cannot be changed after
+    an index has been created, e.g. index sorting, are given in index_definitions
+    with the mappings of their fields instead.
 
     For every index_base_name there will be actually two indexes used. Let's use name
     "location" as an example here. Then, there will be actual indexes "location_1" and
@@ -35,20 +167,101 @@ class Importer(ABC, Generic[IndexableData]):
     the import is finished, the "location" alias is swapped to the new index, and the
     old index is removed.
 
+    Timing and throughput statistics of the run are collected to self.stats, see
+    ImportStats. Subclasses can time their own stages with self.stats.stage(name).
+
+    Before the swap, the imported data is validated, see _validate(). If it is not
+    valid, ImportValidationError is raised and the active alias keeps pointing to the
+    old index. With settings.IMPORT_KEEP_PREVIOUS_INDEX the old index is not removed
+    after the swap, so that the alias can be rolled back to it, see rollback_alias().
+
     A special occasion is when data is being imported the first time. In that case,
     "location" alias will also point to the yet to be finished index so that one
     doesn't need to wait for the import to finish to get some data available.
+
+    Besides the full imports, an importer can support partial updates of the active
+    index in place, e.g. refreshing only the frequently changing parts of the data.
+    Those are listed in partial_updates, and carried out by update_<name>() methods
+    called by base_partial_update(). They usually read the existing documents with
+    scan_data() and update them with update_data_bulk().
+
+    Large amounts of documents are best indexed with add_data_stream(), which sends
+    them in bulk requests of BULK_CHUNK_SIZE documents instead of one request per
+    document like add_data().
+
+    A resumable importer, i.e. one with a single index base name, saving its progress
+    to self.checkpoint while indexing (see ImportCheckpoint) and indexing its
+    documents with deterministic IDs (see get_document_id()), can be created with
+    resume=True to continue an interrupted import into the existing wip index instead
+    of starting over.
+
+    A resumable importer can also be run sharded, i.e. as multiple processes each
+    created with its own shard, see ingest.importers.utils.sharding. The workers
+    restore the base data from the checkpoint of the coordinator's wip index and
+    index only their shard's slice of the data, see Shard.get_slice().
     """
 
     index_base_names: Tuple[str, ...]
+    partial_updates: Tuple[str, ...] = ()
+    resumable: bool = False
+    # Settings and mappings of the wip indices by index base name, used when creating
+    # them, e.g. index sorting, which cannot be changed afterwards
+    index_definitions: Dict[str, dict] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # The coordinator starts the sharded run on creation, and the subclasses
+        # fetch their base data after it, see _reporting_shard_failure()
+        if "__init__" in cls.__dict__:
+            cls.__init__ = _reporting_shard_failure(cls.__init__)
 
-    def __init__(self, use_fallback_languages=True) -> None:
+    def __init__(
+        self,
+        use_fallback_languages=True,
+        resume=False,
+        shard: Optional[Shard] = None,
+    ) -> None:
         if not getattr(self, "index_base_names", None):
             raise NotImplementedError(
                 f"Importer {self.__class__.__name__} is missing index_base_names."
             )
-        self.es = get_elasticsearch_client().options(request_timeout=60)
+        if (resume or shard) and not self.resumable:
+            raise ValueError(f"Importer {self.__class__.__name__} is not resumable.")
+        if resume and shard:
+            raise ValueError("Sharded imports cannot be resumed.")
+        self.es = get_elasticsearch_client("import")
         self.use_fallback_languages = use_fallback_languages
+        self.stats = ImportStats(importer=self.__class__.__name__)
+        # Mappings applied to the wip indices by index base name
+        self.applied_mappings: Dict[str, dict] = {}
+        # Run locks held by the run, see ingest.locks
+        self.locks: List[ImporterLock] = []
+        self.shard = shard
+        self.shard_coordination = (
+            ShardCoordination(self.index_base_names[0], shard) if shard else None
+        )
+        # Bulk document and error counts of all the shards of a sharded import,
+        # validated by the coordinator instead of its own ones
+        self.shard_bulk_counts: Optional[Dict[str, int]] = None
+        # Checkpoint of a resumable importer's wip index. When resuming, it is the
+        # interrupted import's checkpoint, and for shard workers the coordinator's
+        # one. Otherwise it is created in _initialize().
+        self.checkpoint: Optional[ImportCheckpoint] = None
+        if resume:
+            self.checkpoint = self._get_resumable_checkpoint()
+        elif self.is_shard_worker:
+            self.checkpoint = ImportCheckpoint(
+                self.shard_coordination.wait_for_publication(
+                    settings.IMPORT_SHARD_TIMEOUT_SECONDS
+                )
+            )
+        elif shard:
+            self.shard_coordination.start()
+        self.resuming = resume and self.checkpoint is not None
+
+    @property
+    def is_shard_worker(self) -> bool:
+        return bool(self.shard and not self.shard.is_coordinator)
 
     @abstractmethod
     def run(self) -> None:
@@ -59,9 +272,45 @@ class Importer(ABC, Generic[IndexableData]):
         Initializes, runs and finishes the importing.
         :return: the count of units imported or None if there was no importer.
         """
-        self._initialize()
-        result = self.run()
-        self._finish()
+        with self.stats.activate():
+            try:
+                with self.stats.stage("initialize"):
+                    self._initialize()
+                with self.stats.stage("run"):
+                    result = self.run()
+                with self.stats.stage("finish"):
+                    self._finish()
+            except Exception:
+                if self.shard_coordination:
+                    self.shard_coordination.report(success=False)
+                raise
+        self.stats.finish()
+        self.stats.log_summary()
+        return result
+
+    @classmethod
+    def for_partial_update(cls, **kwargs) -> "Importer":
+        """
+        Create an importer for partial updates, i.e. without initializing anything
+        only the full import needs.
+        """
+        return cls(**kwargs)
+
+    def base_partial_update(self, name: str):
+        """
+        Runs the named partial update of the active index.
+        :return: the count of documents updated.
+        """
+        if name not in self.partial_updates:
+            raise ValueError(
+                f"Importer {self.__class__.__name__} does not support partial "
+                f"update {name}, supported: {list(self.partial_updates)}."
+            )
+        with self.stats.activate():
+            with self.stats.stage("run"):
+                result = getattr(self, f"update_{name}")()
+        self.stats.finish()
+        self.stats.log_summary()
         return result
 
     def add_data(
@@ -73,7 +322,9 @@ class Importer(ABC, Generic[IndexableData]):
         index_name = self._get_wip_alias(index_base_name or self.index_base_names[0])
         body = asdict(data) if is_dataclass(data) else data
         try:
-            self.es.index(index=index_name, body=body, **(extra_params or {}))
+            with self.stats.stage("index"):
+                self.es.index(index=index_name, body=body, **(extra_params or {}))
+            self.stats.increment("documents")
         except ConnectionError as e:
             logger.error(e)
 
@@ -83,22 +334,298 @@ class Importer(ABC, Generic[IndexableData]):
         index_base_name: Optional[str] = None,
     ) -> None:
         index_name = self._get_wip_alias(index_base_name or self.index_base_names[0])
+        self._bulk(
+            index_name,
+            [
+                self._get_index_action(index_name, self.get_document_id(d), d)
+                for d in data
+            ],
+        )
+
+    def add_data_stream(
+        self,
+        documents: Iterable[Tuple[Optional[str], IndexableData]],
+        index_base_name: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """
+        Index the documents in bulk requests of chunk_size documents, consuming the
+        iterable lazily one chunk at a time.
+
+        Unlike with add_data_bulk(), documents failing to be indexed do not fail the
+        import, but are logged and counted to the bulk errors, which are limited by
+        the validation, see _validate().
+
+        :param documents: Pairs of document ID, or None to let Elasticsearch
+            generate one, and the data.
+        :return: Number of documents indexed successfully.
+        """
+        index_name = self._get_wip_alias(index_base_name or self.index_base_names[0])
+        documents = iter(documents)
+        indexed = 0
+        while chunk := list(islice(documents, chunk_size or BULK_CHUNK_SIZE)):
+            body = [
+                self._get_index_action(index_name, _id, data) for _id, data in chunk
+            ]
+            indexed += len(body) - self._bulk(index_name, body, raise_on_error=False)
+        return indexed
+
+    async def add_data_stream_async(
+        self,
+        documents: Union[
+            Iterable[Tuple[Optional[str], IndexableData]],
+            AsyncIterable[Tuple[Optional[str], IndexableData]],
+        ],
+        index_base_name: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> int:
+        """
+        Async variant of add_data_stream() on an AsyncElasticsearch client: a chunk
+        is sent as soon as it is full, with at most max_in_flight bulk requests in
+        flight at a time, so that producing the documents, e.g. fetching and
+        transforming them, overlaps with indexing the previous chunks.
+
+        :param documents: Pairs of document ID, or None to let Elasticsearch
+            generate one, and the data, as a sync or an async iterable.
+        :param max_in_flight: Max number of concurrent bulk requests,
+            settings.IMPORT_BULK_MAX_IN_FLIGHT by default.
+        :return: Number of documents indexed successfully.
+        """
+        index_name = self._get_wip_alias(index_base_name or self.index_base_names[0])
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        slots = asyncio.Semaphore(max_in_flight or settings.IMPORT_BULK_MAX_IN_FLIGHT)
+        in_flight: Set[asyncio.Task] = set()
+        count = errors = 0
+
+        async with get_async_elasticsearch_client("import") as es:
+
+            async def submit(chunk: List[dict]) -> None:
+                nonlocal errors
+                await slots.acquire()
+                # Fail fast on the errors of the requests completed so far
+                errors += self._collect_bulk_errors(in_flight)
+                task = asyncio.create_task(self._bulk_async(es, index_name, chunk))
+                task.add_done_callback(lambda _: slots.release())
+                in_flight.add(task)
+
+            try:
+                chunk = []
+                async for _id, data in _iterate_async(documents):
+                    chunk.append(self._get_index_action(index_name, _id, data))
+                    count += 1
+                    if len(chunk) == chunk_size:
+                        await submit(chunk)
+                        chunk = []
+                    # Let the bulk requests in flight proceed
+                    await asyncio.sleep(0)
+                if chunk:
+                    await submit(chunk)
+                if in_flight:
+                    await asyncio.wait(in_flight)
+                errors += self._collect_bulk_errors(in_flight)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+        return count - errors
+
+    @staticmethod
+    def _collect_bulk_errors(in_flight: Set[asyncio.Task]) -> int:
+        """
+        Remove the completed bulk requests from the ones in flight.
+
+        :return: Number of their failed documents.
+        :raise: The error of a failed request.
+        """
+        done = {task for task in in_flight if task.done()}
+        in_flight -= done
+        return sum(task.result() for task in done)
+
+    @staticmethod
+    def _get_index_action(
+        index_name: str, _id: Optional[str], data: IndexableData
+    ) -> dict:
+        action = {
+            "_index": index_name,
+            "_source": asdict(data) if is_dataclass(data) else data,
+        }
+        if _id is not None:
+            action["_id"] = _id
+        return action
+
+    def get_document_id(self, data: IndexableData) -> Optional[str]:
+        """
+        Deterministic ID of the document to index, so that indexing the same data
+        again overwrites the document instead of duplicating it.
+        :return: The ID, or None to let Elasticsearch generate one.
+        """
+        return None
+
+    def update_data_bulk(
+        self,
+        updates: Dict[str, dict],
+        index_base_name: Optional[str] = None,
+    ) -> None:
+        """
+        Partially update existing documents of the active index.
+
+        :param updates: Mapping from document ID to the fields to update. Objects are
+            merged with the existing ones, other values replace the existing ones.
+        """
+        index_name = index_base_name or self.index_base_names[0]
 
         body = [
-            {"_index": index_name, "_source": asdict(d) if is_dataclass(d) else d}
-            for d in data
+            {"_op_type": "update", "_index": index_name, "_id": _id, "doc": doc}
+            for _id, doc in updates.items()
         ]
-        try:
-            elasticsearch_bulk(self.es, body)
-        except ConnectionError as e:
-            logger.error(e)
+        self._bulk(index_name, body)
 
-    def apply_mapping(self, mapping: dict, index_base_name: Optional[str] = None):
+    def scan_data(
+        self, source: List[str], index_base_name: Optional[str] = None
+    ) -> Iterator[dict]:
+        """
+        Iterate over all the documents of the active index.
+
+        :param source: Paths of the fields to include in the documents' _source.
+        :return: The documents' hits, i.e. dicts with keys _id and _source etc.
+        """
+        return elasticsearch_scan(
+            self.es,
+            index=index_base_name or self.index_base_names[0],
+            query={"query": {"match_all": {}}, "_source": source},
+        )
+
+    def get_indexed_ids(self, index_base_name: Optional[str] = None) -> Set[str]:
+        """:return: The IDs of the documents indexed to the wip index so far."""
         index_name = self._get_wip_alias(index_base_name or self.index_base_names[0])
+        return {
+            hit["_id"]
+            for hit in elasticsearch_scan(
+                self.es, index=index_name, query={"_source": False}
+            )
+        }
+
+    def _bulk(
+        self, index_name: str, body: List[dict], raise_on_error: bool = True
+    ) -> int:
+        """
+        :param raise_on_error: Raise BulkIndexError if any of the documents fails,
+            instead of logging the failures.
+        :return: Number of the failed documents.
+        """
+        with (
+            trace_span(
+                "db.elasticsearch.bulk", f"bulk {index_name}", documents=len(body)
+            ) as span,
+            measure_ndjson_request_bytes() as request_bytes,
+        ):
+            start = time.perf_counter()
+            errors = 0
+            try:
+                _, failed_items = elasticsearch_bulk(
+                    self.es, body, raise_on_error=raise_on_error
+                )
+                errors = len(failed_items)
+                self._log_failed_items(index_name, failed_items)
+            except BulkIndexError as e:
+                errors = len(e.errors)
+                raise
+            except ConnectionError as e:
+                errors = len(body)
+                logger.error(e)
+            finally:
+                span.set_data("bytes", sum(request_bytes))
+                span.set_data("errors", errors)
+                self.stats.record_bulk(
+                    documents=len(body),
+                    size_bytes=sum(request_bytes),
+                    seconds=time.perf_counter() - start,
+                    errors=errors,
+                )
+        return errors
+
+    async def _bulk_async(
+        self, es: AsyncElasticsearch, index_name: str, body: List[dict]
+    ) -> int:
+        """
+        Async variant of _bulk() with raise_on_error=False, sending the body as one
+        bulk request.
+
+        :return: Number of the failed documents.
+        """
+        with (
+            trace_span(
+                "db.elasticsearch.bulk", f"bulk {index_name}", documents=len(body)
+            ) as span,
+            measure_ndjson_request_bytes() as request_bytes,
+        ):
+            start = time.perf_counter()
+            failed_items = []
+            try:
+                async for ok, item in async_streaming_bulk(
+                    es, body, chunk_size=len(body), raise_on_error=False
+                ):
+                    if not ok:
+                        failed_items.append(item)
+                self._log_failed_items(index_name, failed_items)
+            finally:
+                span.set_data("bytes", sum(request_bytes))
+                span.set_data("errors", len(failed_items))
+                self.stats.record_bulk(
+                    documents=len(body),
+                    size_bytes=sum(request_bytes),
+                    seconds=time.perf_counter() - start,
+                    errors=len(failed_items),
+                )
+        return len(failed_items)
+
+    @staticmethod
+    def _log_failed_items(index_name: str, failed_items: List[dict]) -> None:
+        for item in failed_items[:MAX_LOGGED_BULK_ERRORS]:
+            (op_type, result), *_ = item.items()
+            error = result.get("error", {})
+            logger.error(
+                f"Bulk {op_type} of document {result.get('_id')} into {index_name} "
+                f"failed with status {result.get('status')}: "
+                f"{error.get('type')}: {error.get('reason')}"
+            )
+        if len(failed_items) > MAX_LOGGED_BULK_ERRORS:
+            logger.error(
+                f"{len(failed_items) - MAX_LOGGED_BULK_ERRORS} more documents failed "
+                f"in the bulk request into {index_name}"
+            )
+
+    def apply_mapping(self, mapping: dict, index_base_name: Optional[str] = None):
+        index_base_name = index_base_name or self.index_base_names[0]
+        index_name = self._get_wip_alias(index_base_name)
         logger.debug(f"Applying custom mapping to index {index_name}")
         self.es.indices.put_mapping(index=index_name, body=mapping)
+        self.applied_mappings[index_base_name] = mapping
+
+    def _get_resumable_checkpoint(self) -> Optional[ImportCheckpoint]:
+        wip_index = self._get_index_from_es(
+            self._get_wip_alias(self.index_base_names[0])
+        )
+        checkpoint = ImportCheckpoint(wip_index) if wip_index else None
+        if checkpoint and checkpoint.exists():
+            return checkpoint
+        logger.warning(
+            f"No interrupted import of {self.index_base_names[0]} to resume, "
+            "starting over"
+        )
+        return None
 
     def _initialize(self) -> None:
+        if self.resuming:
+            logger.info(
+                f"Resuming import into {self.checkpoint.index} from offset "
+                f"{self.checkpoint.load_offset()}"
+            )
+            return
+        if self.is_shard_worker:
+            # The coordinator's wip index was joined on creation already
+            return
+
         for active_alias in self.index_base_names:
             logger.debug(f"Initializing {active_alias}")
 
@@ -123,11 +650,108 @@ class Importer(ABC, Generic[IndexableData]):
             logger.debug(
                 f"Creating wip index {wip_index} with aliases {wip_index_aliases}"
             )
+            definition = self.index_definitions.get(active_alias, {})
             self.es.indices.create(
-                index=wip_index, body={"aliases": {w: {} for w in wip_index_aliases}}
+                index=wip_index,
+                body={
+                    **definition,
+                    "aliases": {w: {} for w in wip_index_aliases},
+                },
+            )
+            if "mappings" in definition:
+                self.applied_mappings[active_alias] = definition["mappings"]
+
+            if self.resumable:
+                self.checkpoint = ImportCheckpoint(wip_index)
+                # Remove the checkpoint of a previous interrupted import, if any
+                self.checkpoint.delete()
+                self.checkpoint.save_base_data(self.get_base_data())
+                if self.shard_coordination:
+                    self.shard_coordination.publish(wip_index)
+
+    def get_base_data(self) -> dict:
+        """
+        The resumable importer's base data, i.e. the data fetched from the data
+        sources before indexing anything, for checkpointing. Resuming importers
+        restore it from self.checkpoint instead of fetching it again.
+        """
+        raise NotImplementedError(
+            f"Importer {self.__class__.__name__} is missing get_base_data()."
+        )
+
+    def _validate(self) -> None:
+        """
+        Validate the imported data before swapping it active:
+
+        - The bulk error rate is at most settings.IMPORT_MAX_BULK_ERROR_RATE, of all
+          the shards in a sharded import
+        - The document counts of the wip indices are at least
+          settings.IMPORT_MIN_DOCUMENT_COUNT_RATIO of the active ones
+        - The applied mappings are in effect in the wip indices
+
+        :raise ImportValidationError: If the data is not valid.
+        """
+        errors = []
+        bulk_documents, bulk_errors = self.stats.bulk.documents, self.stats.bulk.errors
+        if self.shard_bulk_counts is not None:
+            bulk_documents = self.shard_bulk_counts["documents"]
+            bulk_errors = self.shard_bulk_counts["errors"]
+        if bulk_documents and (
+            bulk_errors / bulk_documents > settings.IMPORT_MAX_BULK_ERROR_RATE
+        ):
+            errors.append(f"{bulk_errors} of {bulk_documents} bulk documents failed")
+
+        for active_alias in self.index_base_names:
+            wip_alias = self._get_wip_alias(active_alias)
+            self.es.indices.refresh(index=wip_alias)
+            count = self.es.count(index=wip_alias)["count"]
+            wip_index = self._get_index_from_es(wip_alias)
+            active_index = self._get_index_from_es(active_alias)
+            if active_index and active_index != wip_index:
+                active_count = self.es.count(index=active_index)["count"]
+                if count < active_count * settings.IMPORT_MIN_DOCUMENT_COUNT_RATIO:
+                    errors.append(
+                        f"{active_alias} has {count} documents, {active_count} before"
+                    )
+
+            if active_alias in self.applied_mappings:
+                index_mapping = self.es.indices.get_mapping(index=wip_index)
+                errors += (
+                    f"{active_alias} {error}"
+                    for error in get_mapping_errors(
+                        self.applied_mappings[active_alias],
+                        index_mapping[wip_index]["mappings"],
+                    )
+                )
+
+        if errors:
+            raise ImportValidationError(
+                f"Not swapping the imported data active: {'; '.join(errors)}."
             )
 
     def _finish(self) -> None:
+        if self.shard_coordination:
+            self.shard_coordination.report(
+                success=True,
+                bulk_documents=self.stats.bulk.documents,
+                bulk_errors=self.stats.bulk.errors,
+            )
+            if self.is_shard_worker:
+                # The coordinator validates and swaps the wip index active
+                return
+            with self.stats.stage("wait_for_shards"):
+                self.shard_bulk_counts = self.shard_coordination.wait_for_completion(
+                    settings.IMPORT_SHARD_TIMEOUT_SECONDS
+                )
+
+        with self.stats.stage("validate"):
+            self._validate()
+
+        # Another run that has taken over an expired lock has deleted the wip index
+        # or is about to swap its own import active
+        for lock in self.locks:
+            lock.check_held()
+
         for active_alias in self.index_base_names:
             logger.debug(f"Finishing {active_alias}")
 
@@ -135,24 +759,33 @@ class Importer(ABC, Generic[IndexableData]):
             old_active_index = self._get_index_from_es(active_alias)
             wip_index = self._get_index_from_es(wip_alias)
 
+            # Completion time of the import, for the index health checks, see
+            # custom_health_checks.backends.IndexHealthCheck
+            self.es.indices.put_mapping(
+                index=wip_index, meta={IMPORT_COMPLETED_AT_META: time.time()}
+            )
+
             # Swap active alias to the wip index, delete the wip alias and old active
             # index as long as it is not the same as the wip index
-            self.es.indices.update_aliases(
-                body={
-                    "actions": [
-                        {"add": {"index": wip_index, "alias": active_alias}},
-                        {
-                            "remove": {
-                                "index": f"{active_alias}_*",
-                                "alias": wip_alias,
-                            }
-                        },
-                    ]
-                }
-            )
-            if old_active_index and old_active_index != wip_index:
+            actions = [
+                {"add": {"index": wip_index, "alias": active_alias}},
+                {"remove": {"index": f"{active_alias}_*", "alias": wip_alias}},
+            ]
+            has_old_index = old_active_index and old_active_index != wip_index
+            if has_old_index:
+                # Kept old index must not be served by the alias anymore
+                actions.append(
+                    {"remove": {"index": old_active_index, "alias": active_alias}}
+                )
+            self.es.indices.update_aliases(body={"actions": actions})
+            if has_old_index and not settings.IMPORT_KEEP_PREVIOUS_INDEX:
                 self._delete_index(old_active_index)
 
+        if self.checkpoint:
+            self.checkpoint.delete()
+        if self.shard_coordination:
+            self.shard_coordination.end()
+
     def _delete_index(self, index) -> None:
         logger.debug(f"Deleting index {index}")
         try:
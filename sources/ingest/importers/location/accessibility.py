@@ -0,0 +1,111 @@
+"""
+Bitmask based evaluation of accessibility profiles.
+
+Every AccessibilityViewpointID gets its own bit, so a venue's accessibility
+viewpoint values can be encoded as three small integers, one per
+AccessibilityViewpointValue colour (red, green and unknown). Every
+AccessibilityProfile's viewpoints are likewise precomputed into a single profile
+mask, which makes evaluating a profile a couple of bitwise operations instead of
+building dictionaries and sets for every venue.
+"""
+
+from enum import IntEnum
+from typing import Dict, Iterable, List, NamedTuple, Tuple, TYPE_CHECKING
+
+from ingest.importers.location.constants import ACCESSIBILITY_PROFILE_VIEWPOINTS
+from ingest.importers.location.enums import (
+    AccessibilityViewpointID,
+    AccessibilityViewpointValue,
+)
+
+if TYPE_CHECKING:
+    from ingest.importers.location.dataclasses import AccessibilityViewpoint
+
+# AccessibilityViewpointID value to its bit in the viewpoint bitmasks
+VIEWPOINT_ID_TO_BIT: Dict[str, int] = {
+    viewpoint_id.value: 1 << index
+    for index, viewpoint_id in enumerate(AccessibilityViewpointID)
+}
+
+ALL_VIEWPOINTS_MASK: int = sum(VIEWPOINT_ID_TO_BIT.values())
+
+# AccessibilityProfile values in the evaluation order, i.e. the order of
+# evaluate_profile_statuses()'s result
+PROFILES: Tuple[str, ...] = tuple(ACCESSIBILITY_PROFILE_VIEWPOINTS.keys())
+
+# AccessibilityProfile value to the bitmask of its AccessibilityViewpointID values
+PROFILE_MASKS: Dict[str, int] = {
+    profile: sum(VIEWPOINT_ID_TO_BIT[_id] for _id in set(viewpoint_ids))
+    for profile, viewpoint_ids in ACCESSIBILITY_PROFILE_VIEWPOINTS.items()
+}
+
+
+class ProfileStatus(IntEnum):
+    """
+    Combined status of an AccessibilityProfile's accessibility viewpoints, in the
+    order of precedence used when fixing unknown and zero shortcomings.
+    """
+
+    ANY_UNKNOWN = 0  # At least one of the viewpoints is "unknown"
+    ANY_RED = 1  # No "unknown" viewpoints, but at least one is "red"
+    ALL_GREEN = 2  # All the viewpoints are "green"
+    OTHER = 3  # Viewpoints have unrecognized values
+
+
+class ViewpointMasks(NamedTuple):
+    """
+    A venue's accessibility viewpoint values as bitmasks, one bit per
+    AccessibilityViewpointID, see VIEWPOINT_ID_TO_BIT.
+    """
+
+    red: int
+    green: int
+    unknown: int
+
+
+def encode_viewpoint_masks(
+    viewpoints: Iterable["AccessibilityViewpoint"],
+) -> ViewpointMasks:
+    """
+    Encode accessibility viewpoints' values as bitmasks.
+
+    Viewpoints that are not given are "unknown". If the same viewpoint ID is given
+    multiple times, the last one is used. Unrecognized viewpoint IDs are ignored, and
+    unrecognized values are set in none of the masks.
+    """
+    red = green = 0
+    unknown = ALL_VIEWPOINTS_MASK
+    for viewpoint in viewpoints:
+        bit = VIEWPOINT_ID_TO_BIT.get(viewpoint.id)
+        if bit is None:
+            continue
+        red &= ~bit
+        green &= ~bit
+        unknown &= ~bit
+        if viewpoint.value == AccessibilityViewpointValue.RED.value:
+            red |= bit
+        elif viewpoint.value == AccessibilityViewpointValue.GREEN.value:
+            green |= bit
+        elif viewpoint.value == AccessibilityViewpointValue.UNKNOWN.value:
+            unknown |= bit
+    return ViewpointMasks(red=red, green=green, unknown=unknown)
+
+
+def evaluate_profile_statuses(masks: ViewpointMasks) -> List[ProfileStatus]:
+    """
+    Evaluate all accessibility profiles of a single venue.
+
+    :return: ProfileStatus of every profile in PROFILES order.
+    """
+    result = []
+    for profile in PROFILES:
+        profile_mask = PROFILE_MASKS[profile]
+        if masks.unknown & profile_mask:
+            result.append(ProfileStatus.ANY_UNKNOWN)
+        elif masks.red & profile_mask:
+            result.append(ProfileStatus.ANY_RED)
+        elif (masks.green & profile_mask) == profile_mask:
+            result.append(ProfileStatus.ALL_GREEN)
+        else:
+            result.append(ProfileStatus.OTHER)
+    return result
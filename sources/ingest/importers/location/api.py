@@ -1,15 +1,26 @@
+import asyncio
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from typing import List
 
 from ingest.importers.location.types import TPRUnitResponse
+from ingest.importers.utils.async_traffic import AsyncSourceClient
 from ingest.importers.utils.traffic import request_json
 
 DEFAULT_TIMEOUT = 20
+# Number of Linked Events place pages fetched at a time
+LINKED_EVENTS_CONCURRENT_REQUESTS = 4
+LINKED_EVENTS_PAGE_SIZE = 100
 
 # Department ID of "Kulttuurin ja vapaa-ajan toimiala" (a.k.a. KuVa) i.e.
 # "Culture and Leisure Division" in Helsinki. See
 # https://www.hel.fi/palvelukarttaws/rest/v4/department/55ed20a5-6a3a-447c-958c-2b537b9e6ee2
 CULTURE_AND_LEISURE_DIVISION_DEPARTMENT_ID = "55ed20a5-6a3a-447c-958c-2b537b9e6ee2"
 
+logger = logging.getLogger(__name__)
+
 
 class LocationImporterAPI:
     tpr_units_endpoint = (
@@ -34,7 +45,8 @@ class LocationImporterAPI:
     services_endpoint = "https://www.hel.fi/palvelukarttaws/rest/vpalvelurekisteri/description/?alldata=yes"
     connections_endpoint = "https://www.hel.fi/palvelukarttaws/rest/v4/connection/"
     linked_events_place_endpoint = (
-        "https://api.hel.fi/linkedevents/v1/place/?format=json&page_size=100"
+        "https://api.hel.fi/linkedevents/v1/place/?format=json"
+        f"&page_size={LINKED_EVENTS_PAGE_SIZE}"
     )
 
     @classmethod
@@ -124,20 +136,208 @@ class LocationImporterAPI:
 
     @classmethod
     def fetch_event_counts_per_tpr_unit(
-        cls, timeout_seconds=DEFAULT_TIMEOUT
+        cls,
+        timeout_seconds=DEFAULT_TIMEOUT,
+        concurrent_requests=LINKED_EVENTS_CONCURRENT_REQUESTS,
     ) -> dict[str, int]:
         """
         Get all event counts per TPR unit ID from Linked Events place endpoint.
 
+        The first page tells the total count of places, and the rest of the pages are
+        then fetched concurrently. If the pages do not add up to the total count,
+        e.g. places were added or removed in between, the pages are fetched again
+        one by one following their next links.
+
+        :param concurrent_requests: Max number of pages fetched at a time.
         :return: A dictionary with TPR unit ID ("id") as string without "tprek:"
                  prefix, and its total event count ("event_count").
         """
-        tpr_unit_id_to_event_count = {}
+        first_page = request_json(
+            cls.linked_events_place_endpoint, timeout_seconds=timeout_seconds
+        )
+        pages = [first_page]
+        if urls := cls.get_linked_events_place_page_urls(first_page):
+            with ThreadPoolExecutor(max_workers=concurrent_requests) as executor:
+                # Run in copies of the current context to keep the import stats and
+                # tracing of the requests
+                futures = [
+                    executor.submit(
+                        copy_context().run,
+                        request_json,
+                        url,
+                        timeout_seconds=timeout_seconds,
+                    )
+                    for url in urls
+                ]
+                pages += [future.result() for future in futures]
+            if not cls.has_all_linked_events_places(pages):
+                pages = cls.fetch_linked_events_place_pages(timeout_seconds)
+        return cls.get_tpr_unit_id_to_event_count_mapping_from_pages(pages)
+
+    @classmethod
+    def fetch_linked_events_place_pages(
+        cls, timeout_seconds=DEFAULT_TIMEOUT
+    ) -> List[dict]:
+        """Fetch the Linked Events place pages one by one following their next links."""
+        pages = []
         url = cls.linked_events_place_endpoint
         while url:
-            places = request_json(url, timeout_seconds=timeout_seconds)
+            page = request_json(url, timeout_seconds=timeout_seconds)
+            pages.append(page)
+            url = page["meta"]["next"]
+        return pages
+
+    @classmethod
+    def get_linked_events_place_page_urls(cls, first_page: dict) -> List[str]:
+        """:return: URLs of the Linked Events place pages after the first one."""
+        if not first_page["meta"]["next"]:
+            return []
+        page_count = math.ceil(first_page["meta"]["count"] / LINKED_EVENTS_PAGE_SIZE)
+        return [
+            f"{cls.linked_events_place_endpoint}&page={page}"
+            for page in range(2, page_count + 1)
+        ]
+
+    @staticmethod
+    def has_all_linked_events_places(pages: List[dict]) -> bool:
+        """
+        Check that the concurrently fetched Linked Events place pages have the same
+        total count, and as many unique places as it. Places added or removed while
+        the pages are fetched shift the rest of the places between the pages, so that
+        some of them are missed or repeated.
+        """
+        count = pages[0]["meta"]["count"]
+        place_ids = {place["id"] for page in pages for place in page.get("data", [])}
+        if len(place_ids) == count and all(
+            page["meta"]["count"] == count for page in pages
+        ):
+            return True
+        logger.warning(
+            f"Linked Events place pages have {len(place_ids)} unique places instead "
+            f"of {count}, fetching the pages one by one instead."
+        )
+        return False
+
+    @classmethod
+    def get_tpr_unit_id_to_event_count_mapping_from_pages(
+        cls, pages: List[dict]
+    ) -> dict[str, int]:
+        tpr_unit_id_to_event_count = {}
+        for places in pages:
             tpr_unit_id_to_event_count.update(
                 cls.get_tpr_unit_id_to_event_count_mapping(places.get("data", []))
             )
-            url = places["meta"]["next"]
         return tpr_unit_id_to_event_count
+
+
+class AsyncLocationImporterAPI:
+    """
+    Async variant of LocationImporterAPI, requesting the same endpoints with an
+    AsyncSourceClient, so that the fetches and their pages can run concurrently.
+    The concurrency is bounded by the client per upstream host.
+
+    Usage:
+
+    async with AsyncSourceClient() as client:
+        api = AsyncLocationImporterAPI(client)
+        tpr_units, connections = await asyncio.gather(
+            api.fetch_tpr_units(), api.fetch_connections()
+        )
+    """
+
+    def __init__(self, client: AsyncSourceClient):
+        self.client = client
+
+    async def fetch_tpr_units(self, timeout_seconds=DEFAULT_TIMEOUT) -> TPRUnitResponse:
+        return await self.client.request_json(
+            LocationImporterAPI.tpr_units_endpoint, timeout_seconds=timeout_seconds
+        )
+
+    async def fetch_culture_and_leisure_division_tpr_units(
+        self, timeout_seconds=DEFAULT_TIMEOUT
+    ) -> TPRUnitResponse:
+        return await self.client.request_json(
+            LocationImporterAPI.culture_and_leisure_division_tpr_units_endpoint,
+            timeout_seconds=timeout_seconds,
+        )
+
+    async def fetch_unit_ids_and_accessibility_shortcoming_counts(
+        self, timeout_seconds=DEFAULT_TIMEOUT
+    ) -> List[dict]:
+        """
+        See LocationImporterAPI.fetch_unit_ids_and_accessibility_shortcoming_counts().
+        The pages are linked to each other, so they are fetched one by one.
+        """
+        accumulated_results = []
+        url = LocationImporterAPI.accessibility_shortcoming_counts_endpoint
+        while url:
+            units = await self.client.request_json(url, timeout_seconds=timeout_seconds)
+            accumulated_results += units["results"]
+            url = units["next"]
+        return accumulated_results
+
+    async def fetch_accessibility_viewpoint(self, timeout_seconds=DEFAULT_TIMEOUT):
+        return await self.client.request_json(
+            LocationImporterAPI.accessibility_viewpoint_endpoint,
+            timeout_seconds=timeout_seconds,
+        )
+
+    async def fetch_accessibility_sentence(self, timeout_seconds=120):
+        return await self.client.request_json(
+            LocationImporterAPI.accessibility_sentence_endpoint,
+            timeout_seconds=timeout_seconds,
+        )
+
+    async def fetch_accessibility_shortages(self, timeout_seconds=DEFAULT_TIMEOUT):
+        return await self.client.request_json(
+            LocationImporterAPI.accessibility_shortages_endpoint,
+            timeout_seconds=timeout_seconds,
+        )
+
+    async def fetch_services(self, timeout_seconds=120):
+        return await self.client.request_json(
+            LocationImporterAPI.services_endpoint, timeout_seconds=timeout_seconds
+        )
+
+    async def fetch_connections(self, timeout_seconds=DEFAULT_TIMEOUT):
+        return await self.client.request_json(
+            LocationImporterAPI.connections_endpoint, timeout_seconds=timeout_seconds
+        )
+
+    async def fetch_event_counts_per_tpr_unit(
+        self, timeout_seconds=DEFAULT_TIMEOUT
+    ) -> dict[str, int]:
+        """
+        See LocationImporterAPI.fetch_event_counts_per_tpr_unit(). The pages after
+        the first one are fetched concurrently, or one by one if they do not add up.
+        """
+        first_page = await self.client.request_json(
+            LocationImporterAPI.linked_events_place_endpoint,
+            timeout_seconds=timeout_seconds,
+        )
+        urls = LocationImporterAPI.get_linked_events_place_page_urls(first_page)
+        pages = [first_page] + list(
+            await asyncio.gather(
+                *(
+                    self.client.request_json(url, timeout_seconds=timeout_seconds)
+                    for url in urls
+                )
+            )
+        )
+        if urls and not LocationImporterAPI.has_all_linked_events_places(pages):
+            pages = await self.fetch_linked_events_place_pages(timeout_seconds)
+        return LocationImporterAPI.get_tpr_unit_id_to_event_count_mapping_from_pages(
+            pages
+        )
+
+    async def fetch_linked_events_place_pages(
+        self, timeout_seconds=DEFAULT_TIMEOUT
+    ) -> List[dict]:
+        """See LocationImporterAPI.fetch_linked_events_place_pages()."""
+        pages = []
+        url = LocationImporterAPI.linked_events_place_endpoint
+        while url:
+            page = await self.client.request_json(url, timeout_seconds=timeout_seconds)
+            pages.append(page)
+            url = page["meta"]["next"]
+        return pages
@@ -1,8 +1,14 @@
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Union
+from typing import Dict, List, Optional, Sequence, Union
 
+from ingest.importers.location.accessibility import (
+    encode_viewpoint_masks,
+    evaluate_profile_statuses,
+    PROFILES,
+    ProfileStatus,
+)
 from ingest.importers.location.constants import (
     ACCESSIBILITY_PROFILE_VIEWPOINTS,
     NO_SHORTCOMINGS_SHORTAGE_TEXT_VARIANTS,
@@ -161,12 +167,8 @@ class Accessibility:
         result: Dict[str, List[LanguageString]] = {
             viewpoint_id.value: [] for viewpoint_id in AccessibilityViewpointID
         }
+        self._check_accessibility_shortages_set()
         for viewpoint in self.viewpoints:
-            if viewpoint.shortages is None:
-                raise ValueError(
-                    "Viewpoint's shortages have not been set, please call "
-                    "self.set_accessibility_shortages before calling this method"
-                )
             result[viewpoint.id] = viewpoint.shortages
         return result
 
@@ -231,33 +233,51 @@ class Accessibility:
             any(vp.shortages is None for vp in self.viewpoints)
         @return True if any shortcomings were fixed, False otherwise.
         """
-        profile_shortcomings = self.profile_shortcomings()
-        viewpoint_id_to_shortages = self.viewpoint_id_to_shortages()
-        viewpoint_id_to_value = self.viewpoint_id_to_value()
+        return self.apply_profile_statuses(
+            evaluate_profile_statuses(encode_viewpoint_masks(self.viewpoints))
+        )
 
-        for profile, viewpoint_ids in ACCESSIBILITY_PROFILE_VIEWPOINTS.items():
-            profile_statuses: Set[str] = {
-                viewpoint_id_to_value[_id] for _id in viewpoint_ids
-            }
-            any_reds = AccessibilityViewpointValue.RED.value in profile_statuses
-            any_unknowns = AccessibilityViewpointValue.UNKNOWN.value in profile_statuses
-            all_greens = profile_statuses == {AccessibilityViewpointValue.GREEN.value}
+    def apply_profile_statuses(self, profile_statuses: Sequence[int]) -> bool:
+        """
+        Fix unknown and zero accessibility shortcomings using already evaluated
+        statuses of the accessibility profiles.
 
+        @param profile_statuses ProfileStatus values of all accessibility profiles in
+            ingest.importers.location.accessibility.PROFILES order
+        @raises ValueError If any viewpoints' shortages have not been set i.e.
+            any(vp.shortages is None for vp in self.viewpoints)
+        @return True if any shortcomings were fixed, False otherwise.
+        """
+        self._check_accessibility_shortages_set()
+        profile_shortcomings = self.profile_shortcomings()
+        viewpoint_id_to_shortages = None  # Only needed for profiles with "red"
+
+        for profile, status in zip(PROFILES, profile_statuses):
             if profile_shortcomings[profile] in [None, 0]:
-                if any_unknowns:
+                if status == ProfileStatus.ANY_UNKNOWN:
                     profile_shortcomings[profile] = None  # Mark as unknown
-                elif any_reds:
+                elif status == ProfileStatus.ANY_RED:
+                    if viewpoint_id_to_shortages is None:
+                        viewpoint_id_to_shortages = self.viewpoint_id_to_shortages()
                     profile_shortcomings[profile] = (
                         unique_shortages_count_for_viewpoint_ids(
-                            viewpoint_ids, viewpoint_id_to_shortages
+                            ACCESSIBILITY_PROFILE_VIEWPOINTS[profile],
+                            viewpoint_id_to_shortages,
                         )
                         or None
                     )  # If "red" but no shortages mark as unknown
-                elif all_greens:
+                elif status == ProfileStatus.ALL_GREEN:
                     profile_shortcomings[profile] = 0
 
         return self.update_shortcomings(profile_shortcomings)
 
+    def _check_accessibility_shortages_set(self) -> None:
+        if any(viewpoint.shortages is None for viewpoint in self.viewpoints):
+            raise ValueError(
+                "Viewpoint's shortages have not been set, please call "
+                "self.set_accessibility_shortages before calling this method"
+            )
+
 
 @dataclass
 class Reservation:
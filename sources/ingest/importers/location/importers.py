@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from contextlib import contextmanager
+from dataclasses import asdict
 from datetime import datetime
-from typing import Any, Callable, List, Optional
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from django.conf import settings
 
 from ingest.importers.base import Importer
-from ingest.importers.location.api import LocationImporterAPI
+from ingest.importers.location.api import (
+    AsyncLocationImporterAPI,
+    LocationImporterAPI,
+)
 from ingest.importers.location.dataclasses import (
     Accessibility,
     Address,
@@ -39,16 +49,35 @@ from ingest.importers.location.utils import (
     get_unit_id_to_target_groups_mapping,
 )
 from ingest.importers.utils import (
+    HAUKI_SERVICE,
     HaukiOpeningHoursFetcher,
     LanguageStringConverter,
     Ontology,
     OpeningHours,
 )
 from ingest.importers.utils.administrative_division import AdministrativeDivisionFetcher
-from ingest.importers.utils.retry import retry_twice_5s_intervals
+from ingest.importers.utils.async_traffic import AsyncSourceClient
+from ingest.importers.utils.checkpoint import SourceSnapshot
+from ingest.importers.utils.retry import BASE_DATA_RETRY_POLICY
+from ingest.importers.utils.tracing import trace_span
 
 BATCH_SIZE = 100
 
+# The importer's attributes holding the data fetched from the data sources, which
+# is checkpointed for resuming interrupted imports
+BASE_DATA_ATTRIBUTES = (
+    "tpr_units",
+    "culture_and_leisure_division_tpr_unit_ids",
+    "unit_id_to_accessibility_shortcomings_mapping",
+    "unit_id_to_accessibility_sentences_mapping",
+    "unit_id_to_accessibility_viewpoint_shortages_mapping",
+    "unit_id_to_target_groups_mapping",
+    "accessibility_viewpoint_id_to_name_mapping",
+    "unit_id_to_connections_mapping",
+    "ontology",
+    "tpr_unit_id_to_event_count",
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,14 +94,34 @@ custom_mappings = {
         },
         "venue": {
             "properties": {
-                "name": {"properties": define_language_properties()},
+                "meta": {
+                    "properties": {
+                        "id": {
+                            "type": "text",
+                            "fields": {
+                                # Tie-breaker of the sorts and the index sort
+                                "keyword": {
+                                    "type": "keyword",
+                                    "ignore_above": 256,
+                                    "doc_values": True,
+                                    "eager_global_ordinals": True,
+                                }
+                            },
+                        }
+                    }
+                },
+                "name": {"properties": define_language_properties(sortable=True)},
                 "description": {"properties": define_language_properties()},
                 "eventCount": {"type": "long"},  # Signed 64-bit integer
                 "openingHours": {
                     "properties": {
                         "openRanges": {
                             "type": "date_range",
-                        }
+                        },
+                        "weeklyRanges": {"type": "integer_range"},
+                        "weeklyHours": {"type": "short"},
+                        "nextOpen": {"type": "date"},
+                        "nextClose": {"type": "date"},
                     }
                 },
                 "accessibility": {
@@ -95,14 +144,37 @@ custom_mappings = {
     }
 }
 
+# The venues are stored in the order of the GraphQL API's sort by relevance, i.e.
+# its tie-breakers of equal scores, so that the searches sorted by them can
+# terminate early. Index sorting can only be defined on index creation.
+custom_settings = {
+    "index": {
+        "sort.field": ["venue.eventCount", "venue.meta.id.keyword"],
+        "sort.order": ["desc", "desc"],
+    }
+}
+
 
 class LocationImporter(Importer[Root]):
     index_base_names = ("location",)
+    index_definitions = {
+        "location": {"settings": custom_settings, "mappings": custom_mappings}
+    }
+    partial_updates = ("opening_hours", "event_counts")
+    resumable = True
 
     def __init__(self, *args, enable_data_fetching=True, **kwargs):
         super().__init__(*args, **kwargs)
         self.enable_data_fetching = enable_data_fetching
-        self._init_base_data()
+        if settings.IMPORT_ASYNC_FETCHING:
+            asyncio.run(self._init_base_data_async())
+        else:
+            self._init_base_data()
+
+    @classmethod
+    def for_partial_update(cls, **kwargs) -> LocationImporter:
+        # The partial updates fetch only the data they update
+        return cls(enable_data_fetching=False, **kwargs)
 
     def _init_base_data(self):
         api = LocationImporterAPI()
@@ -126,77 +198,294 @@ class LocationImporter(Importer[Root]):
             self.administrative_division_fetcher = None
             self.ontology = None
             self.tpr_unit_id_to_event_count = {}
+        elif self.checkpoint:
+            logger.info(
+                f"Restoring base data from the checkpoint of {self.checkpoint.index}..."
+            )
+            for name, value in self.checkpoint.load_base_data().items():
+                setattr(self, name, value)
+            # The interrupted import or the sharded import's coordinator has imported
+            # the divisions to the database already
+            self._init_fetchers(import_administrative_divisions=False)
         else:
             logger.info("Fetching TPR units...")
-            self.tpr_units = retry_twice_5s_intervals(api.fetch_tpr_units)
+            self.tpr_units = self._fetch_base_data("tpr_units", api.fetch_tpr_units)
 
             logger.info("Fetching Culture and Leisure Division's TPR units...")
-            _culture_and_leisure_division_tpr_units = retry_twice_5s_intervals(
-                api.fetch_culture_and_leisure_division_tpr_units
+            _culture_and_leisure_division_tpr_units = self._fetch_base_data(
+                "culture_and_leisure_division_tpr_units",
+                api.fetch_culture_and_leisure_division_tpr_units,
             )
             self.culture_and_leisure_division_tpr_unit_ids: set[str] = {
                 str(unit["id"]) for unit in _culture_and_leisure_division_tpr_units
             }
 
             logger.info("Fetching accessibility shortcoming counts...")
-            self.unit_id_to_accessibility_shortcomings_mapping = (
-                retry_twice_5s_intervals(
-                    get_unit_id_to_accessibility_shortcomings_mapping
-                )
+            self.unit_id_to_accessibility_shortcomings_mapping = self._fetch_base_data(
+                "accessibility_shortcomings",
+                get_unit_id_to_accessibility_shortcomings_mapping,
             )
 
             logger.info("Fetching accessibility sentences...")
-            self.unit_id_to_accessibility_sentences_mapping = retry_twice_5s_intervals(
-                get_unit_id_to_accessibility_sentences_mapping,
-                self.use_fallback_languages,
+            self.unit_id_to_accessibility_sentences_mapping = (
+                self._fetch_optional_base_data(
+                    "accessibility_sentences",
+                    get_unit_id_to_accessibility_sentences_mapping,
+                    self.use_fallback_languages,
+                )
             )
 
             logger.info("Fetching accessibility shortages...")
             self.unit_id_to_accessibility_viewpoint_shortages_mapping = (
-                retry_twice_5s_intervals(
+                self._fetch_base_data(
+                    "accessibility_shortages",
                     get_unit_id_to_accessibility_viewpoint_shortages_mapping,
                     self.use_fallback_languages,
                 )
             )
 
             logger.info("Fetching target groups using services...")
-            self.unit_id_to_target_groups_mapping = retry_twice_5s_intervals(
-                get_unit_id_to_target_groups_mapping
+            self.unit_id_to_target_groups_mapping = self._fetch_base_data(
+                "target_groups", get_unit_id_to_target_groups_mapping
             )
 
             logger.info("Fetching accessibility viewpoints...")
-            self.accessibility_viewpoint_id_to_name_mapping = retry_twice_5s_intervals(
+            self.accessibility_viewpoint_id_to_name_mapping = self._fetch_base_data(
+                "accessibility_viewpoints",
                 get_accessibility_viewpoint_id_to_name_mapping,
                 self.use_fallback_languages,
             )
 
             logger.info("Fetching connections for TPR units...")
-            self.unit_id_to_connections_mapping = retry_twice_5s_intervals(
-                get_unit_id_to_connections_mapping, self.use_fallback_languages
-            )
-
-            logger.info("Initializing opening hours fetcher (Not fetching anything)...")
-            self.opening_hours_fetcher = (
-                HaukiOpeningHoursFetcher([t["id"] for t in self.tpr_units])
-                if self.tpr_units
-                else None
-            )
-
-            logger.info("Fetching administrative divisions...")
-            self.administrative_division_fetcher = retry_twice_5s_intervals(
-                AdministrativeDivisionFetcher
+            self.unit_id_to_connections_mapping = self._fetch_optional_base_data(
+                "connections",
+                get_unit_id_to_connections_mapping,
+                self.use_fallback_languages,
             )
 
             logger.info("Fetching ontology words and trees...")
-            self.ontology = retry_twice_5s_intervals(Ontology)
+            self.ontology = self._fetch_base_data("ontology", Ontology)
 
             logger.info("Fetching event counts for TPR units...")
-            self.tpr_unit_id_to_event_count: dict[str, int] = retry_twice_5s_intervals(
-                api.fetch_event_counts_per_tpr_unit
+            self.tpr_unit_id_to_event_count: dict[str, int] = (
+                self._fetch_optional_base_data(
+                    "event_counts", api.fetch_event_counts_per_tpr_unit, default={}
+                )
             )
 
+            self._init_fetchers()
+
         logger.info("LocationImporter base data initialized")
 
+    async def _init_base_data_async(self):
+        """
+        Async variant of _init_base_data(), fetching the base data sources and their
+        pages concurrently with an AsyncSourceClient, within the upstream hosts'
+        limits. The fetched data is the same, with the same retries and fallbacks.
+        """
+        if not self.enable_data_fetching or self.checkpoint:
+            # Nothing to fetch concurrently
+            self._init_base_data()
+            return
+
+        logger.info("Fetching base data concurrently...")
+        use_fallback_languages = self.use_fallback_languages
+        with self.stats.activate():
+            async with AsyncSourceClient() as client:
+                api = AsyncLocationImporterAPI(client)
+                # The base data attributes and their fetches
+                fetches = {
+                    "tpr_units": self._fetch_base_data_async(
+                        "tpr_units", api.fetch_tpr_units
+                    ),
+                    "culture_and_leisure_division_tpr_unit_ids": (
+                        self._fetch_base_data_async(
+                            "culture_and_leisure_division_tpr_units",
+                            api.fetch_culture_and_leisure_division_tpr_units,
+                            lambda units: {str(unit["id"]) for unit in units},
+                        )
+                    ),
+                    "unit_id_to_accessibility_shortcomings_mapping": (
+                        self._fetch_base_data_async(
+                            "accessibility_shortcomings",
+                            api.fetch_unit_ids_and_accessibility_shortcoming_counts,
+                            get_unit_id_to_accessibility_shortcomings_mapping,
+                        )
+                    ),
+                    "unit_id_to_accessibility_sentences_mapping": (
+                        self._fetch_optional_base_data_async(
+                            "accessibility_sentences",
+                            api.fetch_accessibility_sentence,
+                            partial(
+                                get_unit_id_to_accessibility_sentences_mapping,
+                                use_fallback_languages,
+                            ),
+                        )
+                    ),
+                    "unit_id_to_accessibility_viewpoint_shortages_mapping": (
+                        self._fetch_base_data_async(
+                            "accessibility_shortages",
+                            api.fetch_accessibility_shortages,
+                            partial(
+                                get_unit_id_to_accessibility_viewpoint_shortages_mapping,
+                                use_fallback_languages,
+                            ),
+                        )
+                    ),
+                    "unit_id_to_target_groups_mapping": self._fetch_base_data_async(
+                        "target_groups",
+                        api.fetch_services,
+                        get_unit_id_to_target_groups_mapping,
+                    ),
+                    "accessibility_viewpoint_id_to_name_mapping": (
+                        self._fetch_base_data_async(
+                            "accessibility_viewpoints",
+                            api.fetch_accessibility_viewpoint,
+                            partial(
+                                get_accessibility_viewpoint_id_to_name_mapping,
+                                use_fallback_languages,
+                            ),
+                        )
+                    ),
+                    "unit_id_to_connections_mapping": (
+                        self._fetch_optional_base_data_async(
+                            "connections",
+                            api.fetch_connections,
+                            partial(
+                                get_unit_id_to_connections_mapping,
+                                use_fallback_languages,
+                            ),
+                        )
+                    ),
+                    "ontology": self._fetch_base_data_async(
+                        "ontology", partial(Ontology.fetch_async, client)
+                    ),
+                    "tpr_unit_id_to_event_count": (
+                        self._fetch_optional_base_data_async(
+                            "event_counts",
+                            api.fetch_event_counts_per_tpr_unit,
+                            default={},
+                        )
+                    ),
+                }
+                results = await asyncio.gather(*fetches.values())
+        for name, value in zip(fetches, results):
+            setattr(self, name, value)
+
+        self._init_fetchers()
+
+        logger.info("LocationImporter base data initialized")
+
+    def _init_fetchers(self, import_administrative_divisions=True):
+        logger.info("Initializing opening hours fetcher (Not fetching anything)...")
+        self.opening_hours_fetcher = (
+            HaukiOpeningHoursFetcher([t["id"] for t in self.tpr_units])
+            if self.tpr_units
+            else None
+        )
+
+        logger.info("Fetching administrative divisions...")
+        self.administrative_division_fetcher = self._fetch_base_data(
+            "administrative_divisions",
+            AdministrativeDivisionFetcher,
+            import_administrative_divisions,
+        )
+
+    def get_base_data(self) -> dict:
+        return {name: getattr(self, name) for name in BASE_DATA_ATTRIBUTES}
+
+    def get_document_id(self, data: Root) -> str:
+        return data.venue.meta.id
+
+    def _fetch_base_data(self, name: str, callable, *args):
+        """
+        Fetch base data with retries, timing it as stage "fetch.<name>" and tracing
+        it as a "fetch" span.
+        """
+        with (
+            self.stats.activate(),
+            self.stats.stage(f"fetch.{name}"),
+            trace_span("fetch", name) as span,
+        ):
+            result = BASE_DATA_RETRY_POLICY.call(callable, *args)
+            if isinstance(result, (list, tuple, set, dict)):
+                span.set_data("items", len(result))
+            return result
+
+    async def _fetch_base_data_async(
+        self, name: str, coroutine_function, transform: Optional[Callable] = None
+    ):
+        """
+        Async variant of _fetch_base_data(), the fetched data converted with the
+        transform, if given.
+        """
+        with self.stats.stage(f"fetch.{name}"), trace_span("fetch", name) as span:
+            result = await BASE_DATA_RETRY_POLICY.call_async(coroutine_function)
+            if transform:
+                result = transform(result)
+            if isinstance(result, (list, tuple, set, dict)):
+                span.set_data("items", len(result))
+            return result
+
+    def _fetch_optional_base_data(self, name: str, callable, *args, default=None):
+        """
+        Fetch the base data of an optional source like _fetch_base_data(), saving it
+        as the source's snapshot. The required sources are fetched with
+        _fetch_base_data(), failing the import if they fail.
+
+        If the source fails, fall back to its snapshot, if not older than
+        settings.IMPORT_SOURCE_SNAPSHOT_MAX_AGE_SECONDS, counted as stats counter
+        "fallback.<name>". Without one, fall back to the default, i.e. import without
+        the source's data, counted as "degraded.<name>", or fail if it is None.
+        """
+        snapshot = SourceSnapshot(f"location.{name}")
+        try:
+            data = self._fetch_base_data(name, callable, *args)
+        except Exception as e:
+            return self._fall_back_from_optional_base_data(name, snapshot, e, default)
+        snapshot.save(data)
+        return data
+
+    async def _fetch_optional_base_data_async(
+        self,
+        name: str,
+        coroutine_function,
+        transform: Optional[Callable] = None,
+        default=None,
+    ):
+        """Async variant of _fetch_optional_base_data()."""
+        snapshot = SourceSnapshot(f"location.{name}")
+        try:
+            data = await self._fetch_base_data_async(
+                name, coroutine_function, transform
+            )
+        except Exception as e:
+            return self._fall_back_from_optional_base_data(name, snapshot, e, default)
+        snapshot.save(data)
+        return data
+
+    def _fall_back_from_optional_base_data(
+        self, name: str, snapshot: SourceSnapshot, error: Exception, default
+    ):
+        """
+        :return: The optional source's snapshot or the default instead of its data.
+        :raise: The error, if there is neither.
+        """
+        saved = snapshot.load(settings.IMPORT_SOURCE_SNAPSHOT_MAX_AGE_SECONDS)
+        if saved is not None:
+            data, age_seconds = saved
+            logger.warning(
+                f"Importing {name} from its snapshot fetched "
+                f"{age_seconds / 3600:.1f} h ago, could not fetch it: {error!r}"
+            )
+            self.stats.increment(f"fallback.{name}")
+            return data
+        if default is None:
+            raise error
+        logger.warning(f"Importing without {name}, could not fetch it: {error!r}")
+        self.stats.increment(f"degraded.{name}")
+        return default
+
     def _create_location(self, l: LanguageStringConverter, e: Callable[[Any], Any]):
         return Location(
             url=l.get_language_string("www"),
@@ -298,20 +587,24 @@ class LocationImporter(Importer[Root]):
             eventCount=self.tpr_unit_id_to_event_count.get(_id, 0),
         )
 
-        # Add accessibility viewpoints' shortages to the venue
-        venue.accessibility.set_accessibility_shortages(
-            self.unit_id_to_accessibility_viewpoint_shortages_mapping.get(_id, dict())
-        )
-        venue.accessibility.fix_unknown_and_zero_shortcomings()
+        with self.stats.stage("transform.accessibility"):
+            # Add accessibility viewpoints' shortages to the venue
+            venue.accessibility.set_accessibility_shortages(
+                self.unit_id_to_accessibility_viewpoint_shortages_mapping.get(
+                    _id, dict()
+                )
+            )
+            venue.accessibility.fix_unknown_and_zero_shortcomings()
 
         coordinates = venue.location.geoLocation.geometry.coordinates
 
         if self.administrative_division_fetcher:
-            venue.location.administrativeDivisions = (
-                self.administrative_division_fetcher.get_by_coordinates(
-                    longitude=coordinates.longitude, latitude=coordinates.latitude
+            with self.stats.stage("transform.administrative_divisions"):
+                venue.location.administrativeDivisions = (
+                    self.administrative_division_fetcher.get_by_coordinates(
+                        longitude=coordinates.longitude, latitude=coordinates.latitude
+                    )
                 )
-            )
 
         return venue
 
@@ -368,18 +661,21 @@ class LocationImporter(Importer[Root]):
             raw_data=tpr_unit,
         )
 
-        (
-            opening_hours,
-            opening_hours_link,
-        ) = (
-            self.opening_hours_fetcher.get_opening_hours_and_link(_id)
-            if self.opening_hours_fetcher
-            else ([], "")
-        )
+        with self.stats.stage("transform.opening_hours"):
+            (
+                opening_hours,
+                opening_hours_link,
+            ) = (
+                self.opening_hours_fetcher.get_opening_hours_and_link(_id)
+                if self.opening_hours_fetcher
+                else ([], "")
+            )
 
-        (all_ontologies, ontology_words) = self._collect_ontologies(tpr_unit)
+        with self.stats.stage("transform.ontologies"):
+            (all_ontologies, ontology_words) = self._collect_ontologies(tpr_unit)
 
-        venue = self._create_venue(l, e, _id, opening_hours, ontology_words)
+        with self.stats.stage("transform.venue"):
+            venue = self._create_venue(l, e, _id, opening_hours, ontology_words)
 
         location = (
             {"lat": e("latitude"), "lon": e("longitude")}
@@ -399,6 +695,28 @@ class LocationImporter(Importer[Root]):
 
         return root
 
+    @contextmanager
+    def _trace_batch(self, offset: int, size: int):
+        """
+        Trace transforming a batch of TPR units. The administrative division lookups
+        are done per unit, so they are summed up as the batch span's attributes.
+        """
+        lookups = self.stats.stages.get("transform.administrative_divisions")
+        lookups_before = (lookups.count, lookups.total_seconds) if lookups else (0, 0)
+        with trace_span(
+            "transform", "location batch", offset=offset, units=size
+        ) as span:
+            yield span
+            lookups = self.stats.stages.get("transform.administrative_divisions")
+            if lookups:
+                span.set_data(
+                    "administrative_division.lookups", lookups.count - lookups_before[0]
+                )
+                span.set_data(
+                    "administrative_division.seconds",
+                    round(lookups.total_seconds - lookups_before[1], 3),
+                )
+
     def run(self):  # noqa C901 this function could use some refactoring
         """
         Import location data.
@@ -410,19 +728,179 @@ class LocationImporter(Importer[Root]):
 
         data_buffer: List[Root] = []
         count = 0
+        offset = 0
+        indexed_ids: Set[str] = set()
+        if self.resuming:
+            # Skip the batches indexed before the checkpoint, and the units of the
+            # batch in progress that got indexed before the import was interrupted
+            offset = self.checkpoint.load_offset()
+            indexed_ids = self.get_indexed_ids()
+            logger.info(f"Skipping {len(indexed_ids)} TPR units indexed already")
+
+        # The whole import, or a shard's slice of it
+        all_tpr_units = (
+            self.shard.get_slice(self.tpr_units) if self.shard else self.tpr_units
+        )
+
+        if self.enable_data_fetching and settings.IMPORT_ASYNC_INDEXING:
+            return asyncio.run(self._index_async(all_tpr_units[offset:], indexed_ids))
 
         if self.enable_data_fetching:
-            for tpr_unit in self.tpr_units:
-                logger.debug(f"Fetching data for TPR unit ID: {tpr_unit['id']}")
-                root = self._create_root_from_tpr_unit(tpr_unit)
-                data_buffer.append(root)
-                if len(data_buffer) >= BATCH_SIZE:
+            if settings.IMPORT_ASYNC_FETCHING:
+                self._prefetch_opening_hours(all_tpr_units[offset:], indexed_ids)
+            for start in range(offset, len(all_tpr_units), BATCH_SIZE):
+                tpr_units = [
+                    tpr_unit
+                    for tpr_unit in all_tpr_units[start : start + BATCH_SIZE]
+                    if str(tpr_unit["id"]) not in indexed_ids
+                ]
+                with self._trace_batch(start, len(tpr_units)):
+                    for tpr_unit in tpr_units:
+                        logger.debug(f"Fetching data for TPR unit ID: {tpr_unit['id']}")
+                        with self.stats.stage("transform"):
+                            root = self._create_root_from_tpr_unit(tpr_unit)
+                        data_buffer.append(root)
+                        count = count + 1
+                if data_buffer:
                     self.add_data_bulk(data_buffer)
-                    data_buffer = []
-                count = count + 1
-
-            if data_buffer:
-                self.add_data_bulk(data_buffer)
+                data_buffer = []
+                # The offsets of the shards' slices are not comparable, so resuming
+                # a sharded import relies on skipping the indexed units only
+                if self.checkpoint and not self.shard:
+                    self.checkpoint.save_offset(start + BATCH_SIZE)
 
+            self.stats.increment("units", count)
             logger.info(f"Fetched data for {count} TPR units in total")
         return count
+
+    async def _index_async(self, tpr_units: List[dict], indexed_ids: Set[str]) -> int:
+        """
+        Async variant of importing the TPR units in run(): the units are transformed
+        into documents while the bulk requests of the previous ones are in flight,
+        see Importer.add_data_stream_async(). With IMPORT_ASYNC_FETCHING, the opening
+        hours are prefetched in the same event loop first.
+
+        The checkpoint's offset is not saved, so resuming the import relies on
+        skipping the indexed units only.
+
+        :return: the count of units imported.
+        """
+        tpr_units = [
+            tpr_unit for tpr_unit in tpr_units if str(tpr_unit["id"]) not in indexed_ids
+        ]
+        if settings.IMPORT_ASYNC_FETCHING:
+            await self._prefetch_opening_hours_async(tpr_units)
+
+        def documents() -> Iterator[tuple[str, Root]]:
+            for tpr_unit in tpr_units:
+                logger.debug(f"Fetching data for TPR unit ID: {tpr_unit['id']}")
+                with self.stats.stage("transform"):
+                    root = self._create_root_from_tpr_unit(tpr_unit)
+                yield self.get_document_id(root), root
+
+        await self.add_data_stream_async(documents())
+
+        self.stats.increment("units", len(tpr_units))
+        logger.info(f"Fetched data for {len(tpr_units)} TPR units in total")
+        return len(tpr_units)
+
+    def _prefetch_opening_hours(self, tpr_units: List[dict], indexed_ids: Set[str]):
+        """
+        Fetch the opening hours of the TPR units to import from Hauki in concurrent
+        batches, see HaukiOpeningHoursFetcher.prefetch_async().
+        """
+        tpr_units = [
+            tpr_unit for tpr_unit in tpr_units if str(tpr_unit["id"]) not in indexed_ids
+        ]
+        asyncio.run(self._prefetch_opening_hours_async(tpr_units))
+
+    async def _prefetch_opening_hours_async(self, tpr_units: List[dict]):
+        if not self.opening_hours_fetcher:
+            return
+        venue_ids = [str(tpr_unit["id"]) for tpr_unit in tpr_units]
+        with self.stats.activate(), self.stats.stage("fetch.opening_hours"):
+            async with AsyncSourceClient() as client:
+                await self.opening_hours_fetcher.prefetch_async(client, venue_ids)
+
+    def _scan_in_batches(self, source: List[str]) -> Iterator[List[dict]]:
+        """Iterate over the active index's documents in batches of BATCH_SIZE."""
+        documents = self.scan_data(source)
+        while batch := list(islice(documents, BATCH_SIZE)):
+            yield batch
+
+    def update_opening_hours(self) -> int:
+        """
+        Refresh the opening hours of the venues in the active index, i.e. rewrite
+        venue.openingHours and the Hauki link of the documents. The opening hours of
+        the venues missing from the fetched Hauki data are cleared and their Hauki
+        link removed, like in a full import, instead of keeping the stale ones.
+        :return: the count of documents updated.
+        """
+        # Add the fields possibly missing from an index created by an older version
+        self.es.indices.put_mapping(
+            index=self.index_base_names[0], body=custom_mappings
+        )
+
+        count = offset = cleared = 0
+        for documents in self._scan_in_batches(["venue.meta.id", "links"]):
+            venue_ids = [
+                document["_source"]["venue"]["meta"]["id"] for document in documents
+            ]
+            # One Hauki request per batch
+            fetcher = HaukiOpeningHoursFetcher(venue_ids, batch_size=len(venue_ids))
+            updates: Dict[str, dict] = {}
+            with self._trace_batch(offset, len(documents)):
+                for document, venue_id in zip(documents, venue_ids):
+                    with self.stats.stage("transform.opening_hours"):
+                        opening_hours, link = fetcher.get_opening_hours_and_link(
+                            venue_id
+                        )
+                    links = [
+                        existing_link
+                        for existing_link in document["_source"].get("links", [])
+                        if existing_link.get("service") != HAUKI_SERVICE
+                    ]
+                    if link:
+                        links.append(asdict(link))
+                    else:
+                        cleared += 1
+                    updates[document["_id"]] = {
+                        "venue": {"openingHours": asdict(opening_hours)},
+                        "links": links,
+                    }
+            if updates:
+                self.update_data_bulk(updates)
+            count += len(updates)
+            offset += len(documents)
+
+        self.stats.increment("units", count)
+        if cleared:
+            logger.warning(
+                f"Cleared opening hours of {cleared} venues missing from Hauki"
+            )
+        logger.info(f"Updated opening hours of {count} venues in total")
+        return count
+
+    def update_event_counts(self) -> int:
+        """
+        Refresh the event counts of the venues in the active index, i.e. update
+        venue.eventCount of the documents whose count has changed.
+        :return: the count of documents updated.
+        """
+        event_counts = self._fetch_base_data(
+            "event_counts", LocationImporterAPI.fetch_event_counts_per_tpr_unit
+        )
+
+        updates: Dict[str, dict] = {}
+        for documents in self._scan_in_batches(["venue.meta.id", "venue.eventCount"]):
+            for document in documents:
+                venue = document["_source"]["venue"]
+                event_count = event_counts.get(venue["meta"]["id"], 0)
+                if venue.get("eventCount") != event_count:
+                    updates[document["_id"]] = {"venue": {"eventCount": event_count}}
+        if updates:
+            self.update_data_bulk(updates)
+
+        self.stats.increment("units", len(updates))
+        logger.info(f"Updated event counts of {len(updates)} venues in total")
+        return len(updates)
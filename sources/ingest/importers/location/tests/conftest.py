@@ -1 +1,27 @@
+import pytest
+
 from ingest.importers.tests.conftest import *  # noqa
+
+
+@pytest.fixture
+def mocked_location_sources(
+    fake_elasticsearch,
+    mocker,
+    mocked_ontology_trees,
+    mocked_ontology_words,
+    mocked_tpr_units_response,
+    mocked_culture_and_leisure_division_tpr_units_response,
+    mocked_service_map_connections_response,
+    mocked_service_map_accessibility_sentence_viewpoint_response,
+    mocked_service_map_accessibility_shortage_viewpoint_response,
+    mocked_opening_hours_response,
+    mocked_service_map_unit_viewpoint_response,
+    mocked_service_registry_description_viewpoint_response,
+    mocked_event_counts_per_tpr_unit_response,
+):
+    mocker.patch("ingest.importers.location.importers.BATCH_SIZE", 1)
+    fetcher = mocker.patch(
+        "ingest.importers.location.importers.AdministrativeDivisionFetcher"
+    )
+    fetcher.return_value.get_by_coordinates.return_value = []
+    return fetcher
@@ -1,6 +1,10 @@
-from unittest.mock import patch
+import asyncio
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
 
-from ingest.importers.location.api import LocationImporterAPI
+import httpx
+
+from ingest.importers.location.api import AsyncLocationImporterAPI, LocationImporterAPI
 from ingest.importers.tests.mocks import (
     MOCKED_LINKED_EVENTS_PLACES_RESPONSE,
     MOCKED_SERVICE_MAP_ACCESSIBILITY_SENTENCE_VIEWPOINT_RESPONSE,
@@ -9,6 +13,7 @@ from ingest.importers.tests.mocks import (
     MOCKED_SERVICE_MAP_UNITS_RESPONSE,
     MOCKED_SERVICE_REGISTRY_DESCRIPTION_VIEWPOINT_RESPONSE,
 )
+from ingest.importers.utils.async_traffic import AsyncSourceClient
 
 
 @patch(
@@ -39,6 +44,67 @@ def test_fetch_event_counts_per_tpr_unit(mocked_response):
     assert data == {"6964": 286, "7076": 284}
 
 
+def test_fetch_event_counts_per_tpr_unit_pages():
+    def get_page(url, timeout_seconds):
+        page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        return {
+            "meta": {"count": 250, "next": None if page == 3 else "next page URL"},
+            "data": [
+                {"id": f"tprek:{i}", "n_events": i}
+                for i in range((page - 1) * 100, min(page * 100, 250))
+            ],
+        }
+
+    with patch(
+        "ingest.importers.location.api.request_json", side_effect=get_page
+    ) as mocked_response:
+        data = LocationImporterAPI.fetch_event_counts_per_tpr_unit()
+
+    assert mocked_response.call_count == 3
+    assert data == {str(i): i for i in range(250)}
+
+
+def get_shifting_place_page(page: int, shifted: bool) -> dict:
+    """
+    A page of 250 Linked Events places, or if shifted, as if the first place had
+    been removed after the first page was fetched.
+    """
+    count = 249 if shifted else 250
+    start = (page - 1) * 100 + (1 if shifted else 0)
+    return {
+        "meta": {
+            "count": count,
+            "next": (
+                f"{LocationImporterAPI.linked_events_place_endpoint}&page={page + 1}"
+                if page * 100 < count
+                else None
+            ),
+        },
+        "data": [
+            {"id": f"tprek:{i}", "n_events": i}
+            for i in range(max(start, 0), min(start + 100, 250))
+        ],
+    }
+
+
+def test_fetch_event_counts_per_tpr_unit_shifting_pages():
+    requested_pages = []
+
+    def get_page(url, timeout_seconds):
+        page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        # The concurrently fetched pages miss a place between the pages
+        shifted = page > 1 and len(requested_pages) < 3
+        requested_pages.append(page)
+        return get_shifting_place_page(page, shifted)
+
+    with patch("ingest.importers.location.api.request_json", side_effect=get_page):
+        data = LocationImporterAPI.fetch_event_counts_per_tpr_unit()
+
+    # The pages are fetched again one by one following their next links
+    assert requested_pages[3:] == [1, 2, 3]
+    assert data == {str(i): i for i in range(250)}
+
+
 @patch(
     "ingest.importers.location.api.request_json",
     return_value=MOCKED_SERVICE_MAP_ACCESSIBILITY_SHORTAGE_VIEWPOINT_RESPONSE,
@@ -117,3 +183,49 @@ def test_fetch_accessibility_shortages(mocked_response):
 def test_fetch_services(mocked_response):
     data = LocationImporterAPI.fetch_services()
     assert len(data) == len(MOCKED_SERVICE_REGISTRY_DESCRIPTION_VIEWPOINT_RESPONSE) == 4
+
+
+def test_async_fetch_event_counts_per_tpr_unit_pages():
+    def get_page(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", "1"))
+        return httpx.Response(
+            200,
+            json={
+                "meta": {"count": 250, "next": None if page == 3 else "next page URL"},
+                "data": [
+                    {"id": f"tprek:{i}", "n_events": i}
+                    for i in range((page - 1) * 100, min(page * 100, 250))
+                ],
+            },
+        )
+
+    handler = MagicMock(side_effect=get_page)
+
+    async def fetch():
+        async with AsyncSourceClient(transport=httpx.MockTransport(handler)) as client:
+            return await AsyncLocationImporterAPI(
+                client
+            ).fetch_event_counts_per_tpr_unit()
+
+    assert asyncio.run(fetch()) == {str(i): i for i in range(250)}
+    assert handler.call_count == 3
+
+
+def test_async_fetch_event_counts_per_tpr_unit_shifting_pages():
+    requested_pages = []
+
+    def get_page(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", "1"))
+        shifted = page > 1 and len(requested_pages) < 3
+        requested_pages.append(page)
+        return httpx.Response(200, json=get_shifting_place_page(page, shifted))
+
+    async def fetch():
+        transport = httpx.MockTransport(get_page)
+        async with AsyncSourceClient(transport=transport) as client:
+            return await AsyncLocationImporterAPI(
+                client
+            ).fetch_event_counts_per_tpr_unit()
+
+    assert asyncio.run(fetch()) == {str(i): i for i in range(250)}
+    assert requested_pages[3:] == [1, 2, 3]
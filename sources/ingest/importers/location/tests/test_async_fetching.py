@@ -0,0 +1,172 @@
+from functools import partial
+
+import httpx
+import pytest
+import requests
+
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers.location.api import LocationImporterAPI
+from ingest.importers.location.importers import BASE_DATA_ATTRIBUTES, LocationImporter
+from ingest.importers.tests.mocks import (
+    MOCK_OPENING_HOURS_RESPONSE,
+    MOCKED_EVENT_COUNTS_PER_TPR_UNIT_RESPONSE,
+    MOCKED_SERVICE_MAP_ACCESSIBILITY_SENTENCE_VIEWPOINT_RESPONSE,
+    MOCKED_SERVICE_MAP_ACCESSIBILITY_SHORTAGE_VIEWPOINT_RESPONSE,
+    MOCKED_SERVICE_MAP_ACCESSIBILITY_VIEWPOINT_RESPONSE,
+    MOCKED_SERVICE_MAP_CONNECTIONS_RESPONSE,
+    MOCKED_SERVICE_MAP_UNIT_VIEWPOINT_RESPONSE,
+    MOCKED_SERVICE_MAP_UNITS_RESPONSE,
+    MOCKED_SERVICE_REGISTRY_DESCRIPTION_VIEWPOINT_RESPONSE,
+    ontology_tree,
+    ontology_words,
+)
+from ingest.importers.utils.async_traffic import AsyncSourceClient
+from ingest.importers.utils.ontology import Ontology
+
+# The same data as the mocked_location_sources fixtures, by URL
+SOURCES = {
+    LocationImporterAPI.tpr_units_endpoint: MOCKED_SERVICE_MAP_UNITS_RESPONSE,
+    LocationImporterAPI.culture_and_leisure_division_tpr_units_endpoint: (
+        MOCKED_SERVICE_MAP_UNITS_RESPONSE
+    ),
+    LocationImporterAPI.accessibility_shortcoming_counts_endpoint: (
+        MOCKED_SERVICE_MAP_UNIT_VIEWPOINT_RESPONSE
+    ),
+    LocationImporterAPI.accessibility_viewpoint_endpoint: (
+        MOCKED_SERVICE_MAP_ACCESSIBILITY_VIEWPOINT_RESPONSE
+    ),
+    LocationImporterAPI.accessibility_sentence_endpoint: (
+        MOCKED_SERVICE_MAP_ACCESSIBILITY_SENTENCE_VIEWPOINT_RESPONSE
+    ),
+    LocationImporterAPI.accessibility_shortages_endpoint: (
+        MOCKED_SERVICE_MAP_ACCESSIBILITY_SHORTAGE_VIEWPOINT_RESPONSE
+    ),
+    LocationImporterAPI.services_endpoint: (
+        MOCKED_SERVICE_REGISTRY_DESCRIPTION_VIEWPOINT_RESPONSE
+    ),
+    LocationImporterAPI.connections_endpoint: MOCKED_SERVICE_MAP_CONNECTIONS_RESPONSE,
+    LocationImporterAPI.linked_events_place_endpoint: {
+        "meta": {"count": 2, "next": None, "previous": None},
+        "data": [
+            {"id": f"tprek:{tpr_unit_id}", "n_events": count}
+            for tpr_unit_id, count in MOCKED_EVENT_COUNTS_PER_TPR_UNIT_RESPONSE.items()
+        ],
+    },
+    Ontology.ontology_tree_endpoint: ontology_tree,
+    Ontology.ontology_word_endpoint: ontology_words,
+}
+
+
+@pytest.fixture
+def async_sources(mocker, settings):
+    """
+    Fetch the location import's sources with the async client from SOURCES, or
+    fail them with the status codes in the returned dict by URL.
+    """
+    settings.IMPORT_ASYNC_FETCHING = True
+    failing_sources = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/opening_hours/"):
+            return httpx.Response(200, json=MOCK_OPENING_HOURS_RESPONSE)
+        for url, data in SOURCES.items():
+            if request.url == httpx.URL(url):
+                return httpx.Response(failing_sources.get(url, 200), json=data)
+        return httpx.Response(404)
+
+    mocker.patch(
+        "ingest.importers.location.importers.AsyncSourceClient",
+        partial(AsyncSourceClient, transport=httpx.MockTransport(handler)),
+    )
+    mocker.patch("ingest.importers.utils.retry.asyncio.sleep")
+    return failing_sources
+
+
+def get_venues_without_meta() -> list:
+    es = get_elasticsearch_client()
+    es.indices.refresh(index="location")
+    venues = [
+        hit["_source"]["venue"] for hit in es.search(index="location")["hits"]["hits"]
+    ]
+    return sorted(
+        ({**venue, "meta": None} for venue in venues),
+        key=lambda venue: venue["name"]["fi"],
+    )
+
+
+def get_comparable_base_data(importer: LocationImporter) -> dict:
+    base_data = importer.get_base_data()
+    ontology = base_data.pop("ontology")
+    return {
+        **base_data,
+        "ontology": (ontology.ontology_tree, ontology.ontology_word),
+    }
+
+
+def test_async_base_data_fetching(
+    mocked_location_sources,
+    mocked_service_map_accessibility_viewpoint_response,
+    mocked_tpr_units_response,
+    async_sources,
+    settings,
+):
+    importer = LocationImporter()
+    settings.IMPORT_ASYNC_FETCHING = False
+    sync_importer = LocationImporter()
+
+    assert get_comparable_base_data(importer) == get_comparable_base_data(sync_importer)
+    assert set(get_comparable_base_data(importer)) == set(BASE_DATA_ATTRIBUTES)
+    # Only the sync importer uses the sync API
+    assert mocked_tpr_units_response.call_count == 1
+    assert importer.stats.stages["fetch.tpr_units"].count == 1
+
+
+def test_async_import_prefetches_opening_hours(
+    mocked_location_sources, mocked_opening_hours_response, async_sources
+):
+    importer = LocationImporter()
+
+    assert importer.base_run() == 2
+    assert not mocked_opening_hours_response.called
+    assert importer.opening_hours_fetcher.prefetched_data.keys() == {
+        str(tpr_unit["id"]) for tpr_unit in MOCKED_SERVICE_MAP_UNITS_RESPONSE
+    }
+    assert "degraded.opening_hours" not in importer.stats.counters
+
+
+def test_async_fetching_of_optional_sources_falls_back(
+    mocked_location_sources, async_sources
+):
+    connections = LocationImporter().unit_id_to_connections_mapping
+
+    async_sources[LocationImporterAPI.linked_events_place_endpoint] = 503
+    async_sources[LocationImporterAPI.connections_endpoint] = 404
+    importer = LocationImporter()
+
+    # From the snapshot of the previous import
+    assert importer.unit_id_to_connections_mapping == connections
+    assert importer.stats.counters["fallback.connections"] == 1
+    assert importer.tpr_unit_id_to_event_count == (
+        MOCKED_EVENT_COUNTS_PER_TPR_UNIT_RESPONSE
+    )
+    assert importer.stats.counters["fallback.event_counts"] == 1
+
+    # Required sources fail the import
+    async_sources[LocationImporterAPI.tpr_units_endpoint] = 503
+    with pytest.raises(requests.HTTPError):
+        LocationImporter()
+
+
+def test_async_indexing(mocked_location_sources, settings, mocker):
+    LocationImporter().base_run()
+    venues = get_venues_without_meta()
+
+    settings.IMPORT_ASYNC_INDEXING = True
+    add_data_stream_async = mocker.spy(LocationImporter, "add_data_stream_async")
+    importer = LocationImporter()
+
+    assert importer.base_run() == 2
+    assert get_venues_without_meta() == venues
+    assert add_data_stream_async.call_count == 1
+    assert importer.stats.bulk.documents == 2
+    assert importer.stats.bulk.bytes > 0
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+from requests import RequestException
+
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers.location.importers import LocationImporter
+from ingest.importers.utils.checkpoint import SourceSnapshot
+from ingest.importers.utils.host_limiter import CircuitOpenError
+
+
+def get_venues() -> list:
+    es = get_elasticsearch_client()
+    es.indices.refresh(index="location")
+    return [
+        hit["_source"]["venue"] for hit in es.search(index="location")["hits"]["hits"]
+    ]
+
+
+def test_import_without_event_counts(
+    mocked_location_sources, mocked_event_counts_per_tpr_unit_response
+):
+    mocked_event_counts_per_tpr_unit_response.side_effect = CircuitOpenError(
+        "Circuit breaker of linkedevents.api.hel.fi is open"
+    )
+    importer = LocationImporter()
+
+    assert importer.base_run() == 2
+    assert [venue["eventCount"] for venue in get_venues()] == [0, 0]
+    assert importer.stats.counters["degraded.event_counts"] == 1
+
+
+def test_import_without_opening_hours(
+    mocked_location_sources, mocked_opening_hours_response
+):
+    mocked_opening_hours_response.side_effect = CircuitOpenError(
+        "Circuit breaker of hauki.api.hel.fi is open"
+    )
+    importer = LocationImporter()
+
+    assert importer.base_run() == 2
+    assert [venue["openingHours"]["openRanges"] for venue in get_venues()] == [[], []]
+    assert importer.stats.counters["degraded.opening_hours"] == 2
+
+
+def test_import_optional_sources_from_snapshots(
+    mocked_location_sources,
+    mocked_service_map_connections_response,
+    mocked_service_map_accessibility_sentence_viewpoint_response,
+    settings,
+):
+    def get_venues_without_meta():
+        return [{**venue, "meta": None} for venue in get_venues()]
+
+    LocationImporter().base_run()
+    venues = get_venues_without_meta()
+
+    for mocked_source in [
+        mocked_service_map_connections_response,
+        mocked_service_map_accessibility_sentence_viewpoint_response,
+    ]:
+        mocked_source.side_effect = RequestException("Service unavailable")
+    importer = LocationImporter()
+    importer.base_run()
+
+    assert get_venues_without_meta() == venues
+    assert importer.stats.counters["fallback.connections"] == 1
+    assert importer.stats.counters["fallback.accessibility_sentences"] == 1
+
+    # Too old snapshots are not used, and the sources without a default are required
+    settings.IMPORT_SOURCE_SNAPSHOT_MAX_AGE_SECONDS = 0
+    time.sleep(0.01)
+    with pytest.raises(RequestException):
+        LocationImporter()
+
+
+def test_failing_optional_source_does_not_overwrite_snapshot(
+    mocked_location_sources, mocked_event_counts_per_tpr_unit_response
+):
+    LocationImporter()
+    snapshot = SourceSnapshot("location.event_counts")
+    data, _ = snapshot.load(max_age_seconds=60)
+    assert data
+
+    mocked_event_counts_per_tpr_unit_response.side_effect = RequestException
+    assert LocationImporter().tpr_unit_id_to_event_count == data
+    assert snapshot.load(max_age_seconds=60)[0] == data
@@ -1,5 +1,6 @@
 import pytest
 
+from common.elasticsearch import get_elasticsearch_client
 from ingest.importers.location.dataclasses import Connection, Reservation
 from ingest.importers.location.enums import ConnectionTag
 from ingest.importers.location.importers import LocationImporter
@@ -47,6 +48,29 @@ def test_location_importer_without_data_init():
     assert importer.base_run() == 0
 
 
+def test_location_index_is_sorted(mocked_location_sources):
+    LocationImporter().base_run()
+
+    index = get_elasticsearch_client().indices.get(index="location")["location_1"]
+    assert index["settings"]["index"]["sort.field"] == [
+        "venue.eventCount",
+        "venue.meta.id.keyword",
+    ]
+    assert index["settings"]["index"]["sort.order"] == ["desc", "desc"]
+    venue = index["mappings"]["properties"]["venue"]["properties"]
+    assert venue["eventCount"]["type"] == "long"
+    for keyword in [
+        venue["meta"]["properties"]["id"]["fields"]["keyword"],
+        *(
+            venue["name"]["properties"][lang]["fields"]["keyword"]
+            for lang in ("fi", "sv", "en")
+        ),
+    ]:
+        assert keyword["type"] == "keyword"
+        assert keyword["doc_values"] is True
+        assert keyword["eager_global_ordinals"] is True
+
+
 def test_create_reservation():
     importer = LocationImporter(enable_data_fetching=False)
     # assert importer._create_reservation(None) == None
@@ -0,0 +1,131 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from requests import RequestException
+
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers.location.importers import LocationImporter
+
+TPR_LINK = {
+    "service": "tpr",
+    "origin_url": "https://www.hel.fi/palvelukarttaws/rest/v4/unit/1/",
+    "raw_data": {"id": "1", "name_fi": "Leikkipuisto Kannelmäki"},
+}
+OLD_HAUKI_LINK = {
+    "service": "hauki",
+    "origin_url": "https://hauki.api.hel.fi/v1/resource/tprek:1/opening_hours/",
+    "raw_data": [],
+}
+OLD_OPENING_HOURS = {
+    "url": "https://hauki.api.hel.fi/v1/resource/tprek:1/opening_hours/",
+    "data": [],
+    "openRanges": [],
+}
+
+
+@pytest.fixture
+def es(fake_elasticsearch):
+    es = get_elasticsearch_client()
+    es.indices.create(index="location_1", aliases={"location": {}})
+    for _id, venue_id, event_count, links in [
+        ("a", "1", 5, [TPR_LINK, OLD_HAUKI_LINK]),
+        ("b", "4", 0, []),
+        ("c", "404", 3, []),  # Not in Hauki nor Linked Events
+    ]:
+        es.index(
+            index="location",
+            id=_id,
+            document={
+                "venue": {
+                    "meta": {"id": venue_id},
+                    "name": {"fi": f"Venue {venue_id}"},
+                    "openingHours": OLD_OPENING_HOURS,
+                    "eventCount": event_count,
+                },
+                "links": links,
+            },
+        )
+    return es
+
+
+def test_update_opening_hours(es, mocked_opening_hours_response):
+    importer = LocationImporter.for_partial_update()
+    assert importer.base_partial_update("opening_hours") == 3
+    assert mocked_opening_hours_response.call_count == 1
+
+    document = es.get(index="location", id="a")["_source"]
+    assert document["venue"]["meta"] == {"id": "1"}
+    assert document["venue"]["name"] == {"fi": "Venue 1"}
+    assert document["venue"]["openingHours"]["openRanges"] == [
+        {"gte": "2021-09-03T11:00:00+03:00", "lt": "2021-09-03T18:00:00+03:00"}
+    ]
+    [tpr_link, hauki_link] = document["links"]
+    assert tpr_link == TPR_LINK
+    assert hauki_link["service"] == "hauki"
+    assert hauki_link["raw_data"][0]["date"] == "2021-09-03"
+
+    assert es.get(index="location", id="b")["_source"]["links"][0]["service"] == (
+        "hauki"
+    )
+    document = es.get(index="location", id="c")["_source"]
+    assert document["venue"]["openingHours"]["openRanges"] == []
+    assert document["links"][0]["raw_data"] == []
+    assert importer.stats.bulk.documents == 3
+    assert importer.stats.bulk.bytes > 0
+
+
+def test_update_opening_hours_clears_stale_when_hauki_fails(es, mocker):
+    es.update(
+        index="location",
+        id="a",
+        doc={
+            "venue": {
+                "openingHours": {
+                    "weeklyHours": [33, 34],
+                    "nextOpen": "2021-09-03T11:00:00+03:00",
+                    "nextClose": "2021-09-03T18:00:00+03:00",
+                }
+            }
+        },
+    )
+    mocker.patch(
+        "ingest.importers.utils.opening_hours.request_json",
+        side_effect=RequestException,
+    )
+
+    importer = LocationImporter.for_partial_update()
+    assert importer.base_partial_update("opening_hours") == 3
+    assert importer.stats.counters["degraded.opening_hours"] == 3
+
+    document = es.get(index="location", id="a")["_source"]
+    opening_hours = document["venue"]["openingHours"]
+    assert opening_hours["url"] == OLD_OPENING_HOURS["url"]
+    assert opening_hours["data"] == opening_hours["openRanges"] == []
+    assert opening_hours["weeklyRanges"] == opening_hours["weeklyHours"] == []
+    assert opening_hours["nextOpen"] is opening_hours["nextClose"] is None
+    assert document["links"] == [TPR_LINK]
+
+
+def test_update_event_counts(es, mocker):
+    mocker.patch(
+        "ingest.importers.location.api.LocationImporterAPI.fetch_event_counts_per_tpr_unit",
+        return_value={"1": 7, "4": 0},
+    )
+
+    importer = LocationImporter.for_partial_update()
+    # The count of the venue "4" is unchanged
+    assert importer.base_partial_update("event_counts") == 2
+
+    assert {
+        _id: es.get(index="location", id=_id)["_source"]["venue"]["eventCount"]
+        for _id in "abc"
+    } == {"a": 7, "b": 0, "c": 0}
+    document = es.get(index="location", id="a")["_source"]
+    assert document["venue"]["openingHours"] == OLD_OPENING_HOURS
+    assert document["links"] == [TPR_LINK, OLD_HAUKI_LINK]
+    assert importer.stats.bulk.documents == 2
+
+
+def test_unknown_partial_update():
+    with pytest.raises(CommandError):
+        call_command("ingest_data", "ontology_word", "--only", "opening_hours")
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers.location.importers import LocationImporter
+from ingest.importers.utils.checkpoint import ImportCheckpoint
+
+
+def interrupt_at_second_unit(importer: LocationImporter, mocker) -> None:
+    create_root = importer._create_root_from_tpr_unit
+
+    def create_root_until_out_of_memory(tpr_unit):
+        if tpr_unit is importer.tpr_units[1]:
+            raise MemoryError
+        return create_root(tpr_unit)
+
+    mocker.patch.object(
+        importer,
+        "_create_root_from_tpr_unit",
+        side_effect=create_root_until_out_of_memory,
+    )
+    with pytest.raises(MemoryError):
+        importer.base_run()
+
+
+def get_document_ids(index: str) -> set:
+    es = get_elasticsearch_client()
+    es.indices.refresh(index=index)
+    return {hit["_id"] for hit in es.search(index=index)["hits"]["hits"]}
+
+
+def test_resume(mocked_location_sources, mocked_tpr_units_response, mocker, settings):
+    importer = LocationImporter()
+    [first_id, second_id] = [str(tpr_unit["id"]) for tpr_unit in importer.tpr_units]
+    interrupt_at_second_unit(importer, mocker)
+    assert get_document_ids("location_wip") == {first_id}
+    assert ImportCheckpoint("location_1").load_offset() == 1
+
+    mocked_tpr_units_response.reset_mock()
+    importer = LocationImporter(resume=True)
+    assert importer.resuming
+    # The base data is restored from the checkpoint instead of fetching it again
+    assert mocked_tpr_units_response.call_count == 0
+    mocked_location_sources.assert_called_with(False)
+
+    assert importer.base_run() == 1
+    assert get_document_ids("location") == {first_id, second_id}
+    assert os.listdir(settings.IMPORT_CHECKPOINT_DIR) == []
+
+
+def test_resume_skips_units_indexed_after_the_checkpoint(
+    mocked_location_sources, mocker
+):
+    interrupt_at_second_unit(LocationImporter(), mocker)
+    # Interrupted after indexing the first unit, but before checkpointing it
+    ImportCheckpoint("location_1").save_offset(0)
+
+    assert LocationImporter(resume=True).base_run() == 1
+    assert len(get_document_ids("location")) == 2
+
+
+def test_resume_without_interrupted_import_starts_over(
+    mocked_location_sources, mocked_tpr_units_response
+):
+    importer = LocationImporter(resume=True)
+    assert not importer.resuming
+    assert mocked_tpr_units_response.call_count == 1
+    assert importer.base_run() == 2
+    assert len(get_document_ids("location")) == 2
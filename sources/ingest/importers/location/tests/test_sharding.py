@@ -0,0 +1,139 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers.base import ImportValidationError
+from ingest.importers.location.api import LocationImporterAPI
+from ingest.importers.location.importers import LocationImporter
+from ingest.importers.utils.sharding import Shard, ShardCoordination, ShardError
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(mocker):
+    mocker.patch("ingest.importers.utils.sharding.POLL_INTERVAL_SECONDS", 0.01)
+
+
+def run_shard(shard: Shard):
+    importer = LocationImporter(shard=shard)
+    return importer.base_run(), importer
+
+
+def test_sharded_import(mocked_location_sources, mocked_tpr_units_response, settings):
+    with ThreadPoolExecutor() as executor:
+        worker = executor.submit(run_shard, Shard(1, 2))
+        coordinator = executor.submit(run_shard, Shard(0, 2))
+        worker_count, worker_importer = worker.result(timeout=10)
+        coordinator_count, coordinator_importer = coordinator.result(timeout=10)
+
+    # The base data is fetched by the coordinator only
+    assert mocked_tpr_units_response.call_count == 1
+    assert (worker_count, coordinator_count) == (1, 1)
+    assert worker_importer.checkpoint.index == coordinator_importer.checkpoint.index
+
+    es = get_elasticsearch_client()
+    es.indices.refresh(index="location")
+    assert es.count(index="location")["count"] == 2
+    assert not es.indices.exists_alias(name="location_wip")
+
+
+def test_sharded_import_fails_with_a_shard(mocked_location_sources, mocker):
+    create_root = LocationImporter._create_root_from_tpr_unit
+
+    def create_root_until_out_of_memory_in_worker(importer, tpr_unit):
+        if importer.is_shard_worker:
+            raise MemoryError
+        return create_root(importer, tpr_unit)
+
+    mocker.patch.object(
+        LocationImporter,
+        "_create_root_from_tpr_unit",
+        autospec=True,
+        side_effect=create_root_until_out_of_memory_in_worker,
+    )
+
+    with ThreadPoolExecutor() as executor:
+        worker = executor.submit(run_shard, Shard(1, 2))
+        coordinator = executor.submit(run_shard, Shard(0, 2))
+        with pytest.raises(MemoryError):
+            worker.result(timeout=10)
+        with pytest.raises(ShardError, match=r"Shards \[1\] failed"):
+            coordinator.result(timeout=10)
+
+    # The import is not finished
+    assert get_elasticsearch_client().indices.exists_alias(name="location_wip")
+
+
+def test_sharded_import_validates_the_bulk_errors_of_all_shards(
+    mocked_location_sources, mocker
+):
+    report = ShardCoordination.report
+
+    def report_the_workers_documents_failed(coordination, success, **bulk):
+        if not coordination.shard.is_coordinator:
+            bulk["bulk_errors"] = bulk.get("bulk_documents", 0)
+        return report(coordination, success, **bulk)
+
+    mocker.patch.object(
+        ShardCoordination, "report", report_the_workers_documents_failed
+    )
+
+    with ThreadPoolExecutor() as executor:
+        worker = executor.submit(run_shard, Shard(1, 2))
+        coordinator = executor.submit(run_shard, Shard(0, 2))
+        worker.result(timeout=10)
+        with pytest.raises(ImportValidationError, match="1 of 2 bulk documents failed"):
+            coordinator.result(timeout=10)
+
+    # The import is not swapped active
+    assert get_elasticsearch_client().indices.exists_alias(name="location_wip")
+
+
+def test_sharded_import_fails_with_the_coordinators_base_data(
+    mocked_location_sources, mocker, settings
+):
+    settings.IMPORT_SHARD_TIMEOUT_SECONDS = 60
+    worker_waiting = threading.Event()
+    wait_for_publication = ShardCoordination.wait_for_publication
+
+    def wait_for_publication_and_notify(coordination, timeout_seconds):
+        worker_waiting.set()
+        return wait_for_publication(coordination, timeout_seconds)
+
+    def fetch_tpr_units_after_the_worker_waits():
+        worker_waiting.wait(timeout=10)
+        raise ConnectionError("TPR is down")
+
+    mocker.patch.object(
+        ShardCoordination, "wait_for_publication", wait_for_publication_and_notify
+    )
+    mocker.patch.object(
+        LocationImporterAPI,
+        "fetch_tpr_units",
+        side_effect=fetch_tpr_units_after_the_worker_waits,
+    )
+
+    with ThreadPoolExecutor() as executor:
+        worker = executor.submit(run_shard, Shard(1, 2))
+        coordinator = executor.submit(run_shard, Shard(0, 2))
+        with pytest.raises(ConnectionError, match="TPR is down"):
+            coordinator.result(timeout=10)
+        # The worker does not wait for IMPORT_SHARD_TIMEOUT_SECONDS
+        with pytest.raises(ShardError, match="coordinator .* failed"):
+            worker.result(timeout=10)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("location", "--shard", "2/2"),
+        ("ontology_word", "--shard", "0/2"),
+        ("location", "--shard", "0/2", "--resume"),
+    ],
+)
+def test_invalid_shard_arguments(args):
+    with pytest.raises(CommandError):
+        call_command("ingest_data", *args)
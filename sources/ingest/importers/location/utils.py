@@ -1,5 +1,6 @@
 import base64
 from collections import defaultdict
+from functools import partial
 from typing import Dict, List, Optional, Set
 
 from ingest.importers.location.api import LocationImporterAPI
@@ -136,15 +137,22 @@ def get_suggestions_from_ontologies(ontologies: List[OntologyObject]):
     return suggest
 
 
-def define_language_properties():
+def define_language_properties(sortable=False):
+    """
+    :param sortable: Whether the keyword fields are used for sorting, i.e. their
+        global ordinals are built on refresh instead of on the first sorted search.
+    """
     languages = [("fi", "finnish"), ("sv", "swedish"), ("en", "english")]
     language_properties = {}
 
     for [language, analyzer] in languages:
+        keyword = {"type": "keyword", "ignore_above": 256, "doc_values": True}
+        if sortable:
+            keyword["eager_global_ordinals"] = True
         language_properties[language] = {
             "type": "text",
             "analyzer": analyzer,
-            "fields": {"keyword": {"type": "keyword", "ignore_above": 256}},
+            "fields": {"keyword": keyword},
         }
 
     return language_properties
@@ -172,24 +180,28 @@ def create_accessibility_shortcomings(
     )
 
 
-def get_unit_id_to_accessibility_shortcomings_mapping() -> Dict[
-    str, List[AccessibilityShortcoming]
-]:
+def get_unit_id_to_accessibility_shortcomings_mapping(
+    units: Optional[List[dict]] = None,
+) -> Dict[str, List[AccessibilityShortcoming]]:
     """
     Get mapping of unit IDs to their accessibility shortcomings from new service map API
+
+    :param units: The units' shortcoming counts fetched already, fetched if not given.
     """
+    if units is None:
+        api = LocationImporterAPI
+        units = api.fetch_unit_ids_and_accessibility_shortcoming_counts()
     return {
         str(unit["id"]): create_accessibility_shortcomings(
             unit.get("accessibility_shortcoming_count", {})
         )
-        for unit in (
-            LocationImporterAPI.fetch_unit_ids_and_accessibility_shortcoming_counts()
-        )
+        for unit in units
     }
 
 
 def get_accessibility_viewpoint_id_to_name_mapping(
     use_fallback_languages: bool,
+    accessibility_viewpoints: Optional[List[dict]] = None,
 ) -> Dict[str, LanguageString]:
     """
     Get accessibility viewpoint ID to name mapping from service map API.
@@ -197,6 +209,8 @@ def get_accessibility_viewpoint_id_to_name_mapping(
     Documentation about the service map API's accessibility viewpoint endpoint:
     - https://www.hel.fi/palvelukarttaws/restpages/ver4.html#_accessibility_viewpoint
 
+    :param accessibility_viewpoints: The viewpoints fetched already, fetched if not
+        given.
     :return: Mapping from accessibility viewpoint ID to accessibility viewpoint name.
 
     Example of a possible return value:
@@ -211,7 +225,8 @@ def get_accessibility_viewpoint_id_to_name_mapping(
         }
     }
     """
-    accessibility_viewpoints = LocationImporterAPI.fetch_accessibility_viewpoint()
+    if accessibility_viewpoints is None:
+        accessibility_viewpoints = LocationImporterAPI.fetch_accessibility_viewpoint()
     return {
         viewpoint["id"]: LanguageStringConverter(
             viewpoint, use_fallback_languages
@@ -259,11 +274,16 @@ def create_accessibility_sentence(
 
 def get_unit_id_to_accessibility_sentences_mapping(
     use_fallback_languages: bool,
+    accessibility_sentences: Optional[List[dict]] = None,
 ) -> Dict[str, List[AccessibilitySentence]]:
     """
     Get a mapping of unit IDs to their accessibility sentences from service map API.
+
+    :param accessibility_sentences: The sentences fetched already, fetched if not
+        given.
     """
-    accessibility_sentences = LocationImporterAPI.fetch_accessibility_sentence()
+    if accessibility_sentences is None:
+        accessibility_sentences = LocationImporterAPI.fetch_accessibility_sentence()
     result = defaultdict(list)
     for sentence in accessibility_sentences:
         result[str(sentence["unit_id"])].append(
@@ -274,13 +294,19 @@ def get_unit_id_to_accessibility_sentences_mapping(
 
 def get_unit_id_to_accessibility_viewpoint_shortages_mapping(
     use_fallback_languages: bool,
+    accessibility_shortages: Optional[List[dict]] = None,
 ) -> Dict[str, Dict[str, List[LanguageString]]]:
     """
     Get a mapping of unit IDs to their accessibility viewpoints' IDs to their
     list of accessibility shortages from service map API.
+
+    :param accessibility_shortages: The shortages fetched already, fetched if not
+        given.
     """
-    accessibility_shortages = LocationImporterAPI.fetch_accessibility_shortages()
-    result = defaultdict(lambda: defaultdict(list))
+    if accessibility_shortages is None:
+        accessibility_shortages = LocationImporterAPI.fetch_accessibility_shortages()
+    # Not a lambda, to keep the mapping picklable for the import checkpoints
+    result = defaultdict(partial(defaultdict, list))
     for shortage in accessibility_shortages:
         unit_id = str(shortage["unit_id"])
         viewpoint_id = str(shortage["viewpoint_id"])
@@ -396,12 +422,17 @@ def get_enriched_accessibility_viewpoints(
     ]
 
 
-def get_unit_id_to_target_groups_mapping() -> Dict[str, Set[TargetGroup]]:
+def get_unit_id_to_target_groups_mapping(
+    services: Optional[List[dict]] = None,
+) -> Dict[str, Set[TargetGroup]]:
     """
     Get a mapping of unit IDs to their target groups from palvelukuvausrekisteri, see
     https://www.hel.fi/palvelukarttaws/restpages/palvelurekisteri.html for documentation
+
+    :param services: The services fetched already, fetched if not given.
     """
-    services = LocationImporterAPI.fetch_services()
+    if services is None:
+        services = LocationImporterAPI.fetch_services()
     result = defaultdict(set)
     for service in services:
         unit_ids = service.get("unit_ids", [])
@@ -453,11 +484,15 @@ def create_connection(connection: dict, use_fallback_languages=True) -> Connecti
 
 def get_unit_id_to_connections_mapping(
     use_fallback_languages: bool,
+    connections: Optional[List[dict]] = None,
 ) -> Dict[str, List[Connection]]:
     """
     Get a mapping of unit IDs to their connections from service map API.
+
+    :param connections: The connections fetched already, fetched if not given.
     """
-    connections = LocationImporterAPI.fetch_connections()
+    if connections is None:
+        connections = LocationImporterAPI.fetch_connections()
     result = defaultdict(list)
     for connection in connections:
         result[str(connection["unit_id"])].append(
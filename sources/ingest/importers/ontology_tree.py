@@ -25,18 +25,22 @@ class OntologyTreeImporter(Importer[OntologyTreeObject]):
         logger.info(f"Started importing ontology trees at {timezone.now():%X}")
         ontology = Ontology()
 
-        for tree_obj in ontology.ontology_tree:
-            data = OntologyTreeObject(
-                name=LanguageStringConverter(
-                    tree_obj, self.use_fallback_languages
-                ).get_language_string("name"),
-                ancestorIds=ontology.get_ancestor_ids(tree_obj["id"]),
-                childIds=tree_obj["child_ids"],
-                ontologyWordReference=tree_obj.get("ontologyword_reference"),
+        count = self.add_data_stream(
+            (
+                str(tree_obj["id"]),
+                OntologyTreeObject(
+                    name=LanguageStringConverter(
+                        tree_obj, self.use_fallback_languages
+                    ).get_language_string("name"),
+                    ancestorIds=ontology.get_ancestor_ids(tree_obj["id"]),
+                    childIds=tree_obj["child_ids"],
+                    ontologyWordReference=tree_obj.get("ontologyword_reference"),
+                ),
             )
-            self.add_data(data, extra_params={"id": tree_obj["id"]})
+            for tree_obj in ontology.ontology_tree
+        )
 
         logger.info(
-            f"Finished importing {len(ontology.ontology_tree)} ontology trees "
+            f"Finished importing {count}/{len(ontology.ontology_tree)} ontology trees "
             + f"at {timezone.now():%X}"
         )
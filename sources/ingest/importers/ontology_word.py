@@ -21,15 +21,19 @@ class OntologyWordImporter(Importer[OntologyWordObject]):
         logger.info(f"Started importing ontology words at {timezone.now():%X}")
         ontology = Ontology()
 
-        for word_obj in ontology.ontology_word:
-            data = OntologyWordObject(
-                name=LanguageStringConverter(
-                    word_obj, self.use_fallback_languages
-                ).get_language_string("ontologyword"),
+        count = self.add_data_stream(
+            (
+                str(word_obj["id"]),
+                OntologyWordObject(
+                    name=LanguageStringConverter(
+                        word_obj, self.use_fallback_languages
+                    ).get_language_string("ontologyword"),
+                ),
             )
-            self.add_data(data, extra_params={"id": word_obj["id"]})
+            for word_obj in ontology.ontology_word
+        )
 
         logger.info(
-            f"Finished importing {len(ontology.ontology_word)} ontology words "
+            f"Finished importing {count}/{len(ontology.ontology_word)} ontology words "
             + f"at {timezone.now():%X}"
         )
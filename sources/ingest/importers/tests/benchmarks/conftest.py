@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from ingest.importers.location import LocationImporter
+from ingest.importers.tests.benchmarks.synthetic import generate_location_data
+from ingest.importers.utils import AdministrativeDivision, LanguageString
+
+# Number of synthetic TPR units, e.g. BENCHMARK_UNIT_COUNT=100000
+DEFAULT_UNIT_COUNT = 10000
+
+STUB_ADMINISTRATIVE_DIVISIONS = [
+    AdministrativeDivision(
+        id="ocd-division/country:fi/kunta:helsinki/peruspiiri:keskusta",
+        type="district",
+        municipality="Helsinki",
+        name=LanguageString(fi="Keskusta", sv="Centrum", en="Keskusta"),
+    ),
+    AdministrativeDivision(
+        id="ocd-division/country:fi/kunta:helsinki/kaupunginosa:kamppi",
+        type="neighborhood",
+        municipality="Helsinki",
+        name=LanguageString(fi="Kamppi", sv="Kampen", en="Kamppi"),
+    ),
+]
+
+
+class StubAdministrativeDivisionFetcher:
+    """
+    AdministrativeDivisionFetcher without the database, see
+    test_administrative_division_lookup for benchmarking the real lookups.
+    """
+
+    def __init__(self, import_divisions=True):
+        pass
+
+    def get_by_coordinates(self, longitude, latitude):
+        return list(STUB_ADMINISTRATIVE_DIVISIONS)
+
+
+@pytest.fixture(scope="session")
+def unit_count() -> int:
+    return int(os.environ.get("BENCHMARK_UNIT_COUNT", DEFAULT_UNIT_COUNT))
+
+
+@pytest.fixture(scope="session")
+def synthetic_data(unit_count):
+    return generate_location_data(unit_count)
+
+
+@pytest.fixture
+def synthetic_sources(mocker, synthetic_data):
+    """Serve the synthetic data from all the location importer's data sources."""
+    api = "ingest.importers.location.api.LocationImporterAPI"
+    for method, return_value in [
+        ("fetch_tpr_units", synthetic_data.tpr_units),
+        (
+            "fetch_culture_and_leisure_division_tpr_units",
+            synthetic_data.culture_and_leisure_division_tpr_units,
+        ),
+        (
+            "fetch_accessibility_shortcoming",
+            synthetic_data.accessibility_shortcoming_counts,
+        ),
+        ("fetch_accessibility_sentence", synthetic_data.accessibility_sentences),
+        ("fetch_accessibility_shortages", synthetic_data.accessibility_shortages),
+        ("fetch_accessibility_viewpoint", synthetic_data.accessibility_viewpoints),
+        ("fetch_services", synthetic_data.services),
+        ("fetch_connections", synthetic_data.connections),
+        ("fetch_event_counts_per_tpr_unit", synthetic_data.event_counts),
+    ]:
+        mocker.patch(f"{api}.{method}", return_value=return_value)
+    mocker.patch(
+        "ingest.importers.utils.opening_hours.request_json",
+        side_effect=synthetic_data.hauki_response,
+    )
+    mocker.patch(
+        "ingest.importers.location.importers.AdministrativeDivisionFetcher",
+        StubAdministrativeDivisionFetcher,
+    )
+    return synthetic_data
+
+
+@pytest.fixture
+def location_importer(
+    fake_elasticsearch,
+    synthetic_sources,
+    mocked_ontology_trees,
+    mocked_ontology_words,
+) -> LocationImporter:
+    return LocationImporter()
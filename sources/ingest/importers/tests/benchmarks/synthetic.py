@@ -0,0 +1,297 @@
+"""
+Synthetic source data for benchmarking the location importer.
+
+The data is generated deterministically from a seed using the mock responses in
+ingest.importers.tests.mocks as templates, so it has the same shape as the real
+service map, service registry, Linked Events and Hauki responses, but can be scaled
+to tens of thousands of TPR units.
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from ingest.importers.location.enums import (
+    AccessibilityProfile,
+    AccessibilityViewpointID,
+    ConnectionTag,
+    TargetGroup,
+)
+from ingest.importers.tests.mocks import (
+    MOCKED_SERVICE_MAP_ACCESSIBILITY_VIEWPOINT_RESPONSE,
+    ontology_tree,
+    ontology_words,
+    unit_indoor_arena,
+    unit_swimhall,
+)
+
+FIRST_UNIT_ID = 100000
+
+# Rough bounding box of Helsinki as (min, max) latitude and longitude
+LATITUDE_RANGE = (60.13, 60.30)
+LONGITUDE_RANGE = (24.78, 25.25)
+
+UNIT_TEMPLATES = [
+    {k: v for k, v in unit.items() if k != "connections"}
+    for unit in [unit_swimhall, unit_indoor_arena]
+]
+CONNECTION_TEMPLATES = unit_swimhall["connections"] + unit_indoor_arena["connections"]
+SENTENCE_TEMPLATES = (
+    unit_swimhall["accessibility_sentences"]
+    + unit_indoor_arena["accessibility_sentences"]
+)
+
+ONTOLOGY_WORD_IDS = [word["id"] for word in ontology_words]
+
+
+def _get_ontology_tree_ids_with_complete_ancestry() -> List[int]:
+    """
+    :return: IDs of ontology tree nodes whose all ancestors are in the mocked tree,
+        i.e. which Ontology.enrich_tree_ids() can enrich.
+    """
+    parent_ids = {node["id"]: node.get("parent_id") for node in ontology_tree}
+
+    def is_complete(node_id):
+        while node_id is not None:
+            if node_id not in parent_ids:
+                return False
+            node_id = parent_ids[node_id]
+        return True
+
+    return [node_id for node_id in parent_ids if is_complete(node_id)]
+
+
+ONTOLOGY_TREE_IDS = _get_ontology_tree_ids_with_complete_ancestry()
+
+VIEWPOINT_VALUES = ("green", "red", "unknown")
+
+
+@dataclass
+class SyntheticLocationData:
+    """Raw responses of all the location importer's data sources."""
+
+    tpr_units: List[dict]
+    culture_and_leisure_division_tpr_units: List[dict]
+    accessibility_shortcoming_counts: dict
+    accessibility_sentences: List[dict]
+    accessibility_shortages: List[dict]
+    accessibility_viewpoints: List[dict]
+    services: List[dict]
+    connections: List[dict]
+    event_counts: Dict[str, int]
+    # Hauki opening hours by TPR unit ID, see hauki_response()
+    opening_hours: Dict[str, List[dict]] = field(default_factory=dict)
+
+    def hauki_response(self, url: str) -> dict:
+        """
+        Mimic Hauki's opening_hours endpoint, i.e. return the opening hours of the
+        units given in the URL's resource parameter.
+        """
+        resources = parse_qs(urlparse(url).query)["resource"][0].split(",")
+        results = []
+        for resource in resources:
+            origin_id = resource.removeprefix("tprek:")
+            results.append(
+                {
+                    "resource": {
+                        "id": int(origin_id),
+                        "timezone": "Europe/Helsinki",
+                        "origins": [
+                            {"data_source": {"id": "tprek"}, "origin_id": origin_id}
+                        ],
+                    },
+                    "opening_hours": self.opening_hours.get(origin_id, []),
+                }
+            )
+        return {"count": len(results), "next": None, "results": results}
+
+
+def _generate_accessibility_viewpoints(rng: random.Random) -> str:
+    return ",".join(
+        f"{viewpoint_id.value}:{rng.choice(VIEWPOINT_VALUES)}"
+        for viewpoint_id in AccessibilityViewpointID
+    )
+
+
+def _generate_tpr_unit(rng: random.Random, unit_id: int) -> dict:
+    unit = dict(rng.choice(UNIT_TEMPLATES))
+    unit.update(
+        id=unit_id,
+        name_fi=f"Toimipiste {unit_id}",
+        name_sv=f"Verksamhetsställe {unit_id}",
+        name_en=f"Unit {unit_id}",
+        latitude=round(rng.uniform(*LATITUDE_RANGE), 6),
+        longitude=round(rng.uniform(*LONGITUDE_RANGE), 6),
+        ontologyword_ids=sorted(rng.sample(ONTOLOGY_WORD_IDS, rng.randint(0, 6))),
+        ontologytree_ids=sorted(rng.sample(ONTOLOGY_TREE_IDS, rng.randint(0, 4))),
+        accessibility_viewpoints=_generate_accessibility_viewpoints(rng),
+    )
+    return unit
+
+
+def _generate_times(rng: random.Random) -> List[dict]:
+    """Generate a day's Hauki opening hours times."""
+    kind = rng.random()
+    if kind < 0.1:
+        return []
+    if kind < 0.2:
+        # Open or closed for the whole day
+        return [
+            {
+                "start_time": None,
+                "end_time": None,
+                "end_time_on_next_day": False,
+                "resource_state": rng.choice(["open", "closed"]),
+                "full_day": True,
+            }
+        ]
+    opens = rng.randint(6, 12)
+    closes = rng.randint(opens + 4, opens + 12)
+    times = [
+        {
+            "start_time": f"{opens:02}:00:00",
+            "end_time": f"{closes % 24:02}:00:00",
+            "end_time_on_next_day": closes >= 24,
+            "resource_state": "open",
+            "full_day": False,
+        }
+    ]
+    if kind > 0.8:
+        # Closed for a while in the middle of the day
+        times.append(
+            {
+                "start_time": f"{opens + 2:02}:00:00",
+                "end_time": f"{opens + 3:02}:30:00",
+                "end_time_on_next_day": False,
+                "resource_state": "closed",
+                "full_day": False,
+            }
+        )
+    return times
+
+
+def generate_opening_hours(
+    rng: random.Random, start_date: date, days: int = 7
+) -> List[dict]:
+    """Generate a unit's Hauki opening hours for the given days."""
+    return [
+        {
+            "date": (start_date + timedelta(days=day)).isoformat(),
+            "times": _generate_times(rng),
+        }
+        for day in range(days)
+    ]
+
+
+def generate_location_data(
+    unit_count: int, seed: int = 0, start_date: date = date(2025, 1, 6)
+) -> SyntheticLocationData:
+    """
+    Generate raw source data for the given number of TPR units.
+
+    :param unit_count: Number of TPR units to generate.
+    :param seed: Random seed, the same seed always generates the same data.
+    :param start_date: First date of the generated opening hours.
+    """
+    rng = random.Random(seed)
+    tpr_units = [_generate_tpr_unit(rng, FIRST_UNIT_ID + i) for i in range(unit_count)]
+    unit_ids = [unit["id"] for unit in tpr_units]
+
+    shortcoming_counts = [
+        {
+            "id": unit_id,
+            "accessibility_shortcoming_count": {
+                profile.value: rng.randint(0, 8)
+                for profile in AccessibilityProfile
+                if rng.random() < 0.5
+            },
+        }
+        for unit_id in unit_ids
+    ]
+
+    sentences = [
+        {**rng.choice(SENTENCE_TEMPLATES), "unit_id": unit_id}
+        for unit_id in unit_ids
+        for _ in range(rng.randint(0, 6))
+    ]
+
+    shortages = [
+        {
+            "unit_id": unit["id"],
+            "viewpoint_id": viewpoint.split(":")[0],
+            "shortage_fi": f"Puute {n}",
+            "shortage_sv": f"Brist {n}",
+            "shortage_en": f"Shortage {n}",
+        }
+        for unit in tpr_units
+        for viewpoint in unit["accessibility_viewpoints"].split(",")
+        if viewpoint.endswith(":red")
+        for n in range(rng.randint(0, 3))
+    ]
+
+    services = [
+        {
+            "id": service_id,
+            "target_groups": [
+                target_group.value
+                for target_group in rng.sample(list(TargetGroup), rng.randint(0, 3))
+            ],
+            "unit_ids": rng.sample(unit_ids, min(len(unit_ids), rng.randint(1, 50))),
+        }
+        for service_id in range(max(1, unit_count // 10))
+    ]
+
+    connections = []
+    for unit_id in unit_ids:
+        for _ in range(rng.randint(0, 5)):
+            connection = {**rng.choice(CONNECTION_TEMPLATES), "unit_id": unit_id}
+            if rng.random() < 0.1:
+                connection["tags"] = [ConnectionTag.RESERVABLE.value]
+            connections.append(connection)
+
+    return SyntheticLocationData(
+        tpr_units=tpr_units,
+        culture_and_leisure_division_tpr_units=tpr_units[::3],
+        accessibility_shortcoming_counts={
+            "count": len(shortcoming_counts),
+            "next": None,
+            "previous": None,
+            "results": shortcoming_counts,
+        },
+        accessibility_sentences=sentences,
+        accessibility_shortages=shortages,
+        accessibility_viewpoints=MOCKED_SERVICE_MAP_ACCESSIBILITY_VIEWPOINT_RESPONSE,
+        services=services,
+        connections=connections,
+        event_counts={
+            str(unit_id): rng.randint(0, 300)
+            for unit_id in unit_ids
+            if rng.random() < 0.3
+        },
+        opening_hours={
+            str(unit_id): generate_opening_hours(rng, start_date)
+            for unit_id in unit_ids
+        },
+    )
+
+
+def generate_grid_cells(size: int) -> Sequence[tuple]:
+    """
+    Split the Helsinki bounding box into a size × size grid.
+
+    :return: (min longitude, min latitude, max longitude, max latitude) of every cell.
+    """
+    lat_step = (LATITUDE_RANGE[1] - LATITUDE_RANGE[0]) / size
+    lon_step = (LONGITUDE_RANGE[1] - LONGITUDE_RANGE[0]) / size
+    return [
+        (
+            LONGITUDE_RANGE[0] + x * lon_step,
+            LATITUDE_RANGE[0] + y * lat_step,
+            LONGITUDE_RANGE[0] + (x + 1) * lon_step,
+            LATITUDE_RANGE[0] + (y + 1) * lat_step,
+        )
+        for x in range(size)
+        for y in range(size)
+    ]
@@ -0,0 +1,150 @@
+import json
+import os
+from dataclasses import asdict
+
+import pytest
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from munigeo.models import (
+    AdministrativeDivision as AdministrativeDivisionModel,
+)
+from munigeo.models import (
+    AdministrativeDivisionGeometry,
+    AdministrativeDivisionType,
+)
+
+from ingest.importers.location import LocationImporter
+from ingest.importers.tests.benchmarks.synthetic import generate_grid_cells
+from ingest.importers.utils import AdministrativeDivisionFetcher, Ontology
+
+# Every benchmark processes all the synthetic units once per round, so a few rounds
+# are enough for stable results
+ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", 3))
+
+ADMINISTRATIVE_DIVISION_GRID_SIZE = 20
+
+
+def run_benchmark(benchmark, function, *args):
+    return benchmark.pedantic(function, args=args, rounds=ROUNDS, iterations=1)
+
+
+def test_create_root_from_tpr_unit(benchmark, location_importer, unit_count):
+    def create_roots():
+        return [
+            location_importer._create_root_from_tpr_unit(tpr_unit)
+            for tpr_unit in location_importer.tpr_units
+        ]
+
+    assert len(run_benchmark(benchmark, create_roots)) == unit_count
+
+
+def test_ontology_enrichment(
+    benchmark, synthetic_data, mocked_ontology_trees, mocked_ontology_words
+):
+    ontology = Ontology()
+
+    def enrich():
+        return [
+            (
+                ontology.enrich_word_ids(tpr_unit["ontologyword_ids"]),
+                ontology.enrich_tree_ids(tpr_unit["ontologytree_ids"]),
+            )
+            for tpr_unit in synthetic_data.tpr_units
+        ]
+
+    assert len(run_benchmark(benchmark, enrich)) == len(synthetic_data.tpr_units)
+
+
+def test_get_open_ranges(benchmark, location_importer, synthetic_data):
+    fetcher = location_importer.opening_hours_fetcher
+
+    def get_open_ranges():
+        return [
+            fetcher.get_open_ranges(opening_hours)
+            for opening_hours in synthetic_data.opening_hours.values()
+        ]
+
+    assert any(run_benchmark(benchmark, get_open_ranges))
+
+
+def test_get_opening_hours_and_link(benchmark, location_importer, synthetic_data):
+    """Opening hours processing per venue, with the data already fetched."""
+    fetcher = location_importer.opening_hours_fetcher
+    fetcher.data = synthetic_data.opening_hours
+
+    def get_opening_hours():
+        return [
+            fetcher.get_opening_hours_and_link(venue_id)
+            for venue_id in synthetic_data.opening_hours
+        ]
+
+    assert all(link for _, link in run_benchmark(benchmark, get_opening_hours))
+
+
+@pytest.fixture
+def administrative_division_grid(db):
+    """Neighborhoods covering Helsinki's bounding box as a grid."""
+    division_type = AdministrativeDivisionType.objects.create(
+        type="neighborhood", name="Neighborhood"
+    )
+    for i, cell in enumerate(generate_grid_cells(ADMINISTRATIVE_DIVISION_GRID_SIZE)):
+        division = AdministrativeDivisionModel(
+            type=division_type,
+            origin_id=str(i),
+            ocd_id=f"ocd-division/country:fi/kunta:helsinki/kaupunginosa:{i}",
+        )
+        for language in ["fi", "sv", "en"]:
+            division.set_current_language(language)
+            division.name = f"Alue {i} ({language})"
+        division.save()
+        AdministrativeDivisionGeometry.objects.create(
+            division=division,
+            boundary=MultiPolygon(Polygon.from_bbox(cell), srid=4326),
+        )
+
+
+def test_administrative_division_lookup(
+    benchmark, administrative_division_grid, synthetic_data, mocker
+):
+    mocker.patch(
+        "ingest.importers.utils.administrative_division.call_command",
+    )
+    fetcher = AdministrativeDivisionFetcher()
+
+    def lookup():
+        return [
+            fetcher.get_by_coordinates(
+                longitude=tpr_unit["longitude"], latitude=tpr_unit["latitude"]
+            )
+            for tpr_unit in synthetic_data.tpr_units
+        ]
+
+    assert all(run_benchmark(benchmark, lookup))
+
+
+def test_serialization(benchmark, location_importer):
+    roots = [
+        location_importer._create_root_from_tpr_unit(tpr_unit)
+        for tpr_unit in location_importer.tpr_units
+    ]
+
+    def serialize():
+        return [json.dumps(asdict(root), default=str) for root in roots]
+
+    assert len(run_benchmark(benchmark, serialize)) == len(roots)
+
+
+def test_base_run(benchmark, location_importer, fake_elasticsearch, unit_count):
+    assert run_benchmark(benchmark, location_importer.base_run) == unit_count
+    documents = location_importer.stats.bulk.documents
+    assert documents == fake_elasticsearch.stats.bulk_documents
+    assert documents % unit_count == 0
+
+
+def test_update_opening_hours(benchmark, location_importer, unit_count):
+    location_importer.base_run()
+    importer = LocationImporter.for_partial_update()
+
+    def update_opening_hours():
+        return importer.base_partial_update("opening_hours")
+
+    assert run_benchmark(benchmark, update_opening_hours) == unit_count
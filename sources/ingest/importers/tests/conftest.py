@@ -3,6 +3,7 @@ import requests
 from django.conf import settings
 
 from common.elasticsearch import get_elasticsearch_client
+from common.fake_elasticsearch import get_fake_elasticsearch_cluster
 from ingest.importers.tests.mocks import (
     MOCK_OPENING_HOURS_RESPONSE,
     MOCKED_EVENT_COUNTS_PER_TPR_UNIT_RESPONSE,
@@ -16,6 +17,39 @@ from ingest.importers.tests.mocks import (
     ontology_tree,
     ontology_words,
 )
+from ingest.importers.utils.host_limiter import reset_host_limiters
+
+
+@pytest.fixture
+def fake_elasticsearch(settings):
+    """Use a clean in-process fake Elasticsearch cluster."""
+    settings.ES_BACKEND = "fake"
+    cluster = get_fake_elasticsearch_cluster()
+    cluster.reset()
+    yield cluster
+    cluster.reset()
+
+
+@pytest.fixture(autouse=True)
+def host_limiters():
+    """Start every test with closed circuit breakers and full token buckets."""
+    reset_host_limiters()
+    yield
+    reset_host_limiters()
+
+
+@pytest.fixture(autouse=True)
+def import_checkpoint_dir(settings, tmp_path):
+    """Keep the checkpoints of the resumable importers out of the project."""
+    settings.IMPORT_CHECKPOINT_DIR = str(tmp_path / "import_checkpoints")
+    return settings.IMPORT_CHECKPOINT_DIR
+
+
+@pytest.fixture(autouse=True)
+def source_snapshot_dir(settings, tmp_path):
+    """Keep the snapshots of the optional data sources out of the project."""
+    settings.IMPORT_SOURCE_SNAPSHOT_DIR = str(tmp_path / "source_snapshots")
+    return settings.IMPORT_SOURCE_SNAPSHOT_DIR
 
 
 @pytest.fixture
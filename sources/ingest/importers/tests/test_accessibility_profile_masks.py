@@ -0,0 +1,168 @@
+from copy import deepcopy
+from typing import Dict, List, Optional, Set
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from ingest.importers.location.accessibility import (
+    ALL_VIEWPOINTS_MASK,
+    encode_viewpoint_masks,
+    evaluate_profile_statuses,
+    PROFILE_MASKS,
+    PROFILES,
+    ProfileStatus,
+    VIEWPOINT_ID_TO_BIT,
+)
+from ingest.importers.location.constants import (
+    ACCESSIBILITY_PROFILE_VIEWPOINTS,
+    NO_SHORTCOMINGS_SHORTAGE_TEXT_VARIANTS,
+)
+from ingest.importers.location.dataclasses import (
+    Accessibility,
+    AccessibilityShortcoming,
+    AccessibilityViewpoint,
+    unique_shortages_count_for_viewpoint_ids,
+)
+from ingest.importers.location.enums import (
+    AccessibilityProfile,
+    AccessibilityViewpointID,
+    AccessibilityViewpointValue,
+)
+from ingest.importers.utils.shared import LanguageString
+
+VIEWPOINT_NAME = LanguageString(fi="Testi", sv="Test", en="Test")
+
+SHORTAGES = [
+    *NO_SHORTCOMINGS_SHORTAGE_TEXT_VARIANTS,
+    *(
+        LanguageString(fi=f"Puute {i}", sv=f"Brist {i}", en=f"Shortage {i}")
+        for i in [1, 2, 3]
+    ),
+]
+
+
+def reference_fix_unknown_and_zero_shortcomings(accessibility: Accessibility) -> bool:
+    """
+    The original dictionary and set based implementation of
+    Accessibility.fix_unknown_and_zero_shortcomings() to compare against.
+    """
+    profile_shortcomings: Dict[str, Optional[int]] = {
+        profile.value: None for profile in AccessibilityProfile
+    }
+    for shortcoming in accessibility.shortcomings:
+        profile_shortcomings[shortcoming.profile] = shortcoming.count
+
+    viewpoint_id_to_shortages: Dict[str, List[LanguageString]] = {
+        viewpoint_id.value: [] for viewpoint_id in AccessibilityViewpointID
+    }
+    for viewpoint in accessibility.viewpoints:
+        if viewpoint.shortages is None:
+            raise ValueError("Viewpoint's shortages have not been set")
+        viewpoint_id_to_shortages[viewpoint.id] = viewpoint.shortages
+
+    viewpoint_id_to_value: Dict[str, str] = {
+        viewpoint_id.value: AccessibilityViewpointValue.UNKNOWN.value
+        for viewpoint_id in AccessibilityViewpointID
+    }
+    for viewpoint in accessibility.viewpoints:
+        viewpoint_id_to_value[viewpoint.id] = viewpoint.value
+
+    for profile, viewpoint_ids in ACCESSIBILITY_PROFILE_VIEWPOINTS.items():
+        profile_statuses: Set[str] = {
+            viewpoint_id_to_value[_id] for _id in viewpoint_ids
+        }
+        any_reds = AccessibilityViewpointValue.RED.value in profile_statuses
+        any_unknowns = AccessibilityViewpointValue.UNKNOWN.value in profile_statuses
+        all_greens = profile_statuses == {AccessibilityViewpointValue.GREEN.value}
+
+        if profile_shortcomings[profile] in [None, 0]:
+            if any_unknowns:
+                profile_shortcomings[profile] = None
+            elif any_reds:
+                profile_shortcomings[profile] = (
+                    unique_shortages_count_for_viewpoint_ids(
+                        viewpoint_ids, viewpoint_id_to_shortages
+                    )
+                    or None
+                )
+            elif all_greens:
+                profile_shortcomings[profile] = 0
+
+    return accessibility.update_shortcomings(profile_shortcomings)
+
+
+viewpoints_strategy = st.lists(
+    st.builds(
+        AccessibilityViewpoint,
+        id=st.sampled_from(
+            [vp_id.value for vp_id in AccessibilityViewpointID] + ["99"]
+        ),
+        name=st.just(VIEWPOINT_NAME),
+        value=st.sampled_from(
+            [value.value for value in AccessibilityViewpointValue] + ["yellow"]
+        ),
+        shortages=st.lists(st.sampled_from(SHORTAGES), max_size=4),
+    ),
+    max_size=20,
+)
+
+shortcomings_strategy = st.lists(
+    st.builds(
+        AccessibilityShortcoming,
+        profile=st.sampled_from([profile.value for profile in AccessibilityProfile]),
+        count=st.one_of(st.none(), st.integers(min_value=0, max_value=5)),
+    ),
+    max_size=8,
+)
+
+accessibility_strategy = st.builds(
+    Accessibility,
+    email=st.just("test_email"),
+    phone=st.just("test_phone"),
+    www=st.just("test_www"),
+    viewpoints=viewpoints_strategy,
+    sentences=st.just([]),
+    shortcomings=shortcomings_strategy,
+)
+
+
+@given(accessibility=accessibility_strategy)
+def test_fix_unknown_and_zero_shortcomings_matches_reference(accessibility):
+    expected = deepcopy(accessibility)
+    expected_result = reference_fix_unknown_and_zero_shortcomings(expected)
+
+    assert accessibility.fix_unknown_and_zero_shortcomings() == expected_result
+    assert accessibility.shortcomings == expected.shortcomings
+
+
+def test_profile_masks_cover_profile_viewpoints():
+    for profile, viewpoint_ids in ACCESSIBILITY_PROFILE_VIEWPOINTS.items():
+        assert PROFILE_MASKS[profile] == sum(
+            VIEWPOINT_ID_TO_BIT[viewpoint_id] for viewpoint_id in viewpoint_ids
+        )
+
+
+def test_encode_viewpoint_masks_defaults_to_unknown():
+    assert encode_viewpoint_masks([]) == (0, 0, ALL_VIEWPOINTS_MASK)
+
+
+def test_encode_viewpoint_masks_last_value_wins():
+    wheelchair = AccessibilityViewpointID.WHEELCHAIR.value
+    masks = encode_viewpoint_masks(
+        [
+            AccessibilityViewpoint(id=wheelchair, name=VIEWPOINT_NAME, value="red"),
+            AccessibilityViewpoint(id=wheelchair, name=VIEWPOINT_NAME, value="green"),
+        ]
+    )
+    bit = VIEWPOINT_ID_TO_BIT[wheelchair]
+    assert masks.red & bit == 0
+    assert masks.green & bit == bit
+    assert masks.unknown & bit == 0
+
+
+def test_evaluate_profile_statuses_all_green():
+    masks = encode_viewpoint_masks(
+        AccessibilityViewpoint(id=vp_id.value, name=VIEWPOINT_NAME, value="green")
+        for vp_id in AccessibilityViewpointID
+    )
+    assert evaluate_profile_statuses(masks) == [ProfileStatus.ALL_GREEN] * len(PROFILES)
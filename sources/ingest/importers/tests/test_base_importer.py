@@ -1,9 +1,17 @@
+import asyncio
+import time
 from dataclasses import dataclass
 
 import elastic_transport
 import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
 
-from ingest.importers.base import Importer
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers.base import get_mapping_errors, Importer, ImportValidationError
+from ingest.locks import IMPORTER_LOCKS_INDEX, ImporterLock, LockPolicy
+from ingest.management.commands.ingest_data import Command
+from ingest.metrics import IMPORTER_METRICS_INDEX
 
 
 @dataclass
@@ -63,3 +71,315 @@ def test_importer_wip_results(snapshot, es, has_old_data):
 
     importer = WipTestImporter()
     importer.base_run()
+
+
+class SomeBulkImporter(Importer[SomeData]):
+    index_base_names = ("test",)
+
+    def __init__(self, document_count, mapping=None):
+        super().__init__()
+        self.document_count = document_count
+        self.mapping = mapping
+
+    def run(self):
+        if self.mapping:
+            self.apply_mapping(self.mapping)
+        self.add_data_bulk(
+            [SomeData(foo=f"document {i}") for i in range(self.document_count)]
+        )
+
+
+def test_validation_fails_on_document_count_drop(fake_elasticsearch):
+    es = get_elasticsearch_client()
+    SomeBulkImporter(document_count=100).base_run()
+    SomeBulkImporter(document_count=90).base_run()
+
+    with pytest.raises(ImportValidationError, match="test has 80 documents, 90"):
+        SomeBulkImporter(document_count=80).base_run()
+
+    assert set(es.indices.get_alias(name="test")) == {"test_2"}
+    assert es.count(index="test")["count"] == 90
+
+
+def test_validation_fails_on_bulk_errors(fake_elasticsearch, mocker):
+    mocker.patch(
+        "ingest.importers.base.elasticsearch_bulk", side_effect=ConnectionError
+    )
+
+    with pytest.raises(ImportValidationError, match="10 of 10 bulk documents"):
+        SomeBulkImporter(document_count=10).base_run()
+
+
+def test_add_data_stream_reports_failed_documents(fake_elasticsearch, mocker):
+    failed_item = {
+        "index": {
+            "_index": "test_1",
+            "_id": "2",
+            "status": 400,
+            "error": {"type": "mapper_parsing_exception", "reason": "bad foo"},
+        }
+    }
+    bulk = mocker.patch(
+        "ingest.importers.base.elasticsearch_bulk", return_value=(1, [failed_item])
+    )
+    log_error = mocker.patch("ingest.importers.base.logger.error")
+    importer = SomeImporter()
+    importer._initialize()
+
+    indexed = importer.add_data_stream(
+        ((str(i), SomeData(foo=f"document {i}")) for i in range(4)), chunk_size=2
+    )
+
+    assert indexed == 2
+    assert bulk.call_count == 2
+    [first_action, _] = bulk.call_args_list[0].args[1]
+    assert first_action == {
+        "_index": "test_wip",
+        "_id": "0",
+        "_source": {"foo": "document 0"},
+    }
+    assert importer.stats.bulk.errors == 2
+    assert importer.stats.documents_indexed == 2
+    log_error.assert_called_with(
+        "Bulk index of document 2 into test_wip failed with status 400: "
+        "mapper_parsing_exception: bad foo"
+    )
+
+
+def test_get_mapping_errors():
+    expected = {
+        "properties": {
+            "location": {"type": "geo_point"},
+            "venue": {
+                "properties": {
+                    "eventCount": {"type": "long"},
+                    "openingHours": {
+                        "properties": {"openRanges": {"type": "date_range"}}
+                    },
+                }
+            },
+        }
+    }
+    assert get_mapping_errors(expected, expected) == []
+    assert get_mapping_errors(
+        expected,
+        {
+            "properties": {
+                "location": {"type": "float"},
+                "venue": {
+                    "properties": {
+                        "eventCount": {"type": "long"},
+                        "name": {"type": "text"},
+                    }
+                },
+            }
+        },
+    ) == [
+        "field location has type float, expected geo_point",
+        "field venue.openingHours is missing",
+    ]
+
+
+def test_applied_mapping_is_validated(fake_elasticsearch):
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+    start = time.time()
+    SomeBulkImporter(document_count=10, mapping=mapping).base_run()
+    mappings = get_elasticsearch_client().indices.get_mapping(index="test_1")["test_1"][
+        "mappings"
+    ]
+    assert mappings["properties"] == mapping["properties"]
+    # The completion time of the import is stored for the index health checks
+    assert start <= mappings["_meta"]["import_completed_at"] <= time.time()
+
+
+def test_keep_previous_index_and_rollback(fake_elasticsearch, settings):
+    settings.IMPORT_KEEP_PREVIOUS_INDEX = True
+    es = get_elasticsearch_client()
+    SomeBulkImporter(document_count=10).base_run()
+    with pytest.raises(CommandError, match="Previous index test_2 of test not found"):
+        call_command("ingest_data", "--rollback", "test")
+
+    SomeBulkImporter(document_count=20).base_run()
+    assert set(es.indices.get(index="test_*")) == {"test_1", "test_2"}
+    assert set(es.indices.get_alias(name="test")) == {"test_2"}
+
+    call_command("ingest_data", "--rollback", "test")
+    assert set(es.indices.get_alias(name="test")) == {"test_1"}
+    assert es.count(index="test")["count"] == 10
+
+    # The rolled back import is kept, so the rollback can be undone
+    call_command("ingest_data", "--rollback", "test")
+    assert set(es.indices.get_alias(name="test")) == {"test_2"}
+    assert es.count(index="test")["count"] == 20
+
+
+def test_ingest_data_holds_run_lock(fake_elasticsearch):
+    es = get_elasticsearch_client()
+
+    class LockCheckingImporter(SomeImporter):
+        def run(self):
+            assert ImporterLock(es, "test").get_owner()
+            super().run()
+
+    stats = Command().handle_import(
+        {"test": LockCheckingImporter}, True, lock_policy=LockPolicy.FAIL
+    )
+    assert "lock" in stats["test"]["stages"]
+    assert ImporterLock(es, "test").get_owner() is None
+
+
+@pytest.mark.parametrize("policy", [LockPolicy.SKIP, LockPolicy.FAIL])
+def test_ingest_data_with_held_run_lock(fake_elasticsearch, policy):
+    es = get_elasticsearch_client()
+    holder = ImporterLock(es, "test")
+    holder.acquire()
+    try:
+        if policy == LockPolicy.SKIP:
+            assert (
+                Command().handle_import(
+                    {"test": SomeImporter}, True, lock_policy=policy
+                )
+                == {}
+            )
+            metrics = es.get(index=IMPORTER_METRICS_INDEX, id="test")["_source"]
+            assert metrics["lock_skips_total"] == 1
+        else:
+            with pytest.raises(CommandError, match="Lock test is held"):
+                Command().handle_import(
+                    {"test": SomeImporter}, True, lock_policy=policy
+                )
+    finally:
+        holder.release()
+    assert not es.indices.exists(index="test_1")
+
+
+def test_ingest_data_with_lost_run_lock(fake_elasticsearch):
+    es = get_elasticsearch_client()
+    SomeImporter().base_run()
+
+    class LockLosingImporter(SomeImporter):
+        def run(self):
+            super().run()
+            # Another run takes over the lock, e.g. after its heartbeats have failed
+            es.index(
+                index=IMPORTER_LOCKS_INDEX,
+                id="test",
+                document={"owner": "other", "expires_at": time.time() + 60},
+                refresh=True,
+            )
+
+    with pytest.raises(CommandError, match="Lost lock test to other"):
+        Command().handle_import(
+            {"test": LockLosingImporter}, True, lock_policy=LockPolicy.FAIL
+        )
+    # The import is not swapped active
+    assert set(es.indices.get_alias(name="test")) == {"test_1"}
+    metrics = es.get(index=IMPORTER_METRICS_INDEX, id="test")["_source"]
+    assert metrics["last_run_success"] is False
+
+
+def test_add_data_stream_async(fake_elasticsearch, mocker, monkeypatch):
+    bulk_async = Importer._bulk_async
+    in_flight = max_in_flight = 0
+
+    async def count_in_flight(importer, *args):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            return await bulk_async(importer, *args)
+        finally:
+            in_flight -= 1
+
+    mocker.patch.object(Importer, "_bulk_async", count_in_flight)
+    monkeypatch.setattr(fake_elasticsearch, "latency_seconds", 0.01)
+    importer = SomeImporter()
+    importer._initialize()
+
+    indexed = asyncio.run(
+        importer.add_data_stream_async(
+            ((str(i), SomeData(foo=f"document {i}")) for i in range(9)),
+            chunk_size=2,
+            max_in_flight=2,
+        )
+    )
+
+    assert indexed == 9
+    assert max_in_flight == 2
+    assert importer.stats.bulk.requests == 5
+    es = get_elasticsearch_client()
+    es.indices.refresh(index="test_wip")
+    assert es.count(index="test_wip")["count"] == 9
+
+
+def test_add_data_stream_async_reports_failed_documents(fake_elasticsearch, mocker):
+    failed_item = {"index": {"_id": "1", "status": 400, "error": {}}}
+
+    async def bulk(es, actions, **kwargs):
+        for action in actions:
+            yield action["_id"] != "1", failed_item
+
+    mocker.patch("ingest.importers.base.async_streaming_bulk", bulk)
+    importer = SomeImporter()
+    importer._initialize()
+    documents = [(str(i), SomeData(foo=f"document {i}")) for i in range(4)]
+
+    assert asyncio.run(importer.add_data_stream_async(documents, chunk_size=2)) == 3
+    assert importer.stats.bulk.errors == 1
+
+    mocker.patch(
+        "ingest.importers.base.async_streaming_bulk", side_effect=ConnectionError
+    )
+    with pytest.raises(ConnectionError):
+        asyncio.run(importer.add_data_stream_async(documents, chunk_size=2))
+
+
+def test_partial_update_yields_to_run_lock(fake_elasticsearch):
+    es = get_elasticsearch_client()
+
+    class PartiallyUpdatedImporter(SomeImporter):
+        partial_updates = ("counts",)
+
+        def update_counts(self):
+            raise AssertionError("The partial update must not run.")
+
+    holder = ImporterLock(es, "test")
+    holder.acquire()
+    try:
+        assert (
+            Command().handle_import(
+                {"test": PartiallyUpdatedImporter},
+                True,
+                only="counts",
+                lock_policy=LockPolicy.SKIP,
+            )
+            == {}
+        )
+    finally:
+        holder.release()
+
+
+@pytest.mark.parametrize("policy", [LockPolicy.SKIP, LockPolicy.FAIL])
+def test_rollback_with_held_run_lock(fake_elasticsearch, settings, policy):
+    settings.IMPORT_KEEP_PREVIOUS_INDEX = True
+    es = get_elasticsearch_client()
+    SomeBulkImporter(document_count=10).base_run()
+    SomeBulkImporter(document_count=20).base_run()
+
+    holder = ImporterLock(es, "test")
+    holder.acquire()
+    try:
+        if policy == LockPolicy.SKIP:
+            call_command("ingest_data", "--rollback", "test", "--lock-policy", "skip")
+        else:
+            with pytest.raises(CommandError, match="Lock test is held"):
+                call_command(
+                    "ingest_data", "--rollback", "test", "--lock-policy", "fail"
+                )
+    finally:
+        holder.release()
+    assert set(es.indices.get_alias(name="test")) == {"test_2"}
+
+    call_command("ingest_data", "--rollback", "test", "--lock-policy", "fail")
+    assert set(es.indices.get_alias(name="test")) == {"test_1"}
+    assert ImporterLock(es, "test").get_owner() is None
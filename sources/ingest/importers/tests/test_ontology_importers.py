@@ -0,0 +1,51 @@
+import pytest
+
+from common.elasticsearch import get_elasticsearch_client
+from ingest.importers import OntologyTreeImporter, OntologyWordImporter
+from ingest.importers.tests.mocks import ontology_tree, ontology_words
+
+
+def get_documents(index: str) -> dict:
+    es = get_elasticsearch_client()
+    es.indices.refresh(index=index)
+    return {
+        hit["_id"]: hit["_source"]
+        for hit in es.search(index=index, size=10000)["hits"]["hits"]
+    }
+
+
+@pytest.fixture
+def bulk_chunk_size(mocker):
+    mocker.patch("ingest.importers.base.BULK_CHUNK_SIZE", 100)
+    return 100
+
+
+def test_ontology_word_importer(
+    fake_elasticsearch, mocked_ontology_trees, mocked_ontology_words, bulk_chunk_size
+):
+    importer = OntologyWordImporter()
+    importer.base_run()
+
+    documents = get_documents("ontology_word")
+    assert set(documents) == {str(word["id"]) for word in ontology_words}
+    assert (
+        documents[str(ontology_words[0]["id"])]["name"]["fi"]
+        == (ontology_words[0]["ontologyword_fi"])
+    )
+    assert importer.stats.documents_indexed == len(ontology_words)
+    assert importer.stats.bulk.requests == -(-len(ontology_words) // bulk_chunk_size)
+    assert "index" not in fake_elasticsearch.stats.requests
+
+
+def test_ontology_tree_importer(
+    fake_elasticsearch, mocked_ontology_trees, mocked_ontology_words, bulk_chunk_size
+):
+    importer = OntologyTreeImporter()
+    importer.base_run()
+
+    documents = get_documents("ontology_tree")
+    assert set(documents) == {str(node["id"]) for node in ontology_tree}
+    child = next(node for node in ontology_tree if node.get("parent_id"))
+    assert documents[str(child["id"])]["ancestorIds"][0] == child["parent_id"]
+    assert importer.stats.documents_indexed == len(ontology_tree)
+    assert importer.stats.bulk.requests == -(-len(ontology_tree) // bulk_chunk_size)
@@ -4,7 +4,7 @@ from .administrative_division import (
 )
 from .language import LanguageStringConverter
 from .ontology import Ontology
-from .opening_hours import HaukiOpeningHoursFetcher, OpeningHours
+from .opening_hours import HAUKI_SERVICE, HaukiOpeningHoursFetcher, OpeningHours
 from .shared import LanguageString
 from .traffic import request_json
 
@@ -13,6 +13,7 @@ __all__ = [
     "Ontology",
     "OpeningHours",
     "HaukiOpeningHoursFetcher",
+    "HAUKI_SERVICE",
     "LanguageString",
     "request_json",
     "AdministrativeDivision",
@@ -6,11 +6,19 @@ from django.core.management import call_command
 from django.db import transaction
 from munigeo.models import AdministrativeDivision as AdministrativeDivisionModel
 
-from .retry import retry_twice_5s_intervals
+from .retry import RetryPolicy
 from .shared import LanguageString
 
 DIVISION_TYPES = ("neighborhood", "district", "sub_district", "muni")
 
+# The geo_import command's errors are not classified, so all of them are retried
+GEO_IMPORT_RETRY_POLICY = RetryPolicy(
+    max_attempts=3,
+    base_delay_seconds=5.0,
+    deadline_seconds=300.0,
+    is_retryable=lambda error: True,
+)
+
 
 @dataclass
 class AdministrativeDivision:
@@ -29,12 +37,17 @@ def geo_import_helsinki_divisions():
 
 
 class AdministrativeDivisionFetcher:
-    def __init__(self):
-        with transaction.atomic():
-            # NOTE: Not sure whether retry really works here, it depends on
-            #       whether the command raises an exception that propagates here!
-            retry_twice_5s_intervals(geo_import_finnish_municipalities)
-            retry_twice_5s_intervals(geo_import_helsinki_divisions)
+    def __init__(self, import_divisions=True):
+        """
+        :param import_divisions: Import the administrative divisions to the database
+            first. Can be skipped when they have been imported already.
+        """
+        if import_divisions:
+            with transaction.atomic():
+                # NOTE: Not sure whether retry really works here, it depends on
+                #       whether the command raises an exception that propagates here!
+                GEO_IMPORT_RETRY_POLICY.call(geo_import_finnish_municipalities)
+                GEO_IMPORT_RETRY_POLICY.call(geo_import_helsinki_divisions)
 
         self.administrative_divisions_qs = AdministrativeDivisionModel.objects.filter(
             type__type__in=DIVISION_TYPES
@@ -0,0 +1,123 @@
+"""
+Async counterpart of request_json(), for fetching the sources' pages and batches
+concurrently under one event loop instead of one thread per request.
+
+The requests are made with httpx, but their errors are raised as the corresponding
+requests exceptions (requests.Timeout, requests.ConnectionError and
+requests.HTTPError), so that the retry policies, the host limiters' circuit breakers
+and the optional enrichments handle them the same as the errors of request_json().
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+from ingest.importers.utils.host_limiter import get_host_limiter
+from ingest.importers.utils.instrumentation import get_current_import_stats
+from ingest.importers.utils.retry import HTTP_RETRY_POLICY
+from ingest.importers.utils.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSourceClient:
+    """
+    HTTP client of the sources sharing one connection pool, with the requests to a
+    host limited by the host's HostLimiter: at most its max_concurrent_requests are
+    in flight at a time, the rest waiting for their turn in the event loop.
+
+    Usage:
+
+    async with AsyncSourceClient() as client:
+        units, services = await asyncio.gather(
+            client.request_json(units_url), client.request_json(services_url)
+        )
+
+    :param transport: httpx transport of the requests, e.g. httpx.MockTransport in
+        tests.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncSourceClient":
+        # Redirects are followed like requests does
+        self._client = httpx.AsyncClient(
+            transport=self._transport, follow_redirects=True
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+        self._client = None
+
+    async def request_json(self, url: str, timeout_seconds=20):
+        """
+        Async variant of request_json(): request a JSON response from the given URL
+        with the given timeout, retried with HTTP_RETRY_POLICY and limited by the URL
+        host's HostLimiter.
+
+        :return: JSON response from the URL if successful,
+                 otherwise raises an exception.
+        :raise: Exception if the request fails after retries.
+        :raise CircuitOpenError: If the host's circuit breaker is open.
+        """
+        logger.debug(f"Requesting URL {url}")
+
+        host = urlparse(url).hostname
+        limiter = get_host_limiter(host)
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(limiter.max_concurrent_requests)
+        semaphore = self._semaphores[host]
+
+        async def fetch_response() -> httpx.Response:
+            async with limiter.async_request(semaphore):
+                start = time.perf_counter()
+                try:
+                    response = await self._get(url, timeout_seconds)
+                finally:
+                    if stats := get_current_import_stats():
+                        stats.record_http_request(host, time.perf_counter() - start)
+                raise_for_status(response)
+                return response
+
+        try:
+            with trace_span(
+                "http.request_json", f"GET {host}", **{"url.host": host}
+            ) as span:
+                response = await HTTP_RETRY_POLICY.call_async(fetch_response)
+                span.set_data("http.response.body.size", len(response.content))
+                data = response.json()
+                if isinstance(data, list):
+                    span.set_data("items", len(data))
+                return data
+        except Exception as e:
+            logger.error(f"Error while requesting {url}: {e}")
+            raise
+
+    async def _get(self, url: str, timeout_seconds: float) -> httpx.Response:
+        """:raise: The httpx errors as the corresponding requests exceptions."""
+        try:
+            return await self._client.get(url, timeout=timeout_seconds)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+
+def raise_for_status(response: httpx.Response) -> None:
+    """
+    Same as requests' Response.raise_for_status(), the error's response being the
+    httpx response.
+    """
+    if response.is_error:
+        raise requests.HTTPError(
+            f"{response.status_code} error for url: {response.url}", response=response
+        )
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _write_atomically(path: Path, content: bytes) -> None:
+    """
+    Write the file via a temporary file, so that a run dying mid-write never leaves
+    a truncated checkpoint behind.
+    """
+    temporary_path = path.with_name(f"{path.name}.tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class ImportCheckpoint:
+    """
+    Checkpoint of an import into a wip index, for resuming the import after the run
+    has died, e.g. because of running out of memory or the pod being evicted.
+
+    The checkpoint consists of the base data snapshot, i.e. the data fetched from the
+    data sources before indexing anything, and the offset of the data successfully
+    indexed so far. They are stored as files named after the wip index in
+    settings.IMPORT_CHECKPOINT_DIR, which needs to outlive the run, e.g. be a
+    persistent volume, for the checkpoint to be of use.
+
+    The base data snapshot is pickled, so it can contain any Python objects, but it
+    must only be read by the same version of the importer that wrote it.
+    """
+
+    def __init__(self, index: str, directory: Optional[str] = None):
+        self.index = index
+        self.directory = Path(directory or settings.IMPORT_CHECKPOINT_DIR)
+        self.base_data_path = self.directory / f"{index}.base_data.pickle"
+        self.progress_path = self.directory / f"{index}.progress.json"
+
+    def exists(self) -> bool:
+        return self.base_data_path.exists()
+
+    def save_base_data(self, base_data: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomically(
+            self.base_data_path,
+            pickle.dumps(base_data, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+        logger.debug(f"Saved base data checkpoint of {self.index}")
+
+    def load_base_data(self) -> Any:
+        with open(self.base_data_path, "rb") as file:
+            return pickle.load(file)
+
+    def save_offset(self, offset: int) -> None:
+        _write_atomically(
+            self.progress_path, json.dumps({"offset": offset}).encode("utf-8")
+        )
+
+    def load_offset(self) -> int:
+        """:return: The offset saved last, or 0 if nothing has been indexed yet."""
+        try:
+            with open(self.progress_path) as file:
+                return json.load(file)["offset"]
+        except FileNotFoundError:
+            return 0
+
+    def delete(self) -> None:
+        for path in self.base_data_path, self.progress_path:
+            path.unlink(missing_ok=True)
+
+
+class SourceSnapshot:
+    """
+    The data last fetched successfully from an optional data source, for importing
+    with it when the source fails, see LocationImporter._fetch_optional_base_data().
+
+    Stored pickled with its fetch time as a file named after the source in
+    settings.IMPORT_SOURCE_SNAPSHOT_DIR, which needs to outlive the runs.
+    """
+
+    def __init__(self, source: str, directory: Optional[str] = None):
+        self.source = source
+        self.directory = Path(directory or settings.IMPORT_SOURCE_SNAPSHOT_DIR)
+        self.path = self.directory / f"{source}.snapshot.pickle"
+
+    def save(self, data: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomically(
+            self.path,
+            pickle.dumps(
+                {"fetched_at": time.time(), "data": data},
+                protocol=pickle.HIGHEST_PROTOCOL,
+            ),
+        )
+
+    def load(self, max_age_seconds: float) -> Optional[Tuple[Any, float]]:
+        """
+        :return: The data and its age in seconds, or None if there is no snapshot
+            younger than max_age_seconds.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                snapshot = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable snapshot of {self.source}: {e}")
+            return None
+        age_seconds = time.time() - snapshot["fetched_at"]
+        if age_seconds > max_age_seconds:
+            return None
+        return snapshot["data"], age_seconds
@@ -0,0 +1,251 @@
+"""
+Per host limits of the importers' upstream requests, see request_json().
+
+Every upstream host, e.g. www.hel.fi or hauki.api.hel.fi, has a process wide
+HostLimiter limiting the concurrent requests and the request rate (a token bucket)
+to the host, so that the concurrent fetches do not overload it. Its circuit breaker
+opens after consecutive failures of the host (see is_retryable_error), failing the
+requests to it fast with CircuitOpenError instead of letting each of them wait for a
+timeout. After a while the breaker lets a trial request through, closing again if it
+succeeds.
+
+The async requests (see AsyncSourceClient) share the limiter's rate limit and circuit
+breaker with the threads' requests, but limit their concurrency per event loop.
+
+CircuitOpenError is a RequestException, so that the optional enrichments handling
+the failed requests, e.g. HaukiOpeningHoursFetcher, degrade without them.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from django.conf import settings
+from requests import RequestException
+
+from ingest.importers.utils.instrumentation import get_current_import_stats
+from ingest.importers.utils.retry import is_retryable_error
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RequestException):
+    """Raised instead of requesting a host whose circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing requests_per_second on average, in bursts of at most
+    requests_per_second requests (but at least one).
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.rate = requests_per_second
+        self.capacity = max(requests_per_second, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """:return: 0 if a token was taken, otherwise the time until there is one."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting for one if there are none.
+
+        :return: The time waited in seconds.
+        """
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while delay := self._take():
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    async def acquire_async(self) -> float:
+        """Async variant of acquire(), waiting without blocking the event loop."""
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while delay := self._take():
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. When open, only one trial
+    request at a time is let through once reset_seconds have passed since the last
+    failure.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_request(self) -> None:
+        """:raise CircuitOpenError: If the request is not let through."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if (
+                not self._trial_in_progress
+                and time.monotonic() - self.opened_at >= self.reset_seconds
+            ):
+                self._trial_in_progress = True
+                logger.info(f"Circuit breaker of {self.name} lets a trial request in")
+                return
+        if stats := get_current_import_stats():
+            stats.increment("circuit_breaker_rejections")
+        raise CircuitOpenError(f"Circuit breaker of {self.name} is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit breaker of {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.opened_at is None and self.failures < self.failure_threshold:
+                return
+            if self.opened_at is None:
+                logger.error(
+                    f"Circuit breaker of {self.name} opened after {self.failures} "
+                    "consecutive failures"
+                )
+                if stats := get_current_import_stats():
+                    stats.increment("circuit_breaker_opened")
+            self.opened_at = time.monotonic()
+
+
+class HostLimiter:
+    """
+    Concurrency and rate limits and the circuit breaker of the requests to a host.
+
+    Usage:
+
+    with get_host_limiter("www.hel.fi").request():
+        response = requests.get("https://www.hel.fi/...")
+        response.raise_for_status()
+    """
+
+    def __init__(
+        self,
+        host: str,
+        max_concurrent_requests: int,
+        requests_per_second: float,
+        failure_threshold: int,
+        reset_seconds: float,
+    ):
+        self.host = host
+        self.max_concurrent_requests = max_concurrent_requests
+        self.semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+        self.token_bucket = TokenBucket(requests_per_second)
+        self.circuit_breaker = CircuitBreaker(host, failure_threshold, reset_seconds)
+
+    @classmethod
+    def from_settings(cls, host: str) -> "HostLimiter":
+        limits = {
+            "max_concurrent_requests": settings.UPSTREAM_MAX_CONCURRENT_REQUESTS,
+            "requests_per_second": settings.UPSTREAM_REQUESTS_PER_SECOND,
+            "failure_threshold": settings.UPSTREAM_CIRCUIT_FAILURE_THRESHOLD,
+            "reset_seconds": settings.UPSTREAM_CIRCUIT_RESET_SECONDS,
+            **settings.UPSTREAM_HOST_LIMITS.get(host, {}),
+        }
+        return cls(host, **limits)
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        """
+        Limit the request made in the block, recording its outcome to the circuit
+        breaker: the temporary errors (see is_retryable_error) count as failures of
+        the host, anything else as a success.
+
+        :raise CircuitOpenError: If the circuit breaker is open.
+        """
+        self.circuit_breaker.before_request()
+        with self.semaphore:
+            self._record_rate_limit_wait(self.token_bucket.acquire())
+            try:
+                yield
+            except Exception as e:
+                self._record_failure(e)
+                raise
+            self.circuit_breaker.record_success()
+
+    @asynccontextmanager
+    async def async_request(self, semaphore: asyncio.Semaphore) -> AsyncIterator[None]:
+        """
+        Async variant of request(). The threads' semaphore would block the event
+        loop, so the concurrency is limited by the given semaphore of the event loop
+        instead, see AsyncSourceClient.
+
+        :raise CircuitOpenError: If the circuit breaker is open.
+        """
+        self.circuit_breaker.before_request()
+        async with semaphore:
+            self._record_rate_limit_wait(await self.token_bucket.acquire_async())
+            try:
+                yield
+            except Exception as e:
+                self._record_failure(e)
+                raise
+            self.circuit_breaker.record_success()
+
+    @staticmethod
+    def _record_rate_limit_wait(waited: float) -> None:
+        if waited and (stats := get_current_import_stats()):
+            stats.add_stage_timing("rate_limit_wait", waited)
+
+    def _record_failure(self, error: Exception) -> None:
+        if is_retryable_error(error):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+
+_host_limiters: Dict[str, HostLimiter] = {}
+_host_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(host: str) -> HostLimiter:
+    """:return: The process wide limiter of the host, created on first use."""
+    with _host_limiters_lock:
+        if host not in _host_limiters:
+            _host_limiters[host] = HostLimiter.from_settings(host)
+        return _host_limiters[host]
+
+
+def reset_host_limiters() -> None:
+    """Forget the limiters and their state, e.g. after changing the settings."""
+    with _host_limiters_lock:
+        _host_limiters.clear()
@@ -0,0 +1,222 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the latency histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# The ImportStats of the currently running importer, if any. Used for recording
+# things that happen deep down the call stack, e.g. retries, without passing the
+# stats object around.
+_current_import_stats: ContextVar[Optional["ImportStats"]] = ContextVar(
+    "current_import_stats", default=None
+)
+
+
+@dataclass
+class StageTiming:
+    """Accumulated wall clock timing of a named stage."""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+@dataclass
+class LatencyHistogram:
+    """
+    Latency histogram with LATENCY_BUCKETS buckets. bucket_counts[i] is the count of
+    observations in bucket i (i.e. not cumulative), the last one being +Inf.
+    """
+
+    count: int = 0
+    sum_seconds: float = 0.0
+    bucket_counts: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum_seconds += seconds
+        self.bucket_counts[
+            next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound),
+                len(LATENCY_BUCKETS),
+            )
+        ] += 1
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        return LatencyHistogram(
+            count=self.count + other.count,
+            sum_seconds=self.sum_seconds + other.sum_seconds,
+            bucket_counts=[
+                a + b for a, b in zip(self.bucket_counts, other.bucket_counts)
+            ],
+        )
+
+
+@dataclass
+class BulkStats:
+    """Accumulated statistics of Elasticsearch bulk requests."""
+
+    requests: int = 0
+    documents: int = 0
+    bytes: int = 0
+    errors: int = 0
+    timing: StageTiming = field(default_factory=StageTiming)
+
+
+@dataclass
+class ImportStats:
+    """
+    Stage level timing and throughput statistics of a single importer run.
+
+    Usage:
+
+    stats = ImportStats("location")
+    with stats.activate():
+        with stats.stage("fetch.tpr_units"):
+            units = fetch_tpr_units()
+        stats.record_bulk(documents=100, size_bytes=12345, seconds=0.5)
+    logger.info(stats.as_json())
+    """
+
+    importer: str
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    stages: Dict[str, StageTiming] = field(default_factory=dict)
+    bulk: BulkStats = field(default_factory=BulkStats)
+    retries: Dict[str, int] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    # Upstream HTTP request latencies by host
+    http_requests: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the wrapped block and add the timing to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_timing(name, time.perf_counter() - start)
+
+    def add_stage_timing(self, name: str, seconds: float) -> None:
+        self.stages.setdefault(name, StageTiming()).add(seconds)
+
+    def record_bulk(
+        self, documents: int, size_bytes: int, seconds: float, errors: int = 0
+    ) -> None:
+        self.bulk.requests += 1
+        self.bulk.documents += documents
+        self.bulk.bytes += size_bytes
+        self.bulk.errors += errors
+        self.bulk.timing.add(seconds)
+
+    def record_http_request(self, host: str, seconds: float) -> None:
+        self.http_requests.setdefault(host, LatencyHistogram()).observe(seconds)
+
+    def record_retry(self, name: str, delay_seconds: float = 0.0) -> None:
+        """Count a retry of the named call, timing its delay as stage retry_wait."""
+        self.retries[name] = self.retries.get(name, 0) + 1
+        self.add_stage_timing("retry_wait", delay_seconds)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+
+    @property
+    def duration_seconds(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def documents_indexed(self) -> int:
+        """Count of documents successfully sent to Elasticsearch."""
+        return (
+            self.counters.get("documents", 0) + self.bulk.documents - self.bulk.errors
+        )
+
+    @contextmanager
+    def activate(self) -> Iterator["ImportStats"]:
+        """Make these stats the current ones, see get_current_import_stats()."""
+        token = _current_import_stats.set(self)
+        try:
+            yield self
+        finally:
+            _current_import_stats.reset(token)
+
+    def summary(self) -> dict:
+        """
+        :return: A JSON serializable summary of the statistics.
+        """
+        bulk = asdict(self.bulk)
+        bulk["documents_per_second"] = (
+            self.bulk.documents / self.bulk.timing.total_seconds
+            if self.bulk.timing.total_seconds
+            else 0.0
+        )
+        return {
+            "importer": self.importer,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "stages": {
+                name: {**asdict(timing), "avg_seconds": timing.avg_seconds}
+                for name, timing in self.stages.items()
+            },
+            "bulk": bulk,
+            "documents_indexed": self.documents_indexed,
+            "retries": dict(self.retries),
+            "counters": dict(self.counters),
+            "http_requests": {
+                host: asdict(histogram)
+                for host, histogram in self.http_requests.items()
+            },
+        }
+
+    def as_json(self) -> str:
+        return json.dumps(self.summary())
+
+    def log_summary(self) -> None:
+        """Log the summary as one log line per stage plus a totals line."""
+        for name, timing in sorted(
+            self.stages.items(), key=lambda item: -item[1].total_seconds
+        ):
+            logger.info(
+                f"[{self.importer}] stage {name}: {timing.total_seconds:.3f} s total, "
+                f"{timing.count} calls, avg {timing.avg_seconds:.4f} s, "
+                f"max {timing.max_seconds:.3f} s"
+            )
+        logger.info(
+            f"[{self.importer}] bulk: {self.bulk.requests} requests, "
+            f"{self.bulk.documents} documents, {self.bulk.bytes} bytes, "
+            f"{self.bulk.errors} errors, {self.bulk.timing.total_seconds:.3f} s total"
+        )
+        if self.retries:
+            logger.info(f"[{self.importer}] retries: {self.retries}")
+        logger.info(
+            f"[{self.importer}] finished in {self.duration_seconds:.3f} s",
+            extra={"import_stats": self.summary()},
+        )
+
+
+def get_current_import_stats() -> Optional[ImportStats]:
+    """
+    :return: The ImportStats of the currently running importer, or None if no
+        importer is running.
+    """
+    return _current_import_stats.get()
@@ -0,0 +1,91 @@
+"""
+Interval algebra on half-open intervals [start, end).
+
+Intervals are (start, end) tuples of any mutually comparable values, e.g. datetimes.
+The operations accept intervals in any order, overlapping each other or not, and
+return them normalized, i.e. sorted, with overlapping and adjacent intervals
+coalesced and empty intervals (start >= end) dropped. Every operation sorts its
+inputs once and then sweeps through them, so it takes O(n log n) time.
+"""
+
+from typing import Any, Iterable, List, Tuple
+
+Interval = Tuple[Any, Any]
+
+
+def normalize(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Sort the intervals and coalesce overlapping and adjacent ones.
+
+    >>> normalize([(5, 7), (1, 3), (2, 4), (4, 5), (8, 8)])
+    [(1, 7)]
+    """
+    result: List[Interval] = []
+    for start, end in sorted(
+        interval for interval in intervals if interval[0] < interval[1]
+    ):
+        if result and start <= result[-1][1]:
+            if end > result[-1][1]:
+                result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def union(*interval_lists: Iterable[Interval]) -> List[Interval]:
+    """
+    >>> union([(1, 3)], [(2, 4), (6, 7)])
+    [(1, 4), (6, 7)]
+    """
+    return normalize(interval for intervals in interval_lists for interval in intervals)
+
+
+def intersection(
+    intervals: Iterable[Interval], other_intervals: Iterable[Interval]
+) -> List[Interval]:
+    """
+    >>> intersection([(1, 5), (7, 9)], [(4, 8)])
+    [(4, 5), (7, 8)]
+    """
+    a, b = normalize(intervals), normalize(other_intervals)
+    result: List[Interval] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start < end:
+            result.append((start, end))
+        # Advance whichever ends first, the other one may still overlap the next
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def difference(
+    minuend: Iterable[Interval], subtrahend: Iterable[Interval]
+) -> List[Interval]:
+    """
+    Subtract intervals from intervals.
+
+    >>> difference([(2, 8)], [(2, 3), (5, 6)])
+    [(3, 5), (6, 8)]
+    """
+    a, b = normalize(minuend), normalize(subtrahend)
+    result: List[Interval] = []
+    j = 0
+    for start, end in a:
+        # Skip the subtrahends ending before this interval. They can't overlap the
+        # following intervals either, as those start even later.
+        while j < len(b) and b[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] < end and start < end:
+            if b[k][0] > start:
+                result.append((start, b[k][0]))
+            start = max(start, b[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
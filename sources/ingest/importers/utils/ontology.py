@@ -1,5 +1,7 @@
+import asyncio
 from typing import List
 
+from .async_traffic import AsyncSourceClient
 from .traffic import request_json
 
 
@@ -15,25 +17,42 @@ class Ontology:
     local cache and use it to enrich given ID's.
     """
 
-    def __init__(self):
-        self.ontology_tree = self._get_ontology_tree_ids()
-        self.ontology_word = self._get_ontology_word_ids()
+    ontology_tree_endpoint = "https://www.hel.fi/palvelukarttaws/rest/v4/ontologytree/"
+    ontology_word_endpoint = "https://www.hel.fi/palvelukarttaws/rest/v4/ontologyword/"
+
+    def __init__(self, ontology_tree=None, ontology_word=None):
+        """
+        :param ontology_tree: The ontology tree fetched already, fetched if not given.
+        :param ontology_word: The ontology words fetched already, fetched if not
+            given.
+        """
+        if ontology_tree is None:
+            ontology_tree = self._get_ontology_tree_ids()
+        if ontology_word is None:
+            ontology_word = self._get_ontology_word_ids()
+        self.ontology_tree = ontology_tree
+        self.ontology_word = ontology_word
+        self._tree_elems_by_id = {e["id"]: e for e in self.ontology_tree}
+
+    @classmethod
+    async def fetch_async(cls, client: AsyncSourceClient) -> "Ontology":
+        """Fetch the ontology tree and words concurrently with the async client."""
+        ontology_tree, ontology_word = await asyncio.gather(
+            client.request_json(cls.ontology_tree_endpoint),
+            client.request_json(cls.ontology_word_endpoint),
+        )
+        return cls(ontology_tree, ontology_word)
 
     def _get_ontology_tree_ids(self):
-        url = "https://www.hel.fi/palvelukarttaws/rest/v4/ontologytree/"
-        data = request_json(url)
+        data = request_json(self.ontology_tree_endpoint)
         return data
 
     def _get_ontology_word_ids(self):
-        url = "https://www.hel.fi/palvelukarttaws/rest/v4/ontologyword/"
-        data = request_json(url)
+        data = request_json(self.ontology_word_endpoint)
         return data
 
     def _get_tree_elem(self, _id):
-        for e in self.ontology_tree:
-            if e["id"] == _id:
-                return e
-        return None
+        return self._tree_elems_by_id.get(_id)
 
     def _get_tree(self, _id, hits=None):
         """Get parents recursively."""
@@ -1,26 +1,33 @@
+import asyncio
 import logging
-from copy import copy
 from dataclasses import dataclass, field
 from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 from zoneinfo import ZoneInfo
 
-from django.utils.timezone import localdate, make_aware
+from django.conf import settings
+from django.utils.timezone import localdate, now
 from humps import camelize
 from requests import RequestException
+from sentry_sdk.tracing import Span
 
+from . import intervals
+from .async_traffic import AsyncSourceClient
+from .instrumentation import get_current_import_stats
 from .shared import LinkedData
+from .tracing import trace_span
 from .traffic import request_json
 
 DEFAULT_BATCH_SIZE = 100
-# TODO make configurable
-HAUKI_BASE_URL = "https://hauki.api.hel.fi/v1/"
-NUMBER_OF_DAYS_TO_FETCH = 7
+# LinkedData service of the Hauki links
+HAUKI_SERVICE = "hauki"
 DEFAULT_TIME_ZONE = "Europe/Helsinki"
+TIME_ZONE = ZoneInfo(DEFAULT_TIME_ZONE)
 
-HAUKI_RESOURCE_URL = HAUKI_BASE_URL + "resource/tprek:{venue_id}/"
-HAUKI_OPENING_HOURS_URL = HAUKI_BASE_URL + "opening_hours/"
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
 
 logger = logging.getLogger(__name__)
 
@@ -46,12 +53,38 @@ class OpeningHoursTimesRange:
     lt: str
 
 
+@dataclass
+class MinuteOfWeekRange:
+    """Minutes from Monday 00:00 local time."""
+
+    gte: int
+    lt: int
+
+
 @dataclass
 class OpeningHours:
+    """
+    Venue opening hours for the fetched period.
+
+    Besides the open datetime ranges, the open times are given as compact fields
+    derived from them:
+
+    - weeklyRanges: The open times of the first week of the period folded onto a week,
+      as minute of week ranges. Open at a minute of week, if a range contains it.
+    - weeklyHours: The hours of week open at least partly, the hour n being from
+      Monday 00:00 + n hours to the next hour, for term queries and aggregations.
+    - nextOpen, nextClose: The start and the end of the current or the next open
+      range at the import time, i.e. open at a time between them.
+    """
+
     url: str
     is_open_now_url: str
     data: List[OpeningHoursDay] = field(default_factory=list)
     openRanges: List[OpeningHoursTimesRange] = field(default_factory=list)
+    weeklyRanges: List[MinuteOfWeekRange] = field(default_factory=list)
+    weeklyHours: List[int] = field(default_factory=list)
+    nextOpen: Optional[str] = None
+    nextClose: Optional[str] = None
 
 
 @dataclass
@@ -71,6 +104,36 @@ RawHours = List[dict]
 RawHoursById = Dict[str, RawHours]
 
 
+# The same dates, times and keys repeat over and over again in the opening hours of
+# different venues, so parse each of them only once.
+
+
+@lru_cache(maxsize=1024)
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+@lru_cache(maxsize=4096)
+def parse_time(value: str) -> time:
+    return datetime.strptime(value, "%H:%M:%S").time()
+
+
+@lru_cache(maxsize=1024)
+def _camelize_key(key: str) -> str:
+    return camelize(key)
+
+
+def camelize_raw_hours(data):
+    """Same as humps.camelize(data) for JSON data, with the keys memoized."""
+    if isinstance(data, dict):
+        return {
+            _camelize_key(key): camelize_raw_hours(value) for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [camelize_raw_hours(item) for item in data]
+    return data
+
+
 class HaukiOpeningHoursFetcher:
     """Fetches venue opening hours from Hauki in batches.
 
@@ -99,16 +162,34 @@ class HaukiOpeningHoursFetcher:
         self,
         all_venue_ids: Iterable[Union[str, int]],
         batch_size: int = DEFAULT_BATCH_SIZE,
+        base_url: Optional[str] = None,
+        days_to_fetch: Optional[int] = None,
+        current_time: Optional[datetime] = None,
     ) -> None:
+        """
+        :param all_venue_ids: IDs of all the venues to fetch the opening hours for.
+        :param batch_size: Number of venues to fetch at a time.
+        :param base_url: Hauki API base URL, settings.HAUKI_BASE_URL by default.
+        :param days_to_fetch: Number of days to fetch the opening hours for,
+            settings.HAUKI_DAYS_TO_FETCH by default.
+        :param current_time: Time the opening hours are fetched from, now by default.
+        """
         self.batch_size = batch_size
         self.all_venue_ids: Tuple[str] = tuple(str(i) for i in all_venue_ids)
         self.data: RawHoursById = {}
+        # All the venues' data fetched ahead with prefetch_async()
+        self.prefetched_data: RawHoursById = {}
+        self.base_url = base_url or settings.HAUKI_BASE_URL
+        self.days_to_fetch = (
+            settings.HAUKI_DAYS_TO_FETCH if days_to_fetch is None else days_to_fetch
+        )
+        self.current_time = current_time or now()
 
     def get_opening_hours_and_link(
         self, venue_id: Union[str, int]
     ) -> Tuple[OpeningHours, Optional[LinkedData]]:
         venue_id = str(venue_id)
-        hauki_resource_url = HAUKI_RESOURCE_URL.format(venue_id=venue_id)
+        hauki_resource_url = f"{self.base_url}resource/tprek:{venue_id}/"
 
         opening_hours = OpeningHours(
             url=f"{hauki_resource_url}opening_hours/",
@@ -118,12 +199,18 @@ class HaukiOpeningHoursFetcher:
         try:
             data = self.get_opening_hours_for_venue(venue_id)
         except RequestException:
+            if stats := get_current_import_stats():
+                stats.increment("degraded.opening_hours")
             return opening_hours, None
 
-        opening_hours.openRanges = self.get_open_ranges(data)
-        opening_hours.data = camelize(data)
+        open_ranges = self.get_open_datetime_ranges(data)
+        opening_hours.openRanges = [
+            r.as_opening_hours_times_range() for r in open_ranges
+        ]
+        self.set_derived_fields(opening_hours, open_ranges)
+        opening_hours.data = camelize_raw_hours(data)
         opening_hours_link = LinkedData(
-            service="hauki",
+            service=HAUKI_SERVICE,
             origin_url=opening_hours.url,
             raw_data=data,
         )
@@ -131,6 +218,8 @@ class HaukiOpeningHoursFetcher:
         return opening_hours, opening_hours_link
 
     def get_opening_hours_for_venue(self, venue_id: str) -> RawHours:
+        if venue_id in self.prefetched_data:
+            return self.prefetched_data[venue_id]
         if venue_id not in self.data:
             self.data = self.fetch_next_batch(venue_id)
         return self.data[venue_id]
@@ -149,35 +238,102 @@ class HaukiOpeningHoursFetcher:
         return self.fetch(ids_to_fetch)
 
     def fetch(self, ids: Sequence[str]) -> RawHoursById:
-        today = localdate()
-        end_date = today + timedelta(days=NUMBER_OF_DAYS_TO_FETCH)
+        url = self.get_batch_url(ids)
+        logger.info("Fetching opening hours from Hauki...")
+        with self._trace_batch(url, ids) as span:
+            result = self.get_batch_result(request_json(url), ids, span)
+        logger.info(f"Fetched {len(result)} units' opening hours from Hauki.")
+        return result
+
+    async def fetch_async(
+        self, client: AsyncSourceClient, ids: Sequence[str]
+    ) -> RawHoursById:
+        """Async variant of fetch(), requesting the batch with the async client."""
+        url = self.get_batch_url(ids)
+        with self._trace_batch(url, ids) as span:
+            response = await client.request_json(url)
+            return self.get_batch_result(response, ids, span)
+
+    async def prefetch_async(
+        self, client: AsyncSourceClient, venue_ids: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Fetch the opening hours of the venues in batches concurrently with the async
+        client, the concurrency bounded by the client, so that
+        get_opening_hours_and_link() finds them without fetching. The venues of the
+        batches that fail are fetched again on demand, or degraded.
+
+        :param venue_ids: IDs of the venues to fetch, all the venues by default.
+        """
+        if venue_ids is None:
+            venue_ids = self.all_venue_ids
+        venue_ids = tuple(str(i) for i in venue_ids)
+        batches = [
+            venue_ids[start : start + self.batch_size]
+            for start in range(0, len(venue_ids), self.batch_size)
+        ]
+        logger.info(f"Prefetching opening hours from Hauki in {len(batches)} batches")
+        results = await asyncio.gather(
+            *(self.fetch_async(client, batch) for batch in batches),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, RequestException):
+                logger.warning(f"Could not prefetch opening hours batch: {result!r}")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self.prefetched_data.update(result)
+        logger.info(
+            f"Prefetched {len(self.prefetched_data)} units' opening hours from Hauki."
+        )
+
+    def get_batch_url(self, ids: Sequence[str]) -> str:
+        today = localdate(self.current_time)
+        end_date = today + timedelta(days=self.days_to_fetch)
         prefixed_ids = (f"tprek:{i}" for i in ids)
         params = {
             "start_date": today,
             "end_date": end_date,
             "resource": ",".join(prefixed_ids),
         }
-        url = f"{HAUKI_OPENING_HOURS_URL}?{urlencode(params)}"
-        logger.info("Fetching opening hours from Hauki...")
-        response = request_json(url)
+        return f"{self.base_url}opening_hours/?{urlencode(params)}"
 
+    @staticmethod
+    def _trace_batch(url: str, ids: Sequence[str]):
+        return trace_span(
+            "http.hauki",
+            "Hauki opening hours batch",
+            venues=len(ids),
+            **{"url.host": urlparse(url).hostname},
+        )
+
+    def get_batch_result(
+        self, response: dict, ids: Sequence[str], span: Span
+    ) -> RawHoursById:
         result_map = {}
         for result in response["results"]:
             origin_id = self.get_tprek_origin_id(result)
             if origin_id:
                 result_map[origin_id] = result["opening_hours"]
-
-        logger.info(f"Fetched {len(result_map)} units' opening hours from Hauki.")
+        span.set_data("results", len(result_map))
         return {i: result_map.get(i, []) for i in ids}
 
     def get_open_ranges(self, data: RawHours) -> List[OpeningHoursTimesRange]:
         """Get datetime ranges when the venue is open."""
+        return [
+            r.as_opening_hours_times_range()
+            for r in self.get_open_datetime_ranges(data)
+        ]
+
+    def get_open_datetime_ranges(self, data: RawHours) -> List[DateTimeRange]:
+        """Get datetime ranges when the venue is open, sorted and coalesced."""
 
         open_ranges: List[DateTimeRange] = []
         closed_ranges: List[DateTimeRange] = []
 
         for day_data in data:
-            day = datetime.date(datetime.strptime(day_data["date"], "%Y-%m-%d"))
+            day = parse_date(day_data["date"])
 
             for time_data in day_data["times"]:
                 # Skip other states than "open" and "closed" at least for now
@@ -220,9 +376,64 @@ class HaukiOpeningHoursFetcher:
                 )
 
         # Override times when open by times when closed
-        open_ranges = self.datetime_range_list_difference(open_ranges, closed_ranges)
+        return self.datetime_range_list_difference(open_ranges, closed_ranges)
+
+    def set_derived_fields(
+        self, opening_hours: OpeningHours, open_ranges: List[DateTimeRange]
+    ) -> None:
+        """Set the fields derived from the open ranges, see OpeningHours."""
+        weekly_ranges = self.get_weekly_ranges(open_ranges)
+        opening_hours.weeklyRanges = [
+            MinuteOfWeekRange(gte=start, lt=end) for start, end in weekly_ranges
+        ]
+        opening_hours.weeklyHours = self.get_weekly_hours(weekly_ranges)
+
+        next_open_range = next(
+            (r for r in open_ranges if r.end > self.current_time), None
+        )
+        if next_open_range:
+            opening_hours.nextOpen = next_open_range.start.isoformat()
+            opening_hours.nextClose = next_open_range.end.isoformat()
+
+    def get_weekly_ranges(
+        self, open_ranges: List[DateTimeRange]
+    ) -> List[intervals.Interval]:
+        """
+        Fold the open ranges of the week starting today onto a week, as minute of
+        week ranges.
+        """
+        today = localdate(self.current_time, TIME_ZONE)
+        # Minutes from Monday 00:00 to today 00:00
+        offset = today.weekday() * MINUTES_PER_DAY
+
+        weekly_ranges = []
+        for open_range in open_ranges:
+            start = max(self.get_minutes_from(today, open_range.start), 0)
+            end = min(self.get_minutes_from(today, open_range.end), MINUTES_PER_WEEK)
+            if start >= end:
+                continue
+            start, end = start + offset, end + offset
+            if start >= MINUTES_PER_WEEK:
+                start, end = start - MINUTES_PER_WEEK, end - MINUTES_PER_WEEK
+            weekly_ranges.append((start, min(end, MINUTES_PER_WEEK)))
+            # Ranges over Sunday midnight continue from the beginning of the week
+            if end > MINUTES_PER_WEEK:
+                weekly_ranges.append((0, end - MINUTES_PER_WEEK))
+
+        return intervals.normalize(weekly_ranges)
+
+    @staticmethod
+    def get_weekly_hours(weekly_ranges: List[intervals.Interval]) -> List[int]:
+        hours = set()
+        for start, end in weekly_ranges:
+            hours.update(range(start // 60, (end - 1) // 60 + 1))
+        return sorted(hours)
 
-        return [r.as_opening_hours_times_range() for r in open_ranges]
+    @staticmethod
+    def get_minutes_from(day: date, dt: datetime) -> int:
+        """Get wall clock minutes from the beginning of the day to the datetime."""
+        dt = dt.astimezone(TIME_ZONE)
+        return (dt.date() - day).days * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
 
     @staticmethod
     def get_tprek_origin_id(data: dict) -> Optional[str]:
@@ -237,64 +448,30 @@ class HaukiOpeningHoursFetcher:
 
     @staticmethod
     def get_datetime_from_date_and_time(day, dt):
-        return make_aware(
-            datetime.combine(day, datetime.strptime(dt, "%H:%M:%S").time()),
-            timezone=ZoneInfo(DEFAULT_TIME_ZONE),
-        )
+        return datetime.combine(day, parse_time(dt), tzinfo=TIME_ZONE)
 
     @staticmethod
     def datetime_range_list_difference(
         minuend_ranges: List[DateTimeRange],
         subtrahend_ranges: List[DateTimeRange],
     ) -> List[DateTimeRange]:
-        """Subtract a datetime range list from a datetime range list."""
-
-        # Loop over the subtrahend ranges and subtract each of them from all of the
-        # minuend ranges. NOTE: the minuend ranges list is (possibly) updated between
-        # subtrahend ranges.
-        for subtrahend_range in subtrahend_ranges:
-            minuend_ranges = sum(
-                (
-                    HaukiOpeningHoursFetcher.datetime_range_difference(
-                        minuend_range, subtrahend_range
-                    )
-                    for minuend_range in minuend_ranges
-                ),
-                [],
+        """
+        Subtract a datetime range list from a datetime range list. The result is
+        sorted and overlapping or adjacent ranges are coalesced.
+        """
+        return [
+            DateTimeRange(start=start, end=end)
+            for start, end in intervals.difference(
+                ((r.start, r.end) for r in minuend_ranges),
+                ((r.start, r.end) for r in subtrahend_ranges),
             )
-        return minuend_ranges
+        ]
 
     @staticmethod
     def datetime_range_difference(
         minuend: DateTimeRange, subtrahend: DateTimeRange
     ) -> List[DateTimeRange]:
         """Subtract a datetime range from a datetime range."""
-
-        if subtrahend.start <= minuend.start and subtrahend.end >= minuend.end:
-            # subtrahend covers minuend completely
-            #  mmmm
-            # ssssss
-            return []
-        elif subtrahend.end <= minuend.start or subtrahend.start >= minuend.end:
-            # subtrahend completely outside minuend
-            # mmmmmm
-            #        ssssss
-            return [copy(minuend)]
-        elif subtrahend.start > minuend.start and subtrahend.end < minuend.end:
-            # subtrahend in the middle of minuend, the result is two ranges
-            # mmmmmm
-            #  ssss
-            return [
-                DateTimeRange(start=minuend.start, end=subtrahend.start),
-                DateTimeRange(start=subtrahend.end, end=minuend.end),
-            ]
-        else:
-            # here we have only two possibilities left
-            if subtrahend.start <= minuend.start:
-                #    mmmmmm
-                # ssssss
-                return [DateTimeRange(start=subtrahend.end, end=minuend.end)]
-            else:
-                # mmmmmm
-                #    ssssss
-                return [DateTimeRange(start=minuend.start, end=subtrahend.start)]
+        return HaukiOpeningHoursFetcher.datetime_range_list_difference(
+            [minuend], [subtrahend]
+        )
@@ -1,24 +1,174 @@
+"""
+Retry policies of the importers' calls to the data sources.
+
+A RetryPolicy retries only the errors worth retrying (see is_retryable_error), with
+exponential backoff and random jitter between the attempts, and within an overall
+deadline. Rate limited responses are retried no sooner than their Retry-After header
+asks for.
+
+The policies do not nest: an error that has already been retried by an inner policy,
+e.g. the one of request_json(), is not retried again by an outer policy, e.g. the one
+wrapping the whole base data fetch, which would multiply the attempts and the waiting.
+"""
+
+import asyncio
+import logging
+import random
 import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+
+from ingest.importers.utils.instrumentation import get_current_import_stats
+
+logger = logging.getLogger(__name__)
+
+# Exception attribute marking the errors handled by a policy already
+_HANDLED_ATTRIBUTE = "_handled_by_retry_policy"
 
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
 
-def retry_twice_5s_intervals(callable, *args, **kwargs):
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    :return: Whether the error is temporary, i.e. a timeout, a connection error, or
+        a rate limited or server error response.
     """
-    Retry given callable (e.g. function or class) with given arguments
-    twice with 5s intervals (i.e. max. 3 tries = max. 2 retries)
-    if it raises an exception, otherwise return first successful result.
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
 
-    :return: The first successful result is returned
-             (i.e. the value of `callable(*args, **kwargs)`),
-             or the last exception is raised if all attempts fail.
 
-    :param callable: The callable to be retried.
-    :param args: Positional arguments to pass to the callable.
-    :param kwargs: Keyword arguments to pass to the callable.
+def get_retry_after_seconds(error: BaseException) -> Optional[float]:
     """
-    for nth_attempt in 1, 2, 3:
-        try:
-            return callable(*args, **kwargs)
-        except Exception as e:
-            if nth_attempt == 3:
-                raise e
-            time.sleep(5)  # Wait in seconds
+    :return: The seconds to wait before retrying according to the Retry-After header
+        of the error's response, if any.
+    """
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How to retry a failing call, see the module docstring.
+
+    The delay before the nth retry is a random value between 0 and
+    min(max_delay_seconds, base_delay_seconds * 2 ** (n - 1)) (so called full
+    jitter), or the response's Retry-After if that is longer. No retry is made that
+    would start after deadline_seconds from the first attempt.
+
+    Usage:
+
+    policy = RetryPolicy(max_attempts=4, deadline_seconds=60)
+    data = policy.call(fetch_data, url)
+    """
+
+    max_attempts: int = 3
+    base_delay_seconds: float = 1.0
+    max_delay_seconds: float = 30.0
+    deadline_seconds: float = 60.0
+    jitter: bool = True
+    is_retryable: Callable[[BaseException], bool] = is_retryable_error
+
+    def get_delay_seconds(self, retry: int, error: BaseException) -> float:
+        """:param retry: Number of the retry, starting from 1."""
+        delay = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (retry - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return max(delay, get_retry_after_seconds(error) or 0.0)
+
+    def call(self, callable, *args, **kwargs):
+        """
+        Call the callable with the arguments, retrying it as defined by the policy.
+
+        :return: The first successful result.
+        :raise: The last error, if the attempts run out or it is not retryable.
+        """
+        name = getattr(callable, "__qualname__", repr(callable))
+        start = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return callable(*args, **kwargs)
+            except Exception as e:
+                delay = self._get_retry_delay(attempt, start, e)
+                if delay is None:
+                    setattr(e, _HANDLED_ATTRIBUTE, True)
+                    raise
+                self._record_retry(name, attempt, delay, e)
+                time.sleep(delay)
+
+    async def call_async(self, coroutine_function, *args, **kwargs):
+        """
+        Async variant of call(), awaiting the coroutine function's result and
+        waiting between the attempts without blocking the event loop.
+        """
+        name = getattr(coroutine_function, "__qualname__", repr(coroutine_function))
+        start = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await coroutine_function(*args, **kwargs)
+            except Exception as e:
+                delay = self._get_retry_delay(attempt, start, e)
+                if delay is None:
+                    setattr(e, _HANDLED_ATTRIBUTE, True)
+                    raise
+                self._record_retry(name, attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    def _record_retry(
+        self, name: str, attempt: int, delay: float, error: Exception
+    ) -> None:
+        logger.warning(
+            f"{name} failed on attempt {attempt}/{self.max_attempts}, "
+            f"retrying in {delay:.1f} s: {error!r}"
+        )
+        if stats := get_current_import_stats():
+            stats.record_retry(name, delay)
+
+    def _get_retry_delay(
+        self, attempt: int, start: float, error: Exception
+    ) -> Optional[float]:
+        """:return: The delay before retrying the failed attempt, or None to give up."""
+        if getattr(error, _HANDLED_ATTRIBUTE, False) or not self.is_retryable(error):
+            return None
+        exhausted = attempt == self.max_attempts
+        if not exhausted:
+            delay = self.get_delay_seconds(attempt, error)
+            exhausted = time.monotonic() - start + delay > self.deadline_seconds
+        if exhausted:
+            if stats := get_current_import_stats():
+                stats.increment("retries_exhausted")
+            return None
+        return delay
+
+
+# Upstream HTTP requests, see request_json()
+HTTP_RETRY_POLICY = RetryPolicy(
+    max_attempts=4,
+    base_delay_seconds=1.0,
+    max_delay_seconds=20.0,
+    deadline_seconds=60.0,
+)
+
+# Whole base data fetches, retrying the errors not retried by the requests' policy
+BASE_DATA_RETRY_POLICY = RetryPolicy(
+    max_attempts=3,
+    base_delay_seconds=5.0,
+    max_delay_seconds=30.0,
+    deadline_seconds=120.0,
+)
@@ -0,0 +1,265 @@
+"""
+Sharded imports, i.e. importing the data with multiple processes in parallel.
+
+Every shard of an import is a separate importer run, e.g. `ingest_data location
+--shard 1/4`. Shard 0 is the coordinator: it fetches the base data, creates the wip
+index and publishes the base data snapshot (see ImportCheckpoint) for the other
+shards, the workers, to index their slices of the data from. Once all the shards
+have reported their completion, the coordinator swaps the wip index active.
+
+The shards coordinate through a state file guarded by a file lock in
+settings.IMPORT_CHECKPOINT_DIR, so they need to run on the same host or share the
+directory e.g. as a volume.
+"""
+
+import fcntl
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, TypeVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How often the shards poll the coordination state while waiting
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class ShardError(Exception):
+    """Raised when a sharded import cannot be coordinated or one of its shards fails."""
+
+
+@dataclass(frozen=True)
+class Shard:
+    """The index-th of count shards, numbered from 0."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """
+        >>> Shard.parse("1/4")
+        Shard(index=1, count=4)
+        """
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard {value!r}, expected e.g. '0/4'.")
+        if not 0 <= index < count:
+            raise ValueError(f"Invalid shard {value!r}, expected 0 <= i < N in i/N.")
+        return cls(index=index, count=count)
+
+    @property
+    def is_coordinator(self) -> bool:
+        return self.index == 0
+
+    def get_slice(self, items: Sequence[T]) -> Sequence[T]:
+        """
+        The shard's contiguous slice of the items. The slices of all the shards are
+        disjoint and cover all the items.
+
+        >>> [Shard(index, 3).get_slice(list(range(7))) for index in range(3)]
+        [[0, 1], [2, 3], [4, 5, 6]]
+        """
+        start = len(items) * self.index // self.count
+        end = len(items) * (self.index + 1) // self.count
+        return items[start:end]
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+class ShardCoordination:
+    """
+    Coordination state of a sharded import, shared by its shards through a file.
+
+    The state consists of the run ID, the start time of the run, the shard count,
+    the published wip index, the shards reported completed or failed, and the bulk
+    document and error counts reported by the completed shards. The run ID
+    makes the reports of the shards that joined an earlier, interrupted run to be
+    ignored. The workers only join a run that has no failures and was started at
+    most settings.IMPORT_SHARD_JOIN_WINDOW_SECONDS before the worker, so that they
+    never join the run of a coordinator that failed or was killed. The workers
+    waiting for the publication fail as soon as the coordinator reports failing.
+
+    :param name: Name of the import, e.g. the index base name.
+    :param shard: The shard this process runs.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shard: Shard,
+        directory: Optional[str] = None,
+        poll_interval_seconds: Optional[float] = None,
+    ):
+        self.shard = shard
+        self.directory = Path(directory or settings.IMPORT_CHECKPOINT_DIR)
+        self.state_path = self.directory / f"{name}.shards.json"
+        self.lock_path = self.directory / f"{name}.shards.lock"
+        self.poll_interval_seconds = poll_interval_seconds or POLL_INTERVAL_SECONDS
+        self.run_id: Optional[str] = None
+        self.wip_index: Optional[str] = None
+        # Start time of the process's shard, for joining only the current run
+        self.started_at = time.time()
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[dict]:
+        """Read the state while holding the lock, writing back the changes to it."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(self.state_path.read_text())
+                except (FileNotFoundError, json.JSONDecodeError):
+                    state = {}
+                original_state = dict(state)
+                yield state
+                if state != original_state:
+                    self.state_path.write_text(json.dumps(state))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _wait(self, description: str, timeout_seconds: float, condition) -> None:
+        """Poll the state until condition(state) is true."""
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            with self._locked_state() as state:
+                if condition(state):
+                    return
+            if time.monotonic() > deadline:
+                raise ShardError(
+                    f"Shard {self.shard} timed out after {timeout_seconds} s waiting "
+                    f"for {description}."
+                )
+            time.sleep(self.poll_interval_seconds)
+
+    def start(self) -> None:
+        """Start a new run, discarding any earlier run's state. Coordinator only."""
+        self.run_id = uuid.uuid4().hex
+        with self._locked_state() as state:
+            state.clear()
+            state.update(
+                run_id=self.run_id,
+                started_at=time.time(),
+                shard_count=self.shard.count,
+                wip_index=None,
+                completed=[],
+                failed=[],
+                bulk={},
+            )
+
+    def publish(self, wip_index: str) -> None:
+        """Let the workers start indexing into the wip index. Coordinator only."""
+        with self._locked_state() as state:
+            if state.get("run_id") != self.run_id:
+                raise ShardError(f"Sharded import run {self.run_id} was taken over.")
+            state["wip_index"] = wip_index
+        logger.info(f"Published wip index {wip_index} to {self.shard.count} shards")
+
+    def wait_for_publication(self, timeout_seconds: float) -> str:
+        """
+        Wait for the coordinator to publish the wip index and join its run. Workers
+        only.
+
+        :return: The wip index.
+        :raise ShardError: If the coordinator fails while waiting, or on timeout.
+        """
+
+        def is_published(state: dict) -> bool:
+            # The coordinator of the run the worker is waiting for has failed
+            if 0 in state.get("failed", []) and (
+                state.get("failed_at", 0) >= self.started_at
+            ):
+                raise ShardError(
+                    f"The coordinator of sharded import run {state['run_id']} failed."
+                )
+            if (
+                state.get("wip_index")
+                and state["shard_count"] == self.shard.count
+                and not state["failed"]
+                and state["started_at"]
+                >= self.started_at - settings.IMPORT_SHARD_JOIN_WINDOW_SECONDS
+            ):
+                self.run_id = state["run_id"]
+                self.wip_index = state["wip_index"]
+                return True
+            return False
+
+        self._wait(
+            "the coordinator to publish the wip index", timeout_seconds, is_published
+        )
+        logger.info(f"Shard {self.shard} joined the import into {self.wip_index}")
+        return self.wip_index
+
+    def report(
+        self, success: bool, bulk_documents: int = 0, bulk_errors: int = 0
+    ) -> None:
+        """
+        Report the completion or failure of the shard's part of the import. The
+        failure of the coordinator ends the run, i.e. no more workers join it.
+
+        :param bulk_documents: Documents the shard sent in bulk requests.
+        :param bulk_errors: Documents of the shard's bulk requests that failed.
+        """
+        with self._locked_state() as state:
+            if state.get("run_id") != self.run_id:
+                logger.warning(
+                    f"Shard {self.shard} not reported, as its run {self.run_id} has "
+                    "ended already"
+                )
+                return
+            key = "completed" if success else "failed"
+            state[key] = sorted({*state[key], self.shard.index})
+            if success:
+                state["bulk"] = {
+                    **state["bulk"],
+                    str(self.shard.index): {
+                        "documents": bulk_documents,
+                        "errors": bulk_errors,
+                    },
+                }
+            if not success and self.shard.is_coordinator:
+                state["wip_index"] = None
+                state["failed_at"] = time.time()
+
+    def wait_for_completion(self, timeout_seconds: float) -> Dict[str, int]:
+        """
+        Wait for all the shards to complete. Coordinator only.
+
+        :return: The bulk document and error counts of all the shards combined, with
+            keys "documents" and "errors".
+        :raise ShardError: If any of the shards fails, or on timeout.
+        """
+        bulk = {}
+
+        def is_completed(state: dict) -> bool:
+            if state.get("run_id") != self.run_id:
+                raise ShardError(f"Sharded import run {self.run_id} was taken over.")
+            if state["failed"]:
+                raise ShardError(f"Shards {state['failed']} failed.")
+            if len(state["completed"]) < self.shard.count:
+                return False
+            bulk.update(state["bulk"])
+            return True
+
+        self._wait("all the shards to complete", timeout_seconds, is_completed)
+        return {
+            key: sum(counts[key] for counts in bulk.values())
+            for key in ("documents", "errors")
+        }
+
+    def end(self) -> None:
+        """Remove the state of the run. Coordinator only."""
+        with self._locked_state() as state:
+            if state.get("run_id") == self.run_id:
+                self.state_path.unlink(missing_ok=True)
@@ -158,31 +158,60 @@ snapshots['test_opening_hours_fetcher_data opening_hours 1'] = {
         }
     ],
     'is_open_now_url': 'https://hauki.api.hel.fi/v1/resource/tprek:1/is_open_now/',
+    'nextClose': '2021-09-03T18:00:00+03:00',
+    'nextOpen': '2021-09-03T11:00:00+03:00',
     'openRanges': [
         {
             'gte': '2021-09-03T11:00:00+03:00',
             'lt': '2021-09-03T18:00:00+03:00'
         }
     ],
-    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:1/opening_hours/'
+    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:1/opening_hours/',
+    'weeklyHours': [
+        107,
+        108,
+        109,
+        110,
+        111,
+        112,
+        113
+    ],
+    'weeklyRanges': [
+        {
+            'gte': 6420,
+            'lt': 6840
+        }
+    ]
 }
 
 snapshots['test_opening_hours_fetcher_data opening_hours 2'] = {
     'data': [
     ],
     'is_open_now_url': 'https://hauki.api.hel.fi/v1/resource/tprek:2/is_open_now/',
+    'nextClose': None,
+    'nextOpen': None,
     'openRanges': [
     ],
-    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:2/opening_hours/'
+    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:2/opening_hours/',
+    'weeklyHours': [
+    ],
+    'weeklyRanges': [
+    ]
 }
 
 snapshots['test_opening_hours_fetcher_data opening_hours 3'] = {
     'data': [
     ],
     'is_open_now_url': 'https://hauki.api.hel.fi/v1/resource/tprek:3/is_open_now/',
+    'nextClose': None,
+    'nextOpen': None,
     'openRanges': [
     ],
-    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:3/opening_hours/'
+    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:3/opening_hours/',
+    'weeklyHours': [
+    ],
+    'weeklyRanges': [
+    ]
 }
 
 snapshots['test_opening_hours_fetcher_data opening_hours 4'] = {
@@ -274,6 +303,8 @@ snapshots['test_opening_hours_fetcher_data opening_hours 4'] = {
         }
     ],
     'is_open_now_url': 'https://hauki.api.hel.fi/v1/resource/tprek:4/is_open_now/',
+    'nextClose': '2021-09-03T10:00:00+03:00',
+    'nextOpen': '2021-09-03T09:00:00+03:00',
     'openRanges': [
         {
             'gte': '2021-09-03T09:00:00+03:00',
@@ -292,5 +323,75 @@ snapshots['test_opening_hours_fetcher_data opening_hours 4'] = {
             'lt': '2021-09-07T05:00:00+03:00'
         }
     ],
-    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:4/opening_hours/'
+    'url': 'https://hauki.api.hel.fi/v1/resource/tprek:4/opening_hours/',
+    'weeklyHours': [
+        9,
+        10,
+        11,
+        12,
+        13,
+        14,
+        15,
+        16,
+        17,
+        18,
+        19,
+        20,
+        21,
+        22,
+        23,
+        24,
+        25,
+        26,
+        27,
+        28,
+        105,
+        107,
+        108,
+        109,
+        110,
+        111,
+        120,
+        121,
+        122,
+        123,
+        124,
+        125,
+        126,
+        127,
+        128,
+        129,
+        130,
+        131,
+        132,
+        133,
+        134,
+        135,
+        136,
+        137,
+        138,
+        139,
+        140,
+        141,
+        142,
+        143
+    ],
+    'weeklyRanges': [
+        {
+            'gte': 540,
+            'lt': 1740
+        },
+        {
+            'gte': 6300,
+            'lt': 6360
+        },
+        {
+            'gte': 6420,
+            'lt': 6720
+        },
+        {
+            'gte': 7200,
+            'lt': 8640
+        }
+    ]
 }
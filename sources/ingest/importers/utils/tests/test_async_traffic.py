@@ -0,0 +1,120 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import requests
+
+from ingest.importers.utils.async_traffic import AsyncSourceClient
+from ingest.importers.utils.host_limiter import CircuitOpenError, reset_host_limiters
+from ingest.importers.utils.instrumentation import ImportStats
+
+URL = "https://www.hel.fi/palvelukarttaws/rest/v4/unit/"
+
+
+@pytest.fixture(autouse=True)
+def host_limiters():
+    reset_host_limiters()
+    yield
+    reset_host_limiters()
+
+
+@pytest.fixture
+def mock_sleep():
+    with patch("ingest.importers.utils.retry.asyncio.sleep", new=AsyncMock()) as sleep:
+        yield sleep
+
+
+def request_json(handler, *urls):
+    """:return: The JSON responses of the URLs requested concurrently."""
+
+    async def run():
+        async with AsyncSourceClient(transport=httpx.MockTransport(handler)) as client:
+            return await asyncio.gather(*(client.request_json(url) for url in urls))
+
+    return asyncio.run(run())
+
+
+def responses(*responses):
+    """:return: Handler returning the responses one by one."""
+    responses = list(responses)
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler
+
+
+def test_request_json():
+    stats = ImportStats(importer="test")
+    with stats.activate():
+        assert request_json(responses(httpx.Response(200, json=[1, 2])), URL) == [
+            [1, 2]
+        ]
+    assert stats.http_requests["www.hel.fi"].count == 1
+
+
+def test_request_json_retries_temporary_errors(mock_sleep):
+    handler = responses(
+        httpx.ReadTimeout("Timed out"),
+        httpx.ConnectError("Connection refused"),
+        httpx.Response(503),
+        httpx.Response(200, json={"results": []}),
+    )
+    assert request_json(handler, URL) == [{"results": []}]
+    assert mock_sleep.await_count == 3
+
+
+@pytest.mark.parametrize(
+    "response,error",
+    [
+        (httpx.ReadTimeout("Timed out"), requests.Timeout),
+        (httpx.ConnectError("Connection refused"), requests.ConnectionError),
+        (httpx.Response(502), requests.HTTPError),
+    ],
+)
+def test_request_json_raises_requests_exceptions(mock_sleep, response, error):
+    with pytest.raises(error):
+        request_json(lambda request: responses(response)(request), URL)
+    assert mock_sleep.await_count == 3
+
+
+def test_request_json_does_not_retry_client_errors(mock_sleep):
+    with pytest.raises(requests.HTTPError) as e:
+        request_json(responses(httpx.Response(404)), URL)
+    assert e.value.response.status_code == 404
+    assert mock_sleep.await_count == 0
+
+
+def test_request_json_limits_concurrency_per_host(settings):
+    settings.UPSTREAM_HOST_LIMITS = {
+        "www.hel.fi": {"max_concurrent_requests": 2, "requests_per_second": 0}
+    }
+    in_flight = []
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal max_in_flight
+        in_flight.append(request)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(request)
+        return httpx.Response(200, json={"page": request.url.params["page"]})
+
+    urls = [f"{URL}?page={page}" for page in range(6)]
+    assert request_json(handler, *urls) == [{"page": str(page)} for page in range(6)]
+    assert max_in_flight == 2
+
+
+def test_request_json_with_open_circuit_breaker(mock_sleep, settings):
+    """
+    Test the retries of a failing host are rejected fast once its breaker opens
+    """
+    settings.UPSTREAM_CIRCUIT_FAILURE_THRESHOLD = 2
+    handler = MagicMock(return_value=httpx.Response(503))
+    with pytest.raises(CircuitOpenError):
+        request_json(handler, URL)
+    assert handler.call_count == 2
@@ -0,0 +1,36 @@
+from ingest.importers.utils.checkpoint import ImportCheckpoint, SourceSnapshot
+
+
+def test_checkpoint(tmp_path):
+    checkpoint = ImportCheckpoint("location_1", directory=str(tmp_path / "dir"))
+    assert not checkpoint.exists()
+    assert checkpoint.load_offset() == 0
+
+    checkpoint.save_base_data({"tpr_units": [{"id": 1}], "ids": {"1"}})
+    checkpoint.save_offset(100)
+    assert checkpoint.exists()
+    assert checkpoint.load_base_data() == {"tpr_units": [{"id": 1}], "ids": {"1"}}
+    assert checkpoint.load_offset() == 100
+    assert sorted(path.name for path in (tmp_path / "dir").iterdir()) == [
+        "location_1.base_data.pickle",
+        "location_1.progress.json",
+    ]
+
+    checkpoint.delete()
+    assert not checkpoint.exists()
+    assert checkpoint.load_offset() == 0
+    assert list((tmp_path / "dir").iterdir()) == []
+
+
+def test_source_snapshot(tmp_path):
+    snapshot = SourceSnapshot("location.connections", directory=str(tmp_path))
+    assert snapshot.load(max_age_seconds=60) is None
+
+    snapshot.save({"1": ["connection"]})
+    data, age_seconds = snapshot.load(max_age_seconds=60)
+    assert data == {"1": ["connection"]}
+    assert 0 <= age_seconds < 60
+    assert snapshot.load(max_age_seconds=-1) is None
+
+    snapshot.path.write_bytes(b"truncated")
+    assert snapshot.load(max_age_seconds=60) is None
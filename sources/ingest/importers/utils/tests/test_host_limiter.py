@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from ingest.importers.utils.host_limiter import (
+    CircuitBreaker,
+    CircuitOpenError,
+    get_host_limiter,
+    HostLimiter,
+    reset_host_limiters,
+    TokenBucket,
+)
+from ingest.importers.utils.instrumentation import ImportStats
+from ingest.importers.utils.traffic import request_json
+
+
+@pytest.fixture(autouse=True)
+def host_limiters():
+    reset_host_limiters()
+    yield
+    reset_host_limiters()
+
+
+def make_limiter(**kwargs) -> HostLimiter:
+    limits = {
+        "max_concurrent_requests": 2,
+        "requests_per_second": 0,
+        "failure_threshold": 2,
+        "reset_seconds": 30,
+        **kwargs,
+    }
+    return HostLimiter("www.hel.fi", **limits)
+
+
+def request(limiter: HostLimiter, error=None):
+    with limiter.request():
+        if error:
+            raise error
+
+
+def test_token_bucket_waits_for_tokens():
+    with (
+        patch("ingest.importers.utils.host_limiter.time.monotonic", return_value=0),
+        patch("ingest.importers.utils.host_limiter.time.sleep") as sleep,
+    ):
+        bucket = TokenBucket(requests_per_second=2)
+        assert [bucket.acquire() for _ in range(2)] == [0, 0]
+        # The clock does not advance, so the wait never ends without a token
+        sleep.side_effect = lambda seconds: setattr(bucket, "tokens", 1)
+        assert bucket.acquire() == 0.5
+    sleep.assert_called_once_with(0.5)
+
+
+def test_token_bucket_refills_over_time():
+    with patch(
+        "ingest.importers.utils.host_limiter.time.monotonic",
+        side_effect=[0, 0, 10],
+    ):
+        bucket = TokenBucket(requests_per_second=1)
+        assert bucket.acquire() == 0
+        assert bucket.tokens == 0
+        assert bucket.acquire() == 0
+        assert bucket.tokens == 0
+
+
+def test_circuit_breaker_opens_and_lets_trial_request_in():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30)
+    stats = ImportStats(importer="test")
+    with (
+        patch(
+            "ingest.importers.utils.host_limiter.time.monotonic", return_value=0
+        ) as monotonic,
+        stats.activate(),
+    ):
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+        monotonic.return_value = 30
+        breaker.before_request()  # The trial request
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+        monotonic.return_value = 60
+        breaker.before_request()
+        breaker.record_success()
+        assert not breaker.is_open
+        breaker.before_request()
+
+    assert stats.counters == {
+        "circuit_breaker_opened": 1,
+        "circuit_breaker_rejections": 3,
+    }
+
+
+def test_host_limiter_counts_only_temporary_errors_as_failures():
+    limiter = make_limiter()
+    for error in [requests.Timeout(), ValueError(), requests.ConnectionError()]:
+        with pytest.raises(type(error)):
+            request(limiter, error)
+    assert not limiter.circuit_breaker.is_open
+
+    with pytest.raises(requests.Timeout):
+        request(limiter, requests.Timeout())
+    assert limiter.circuit_breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        request(limiter)
+
+
+def test_host_limiter_from_settings(settings):
+    settings.UPSTREAM_MAX_CONCURRENT_REQUESTS = 3
+    settings.UPSTREAM_HOST_LIMITS = {"hauki.api.hel.fi": {"requests_per_second": 2}}
+    limiter = get_host_limiter("hauki.api.hel.fi")
+    assert get_host_limiter("hauki.api.hel.fi") is limiter
+    assert limiter.token_bucket.rate == 2
+    assert limiter.semaphore._value == 3
+    assert (
+        get_host_limiter("www.hel.fi").token_bucket.rate
+        == settings.UPSTREAM_REQUESTS_PER_SECOND
+    )
+
+
+def test_request_json_fails_fast_with_open_circuit_breaker(settings):
+    settings.UPSTREAM_CIRCUIT_FAILURE_THRESHOLD = 2
+    url = "https://www.hel.fi/palvelukarttaws/rest/v4/unit/"
+    with (
+        patch("ingest.importers.utils.traffic.requests.get") as get,
+        patch("ingest.importers.utils.retry.time.sleep"),
+    ):
+        get.side_effect = requests.Timeout
+        # The breaker opens on the second attempt, failing the third one fast
+        with pytest.raises(CircuitOpenError):
+            request_json(url)
+        assert get.call_count == 2
+
+        get.side_effect = None
+        get.return_value = MagicMock(json=lambda: [])
+        with pytest.raises(CircuitOpenError):
+            request_json(url)
+        assert get.call_count == 2
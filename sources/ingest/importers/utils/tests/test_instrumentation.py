@@ -0,0 +1,85 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from ingest.importers.utils.instrumentation import (
+    get_current_import_stats,
+    ImportStats,
+)
+from ingest.importers.utils.retry import RetryPolicy
+
+
+def test_stage_timings_are_accumulated():
+    stats = ImportStats(importer="test")
+    with patch(
+        "ingest.importers.utils.instrumentation.time.perf_counter",
+        side_effect=[1.0, 1.5, 2.0, 4.0],
+    ):
+        with stats.stage("fetch"):
+            pass
+        with stats.stage("fetch"):
+            pass
+
+    timing = stats.stages["fetch"]
+    assert timing.count == 2
+    assert timing.total_seconds == 2.5
+    assert timing.max_seconds == 2.0
+    assert timing.avg_seconds == 1.25
+
+
+def test_stage_timing_is_recorded_on_exception():
+    stats = ImportStats(importer="test")
+    with pytest.raises(ZeroDivisionError):
+        with stats.stage("broken"):
+            raise ZeroDivisionError
+    assert stats.stages["broken"].count == 1
+
+
+def test_summary_is_json_serializable():
+    stats = ImportStats(importer="test")
+    with stats.stage("transform"):
+        pass
+    stats.record_bulk(documents=100, size_bytes=2048, seconds=0.5, errors=1)
+    stats.record_bulk(documents=50, size_bytes=1024, seconds=0.25)
+    stats.record_retry("fetch_tpr_units")
+    stats.increment("units", 150)
+    stats.finish()
+
+    summary = json.loads(stats.as_json())
+    assert summary["importer"] == "test"
+    assert summary["stages"]["transform"]["count"] == 1
+    assert summary["bulk"]["requests"] == 2
+    assert summary["bulk"]["documents"] == 150
+    assert summary["bulk"]["bytes"] == 3072
+    assert summary["bulk"]["errors"] == 1
+    assert summary["bulk"]["documents_per_second"] == 200.0
+    assert summary["retries"] == {"fetch_tpr_units": 1}
+    assert summary["counters"] == {"units": 150}
+
+
+def test_activate_sets_current_import_stats():
+    stats = ImportStats(importer="test")
+    assert get_current_import_stats() is None
+    with stats.activate():
+        assert get_current_import_stats() is stats
+    assert get_current_import_stats() is None
+
+
+def test_retries_are_recorded_to_current_import_stats():
+    stats = ImportStats(importer="test")
+    try_count = 0
+
+    def fails_once():
+        nonlocal try_count
+        try_count += 1
+        if try_count == 1:
+            raise requests.Timeout
+        return try_count
+
+    with patch("ingest.importers.utils.retry.time.sleep"), stats.activate():
+        assert RetryPolicy(jitter=False).call(fails_once) == 2
+
+    assert stats.retries == {fails_once.__qualname__: 1}
+    assert stats.stages["retry_wait"].total_seconds == 1
@@ -0,0 +1,137 @@
+import datetime
+from copy import copy
+from typing import List, Set
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from ingest.importers.utils.intervals import (
+    difference,
+    intersection,
+    normalize,
+    union,
+)
+from ingest.importers.utils.opening_hours import DateTimeRange, HaukiOpeningHoursFetcher
+
+
+def reference_datetime_range_difference(
+    minuend: DateTimeRange, subtrahend: DateTimeRange
+) -> List[DateTimeRange]:
+    """
+    The original implementation of HaukiOpeningHoursFetcher.datetime_range_difference()
+    to compare against.
+    """
+    if subtrahend.start <= minuend.start and subtrahend.end >= minuend.end:
+        return []
+    elif subtrahend.end <= minuend.start or subtrahend.start >= minuend.end:
+        return [copy(minuend)]
+    elif subtrahend.start > minuend.start and subtrahend.end < minuend.end:
+        return [
+            DateTimeRange(start=minuend.start, end=subtrahend.start),
+            DateTimeRange(start=subtrahend.end, end=minuend.end),
+        ]
+    elif subtrahend.start <= minuend.start:
+        return [DateTimeRange(start=subtrahend.end, end=minuend.end)]
+    else:
+        return [DateTimeRange(start=minuend.start, end=subtrahend.start)]
+
+
+def reference_datetime_range_list_difference(
+    minuend_ranges: List[DateTimeRange], subtrahend_ranges: List[DateTimeRange]
+) -> List[DateTimeRange]:
+    """
+    The original implementation of
+    HaukiOpeningHoursFetcher.datetime_range_list_difference() to compare against.
+    """
+    for subtrahend_range in subtrahend_ranges:
+        minuend_ranges = sum(
+            (
+                reference_datetime_range_difference(minuend_range, subtrahend_range)
+                for minuend_range in minuend_ranges
+            ),
+            [],
+        )
+    return minuend_ranges
+
+
+def points(intervals) -> Set[int]:
+    return {point for start, end in intervals for point in range(start, end)}
+
+
+# Possibly empty and overlapping intervals in any order
+intervals_strategy = st.lists(
+    st.tuples(st.integers(0, 50), st.integers(0, 50)), max_size=10
+)
+
+# Non-empty intervals, as the original implementation did not handle empty ones
+non_empty_intervals_strategy = st.lists(
+    st.tuples(st.integers(0, 50), st.integers(1, 10)).map(
+        lambda start_and_length: (
+            start_and_length[0],
+            start_and_length[0] + start_and_length[1],
+        )
+    ),
+    max_size=10,
+)
+
+
+def to_datetime_ranges(intervals) -> List[DateTimeRange]:
+    base = datetime.datetime(2021, 9, 21, 12, tzinfo=datetime.timezone.utc)
+    return [
+        DateTimeRange(
+            start=base + datetime.timedelta(minutes=start),
+            end=base + datetime.timedelta(minutes=end),
+        )
+        for start, end in intervals
+    ]
+
+
+def to_intervals(datetime_ranges: List[DateTimeRange]):
+    return [(r.start, r.end) for r in datetime_ranges]
+
+
+@given(minuend=non_empty_intervals_strategy, subtrahend=non_empty_intervals_strategy)
+def test_datetime_range_list_difference_matches_reference(minuend, subtrahend):
+    minuend_ranges = to_datetime_ranges(minuend)
+    subtrahend_ranges = to_datetime_ranges(subtrahend)
+
+    expected = reference_datetime_range_list_difference(
+        minuend_ranges, subtrahend_ranges
+    )
+    result = HaukiOpeningHoursFetcher.datetime_range_list_difference(
+        minuend_ranges, subtrahend_ranges
+    )
+
+    # The original implementation neither sorted nor coalesced the ranges
+    assert to_intervals(result) == normalize(to_intervals(expected))
+
+
+@given(intervals=intervals_strategy)
+def test_normalize(intervals):
+    result = normalize(intervals)
+    assert points(result) == points(intervals)
+    assert all(start < end for start, end in result)
+    # Sorted with gaps in between, i.e. nothing left to coalesce
+    assert all(a[1] < b[0] for a, b in zip(result, result[1:]))
+
+
+@given(a=intervals_strategy, b=intervals_strategy)
+def test_union(a, b):
+    assert union(a, b) == normalize(union(a, b))
+    assert points(union(a, b)) == points(a) | points(b)
+
+
+@given(a=intervals_strategy, b=intervals_strategy)
+def test_intersection(a, b):
+    assert intersection(a, b) == normalize(intersection(a, b))
+    assert points(intersection(a, b)) == points(a) & points(b)
+
+
+@given(a=intervals_strategy, b=intervals_strategy)
+def test_difference(a, b):
+    assert difference(a, b) == normalize(difference(a, b))
+    assert points(difference(a, b)) == points(a) - points(b)
+
+
+def test_adjacent_open_ranges_are_coalesced():
+    assert difference([(1, 3), (3, 5), (7, 9)], [(8, 9)]) == [(1, 5), (7, 8)]
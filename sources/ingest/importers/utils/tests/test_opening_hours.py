@@ -2,8 +2,18 @@ import datetime
 from dataclasses import asdict
 
 import pytest
+from humps import camelize
 
-from ingest.importers.utils.opening_hours import DateTimeRange, HaukiOpeningHoursFetcher
+from ingest.importers.utils.opening_hours import (
+    camelize_raw_hours,
+    DateTimeRange,
+    HaukiOpeningHoursFetcher,
+    MinuteOfWeekRange,
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    OpeningHours,
+    TIME_ZONE,
+)
 
 MOCK_RESPONSE = {
     "count": 5,
@@ -148,6 +158,10 @@ MOCK_RESPONSE = {
 }
 
 
+# Friday morning of the first day in MOCK_RESPONSE
+CURRENT_TIME = datetime.datetime(2021, 9, 3, 8, tzinfo=TIME_ZONE)
+
+
 @pytest.fixture()
 def patched_request_json(mocker):
     return mocker.patch(
@@ -157,7 +171,7 @@ def patched_request_json(mocker):
 
 def test_opening_hours_fetcher_data(patched_request_json, snapshot):
     ids = tuple(range(1, 5))
-    fetcher = HaukiOpeningHoursFetcher(ids, batch_size=2)
+    fetcher = HaukiOpeningHoursFetcher(ids, batch_size=2, current_time=CURRENT_TIME)
 
     for i in ids:
         opening_hours, link = fetcher.get_opening_hours_and_link(i)
@@ -243,3 +257,62 @@ def test_datetime_range_list_difference(open_ranges, closed_ranges, expected_res
     )
 
     assert [(r.start.second, r.end.second) for r in result_list] == expected_result
+
+
+def test_camelize_raw_hours():
+    assert camelize_raw_hours(MOCK_RESPONSE) == camelize(MOCK_RESPONSE)
+
+
+def test_opening_hours_fetcher_settings(patched_request_json, settings):
+    settings.HAUKI_BASE_URL = "https://hauki.example.com/v1/"
+    settings.HAUKI_DAYS_TO_FETCH = 14
+    fetcher = HaukiOpeningHoursFetcher([1], current_time=CURRENT_TIME)
+
+    opening_hours, _ = fetcher.get_opening_hours_and_link(1)
+
+    assert opening_hours.url == (
+        "https://hauki.example.com/v1/resource/tprek:1/opening_hours/"
+    )
+    [(url,), _] = patched_request_json.call_args
+    assert url.startswith("https://hauki.example.com/v1/opening_hours/?")
+    assert "start_date=2021-09-03&end_date=2021-09-17&" in url
+
+
+def test_derived_fields():
+    # Saturday 2021-09-04 22:00 - Monday 2021-09-06 02:00 and the next Friday
+    open_ranges = [
+        DateTimeRange(
+            start=datetime.datetime(2021, 9, 4, 22, tzinfo=TIME_ZONE),
+            end=datetime.datetime(2021, 9, 6, 2, tzinfo=TIME_ZONE),
+        ),
+        DateTimeRange(
+            start=datetime.datetime(2021, 9, 10, 10, tzinfo=TIME_ZONE),
+            end=datetime.datetime(2021, 9, 10, 12, tzinfo=TIME_ZONE),
+        ),
+    ]
+    fetcher = HaukiOpeningHoursFetcher([], current_time=CURRENT_TIME)
+    opening_hours = OpeningHours(url="", is_open_now_url="")
+
+    fetcher.set_derived_fields(opening_hours, open_ranges)
+
+    saturday = 5 * MINUTES_PER_DAY
+    friday = 4 * MINUTES_PER_DAY
+    # The next Friday is not in the week starting from the current time
+    assert opening_hours.weeklyRanges == [
+        MinuteOfWeekRange(gte=0, lt=2 * 60),
+        MinuteOfWeekRange(gte=saturday + 22 * 60, lt=MINUTES_PER_WEEK),
+    ]
+    # Open at 0-2 on Monday and from 22 on Saturday to the end of the week
+    assert opening_hours.weeklyHours == [0, 1, *range(5 * 24 + 22, 7 * 24)]
+    assert opening_hours.nextOpen == "2021-09-04T22:00:00+03:00"
+    assert opening_hours.nextClose == "2021-09-06T02:00:00+03:00"
+
+    fetcher.current_time = datetime.datetime(2021, 9, 10, 11, tzinfo=TIME_ZONE)
+    fetcher.set_derived_fields(opening_hours, open_ranges)
+
+    assert opening_hours.weeklyRanges == [
+        MinuteOfWeekRange(gte=friday + 10 * 60, lt=friday + 12 * 60)
+    ]
+    assert opening_hours.weeklyHours == [4 * 24 + 10, 4 * 24 + 11]
+    assert opening_hours.nextOpen == "2021-09-10T10:00:00+03:00"
+    assert opening_hours.nextClose == "2021-09-10T12:00:00+03:00"
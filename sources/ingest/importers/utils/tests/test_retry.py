@@ -1,62 +1,166 @@
-from unittest.mock import patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+import requests
 
-from ingest.importers.utils.retry import retry_twice_5s_intervals
+from ingest.importers.utils.instrumentation import ImportStats
+from ingest.importers.utils.retry import (
+    get_retry_after_seconds,
+    is_retryable_error,
+    RetryPolicy,
+)
 
+POLICY = RetryPolicy(max_attempts=3, base_delay_seconds=2, jitter=False)
 
-def test_retry_twice_5s_intervals_failure():
+
+def http_error(status_code: int, headers=None) -> requests.HTTPError:
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    return requests.HTTPError(f"{status_code} error", response=response)
+
+
+def fails(*errors):
+    """:return: Callable raising the errors one by one, then returning 42."""
+    errors = list(errors)
+
+    def callable():
+        if errors:
+            raise errors.pop(0)
+        return 42
+
+    return callable
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (requests.Timeout(), True),
+        (requests.ConnectionError(), True),
+        (http_error(429), True),
+        (http_error(503), True),
+        (http_error(404), False),
+        (ValueError(), False),
+    ],
+)
+def test_is_retryable_error(error, expected):
+    assert is_retryable_error(error) is expected
+
+
+def test_retry_after_seconds():
+    assert get_retry_after_seconds(http_error(429, {"Retry-After": "7"})) == 7
+    assert (
+        get_retry_after_seconds(
+            http_error(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        )
+        == 0
+    )
+    assert get_retry_after_seconds(http_error(429)) is None
+    assert get_retry_after_seconds(ValueError()) is None
+
+
+def test_retry_policy_first_succeed():
     """
-    Test retry_twice_5s_intervals raises an exception after two retries
+    Test the policy returns result of callable on success
     """
     with patch("ingest.importers.utils.retry.time.sleep") as mock_sleep:
-        with pytest.raises(ZeroDivisionError):
-            retry_twice_5s_intervals(lambda: 1 / 0)  # ZeroDivisionError
-        assert mock_sleep.call_count == 2
-        # Check all calls' *args & **kwargs
-        assert mock_sleep.call_args_list[0] == ((5,), {})
-        assert mock_sleep.call_args_list[1] == ((5,), {})
+        assert POLICY.call(lambda x, y=0: x + y, 40, y=2) == 42
+        assert mock_sleep.call_count == 0
 
 
-def test_retry_twice_5s_intervals_first_succeed():
+def test_retry_policy_backs_off_exponentially():
     """
-    Test retry_twice_5s_intervals returns result of callable on success
+    Test the policy retries retryable errors with exponentially growing delays
     """
     with patch("ingest.importers.utils.retry.time.sleep") as mock_sleep:
-        result = retry_twice_5s_intervals(lambda: 42)
-        assert result == 42
-        assert mock_sleep.call_count == 0
+        assert POLICY.call(fails(requests.Timeout(), http_error(502))) == 42
+        assert mock_sleep.call_args_list == [((2,), {}), ((4,), {})]
 
 
-def test_retry_twice_5s_intervals_passes_args_and_kwargs():
+def test_retry_policy_failure():
     """
-    Test retry_twice_5s_intervals passes args and kwargs to the callable
+    Test the policy raises the last error after the attempts run out
     """
+    stats = ImportStats(importer="test")
+    callable = fails(*(requests.Timeout(str(i)) for i in range(3)))
+    with (
+        patch("ingest.importers.utils.retry.time.sleep") as mock_sleep,
+        stats.activate(),
+        pytest.raises(requests.Timeout, match="2"),
+    ):
+        POLICY.call(callable)
+    assert mock_sleep.call_count == 2
+    assert stats.retries == {callable.__qualname__: 2}
+    assert stats.stages["retry_wait"].total_seconds == 6
+    assert stats.counters["retries_exhausted"] == 1
+
+
+def test_retry_policy_does_not_retry_non_retryable_errors():
     with patch("ingest.importers.utils.retry.time.sleep") as mock_sleep:
-        result = retry_twice_5s_intervals(
-            lambda *args, **kwargs: sum(args) + sum(kwargs.values()), 1, 2, y=3, z=4
-        )
-        assert result == 10
+        with pytest.raises(ZeroDivisionError):
+            POLICY.call(lambda: 1 / 0)
+        with pytest.raises(requests.HTTPError):
+            POLICY.call(fails(http_error(404)))
         assert mock_sleep.call_count == 0
 
 
-def test_retry_twice_5s_intervals_first_fail_then_succeed():
+def test_retry_policy_jitter():
+    policy = RetryPolicy(base_delay_seconds=2, max_delay_seconds=5)
+    with patch("ingest.importers.utils.retry.random.uniform", return_value=1.5) as r:
+        assert policy.get_delay_seconds(1, requests.Timeout()) == 1.5
+        assert policy.get_delay_seconds(3, requests.Timeout()) == 1.5
+    assert r.call_args_list == [((0, 2), {}), ((0, 5), {})]
+
+
+def test_retry_policy_respects_retry_after():
+    with patch("ingest.importers.utils.retry.time.sleep") as mock_sleep:
+        assert POLICY.call(fails(http_error(429, {"Retry-After": "10"}))) == 42
+        assert mock_sleep.call_args_list == [((10,), {})]
+
+
+def test_retry_policy_deadline():
     """
-    Test retry_twice_5s_intervals retries the callable that fails once
+    Test the policy gives up instead of retrying after its deadline
     """
-    try_count = 0
+    policy = RetryPolicy(
+        max_attempts=10, base_delay_seconds=1, deadline_seconds=5, jitter=False
+    )
+    with patch("ingest.importers.utils.retry.time.sleep") as mock_sleep:
+        with pytest.raises(requests.HTTPError):
+            policy.call(fails(http_error(429, {"Retry-After": "60"})))
+        assert mock_sleep.call_count == 0
+
+    with (
+        patch("ingest.importers.utils.retry.time.sleep") as mock_sleep,
+        patch("ingest.importers.utils.retry.time.monotonic", side_effect=[0, 0, 4]),
+        pytest.raises(requests.Timeout),
+    ):
+        policy.call(fails(*(requests.Timeout() for _ in range(10))))
+    assert mock_sleep.call_args_list == [((1,), {})]
 
-    def callable_that_fails_and_then_succeeds():
-        nonlocal try_count
-        try_count += 1
-        if try_count == 2:
-            return 123
-        raise RuntimeError
 
+def test_nested_retry_policies_do_not_multiply_attempts():
+    """
+    Test an error retried by an inner policy is not retried by an outer policy
+    """
+    callable = MagicMock(side_effect=requests.Timeout)
     with patch("ingest.importers.utils.retry.time.sleep") as mock_sleep:
-        result = retry_twice_5s_intervals(callable_that_fails_and_then_succeeds)
-        assert result == 123
-        assert try_count == 2
-        assert mock_sleep.call_count == 1
-        # Check all calls' *args & **kwargs
-        assert mock_sleep.call_args_list[0] == ((5,), {})
+        with pytest.raises(requests.Timeout):
+            POLICY.call(POLICY.call, callable)
+    assert callable.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_retry_policy_call_async():
+    async def add(x, y=0):
+        return x + y
+
+    callable = AsyncMock(side_effect=[requests.Timeout(), http_error(502), 42])
+    with patch("ingest.importers.utils.retry.asyncio.sleep") as mock_sleep:
+        assert asyncio.run(POLICY.call_async(add, 40, y=2)) == 42
+        assert asyncio.run(POLICY.call_async(callable)) == 42
+        assert mock_sleep.call_args_list == [((2,), {}), ((4,), {})]
+
+    callable = AsyncMock(side_effect=http_error(404))
+    with pytest.raises(requests.HTTPError):
+        asyncio.run(POLICY.call_async(callable))
+    assert callable.await_count == 1
@@ -0,0 +1,132 @@
+import pytest
+
+from ingest.importers.utils.sharding import Shard, ShardCoordination, ShardError
+
+
+@pytest.mark.parametrize("value", ["1", "a/4", "4/4", "-1/4", "1/2/3"])
+def test_invalid_shard(value):
+    with pytest.raises(ValueError):
+        Shard.parse(value)
+
+
+@pytest.mark.parametrize("item_count", [0, 1, 7, 100])
+def test_shard_slices_cover_all_items(item_count):
+    items = list(range(item_count))
+    assert [
+        item for index in range(3) for item in Shard(index, 3).get_slice(items)
+    ] == items
+
+
+def test_shard_coordination(tmp_path):
+    coordinator, worker = (
+        ShardCoordination(
+            "test", Shard(index, 2), str(tmp_path), poll_interval_seconds=0.01
+        )
+        for index in range(2)
+    )
+    coordinator.start()
+    with pytest.raises(ShardError, match="timed out"):
+        worker.wait_for_publication(timeout_seconds=0.05)
+
+    coordinator.publish("test_1")
+    assert worker.wait_for_publication(timeout_seconds=1) == "test_1"
+    coordinator.report(success=True, bulk_documents=10, bulk_errors=1)
+    with pytest.raises(ShardError, match="timed out"):
+        coordinator.wait_for_completion(timeout_seconds=0.05)
+    worker.report(success=True, bulk_documents=20, bulk_errors=2)
+    assert coordinator.wait_for_completion(timeout_seconds=1) == {
+        "documents": 30,
+        "errors": 3,
+    }
+
+    coordinator.end()
+    assert not coordinator.state_path.exists()
+
+
+def test_shard_coordination_fails_with_a_shard(tmp_path):
+    coordinator, worker = (
+        ShardCoordination("test", Shard(index, 2), str(tmp_path)) for index in range(2)
+    )
+    coordinator.start()
+    coordinator.publish("test_1")
+    worker.wait_for_publication(timeout_seconds=1)
+    worker.report(success=False)
+    with pytest.raises(ShardError, match=r"Shards \[1\] failed"):
+        coordinator.wait_for_completion(timeout_seconds=1)
+
+
+def test_shard_coordination_ignores_earlier_runs(tmp_path):
+    coordinator, worker = (
+        ShardCoordination("test", Shard(index, 2), str(tmp_path)) for index in range(2)
+    )
+    coordinator.start()
+    coordinator.publish("test_1")
+    worker.wait_for_publication(timeout_seconds=1)
+
+    # The coordinator restarts, e.g. after being interrupted
+    coordinator.start()
+    worker.report(success=True)
+    coordinator.publish("test_2")
+    coordinator.report(success=True)
+    with pytest.raises(ShardError, match="timed out"):
+        coordinator.wait_for_completion(timeout_seconds=0)
+
+
+def test_shard_coordination_workers_do_not_join_failed_runs(tmp_path):
+    coordinator, worker = (
+        ShardCoordination(
+            "test", Shard(index, 2), str(tmp_path), poll_interval_seconds=0.01
+        )
+        for index in range(2)
+    )
+    coordinator.start()
+    coordinator.publish("test_1")
+    coordinator.report(success=False)
+
+    # The worker waiting for the failed coordinator fails right away
+    with pytest.raises(ShardError, match="coordinator .* failed"):
+        worker.wait_for_publication(timeout_seconds=60)
+
+    with coordinator._locked_state() as state:
+        assert state["wip_index"] is None
+        # A failed worker does not end the run, but no more workers join it
+        state["wip_index"] = "test_1"
+        state["failed"] = [1]
+    with pytest.raises(ShardError, match="timed out"):
+        worker.wait_for_publication(timeout_seconds=0.05)
+
+
+def test_shard_coordination_workers_ignore_earlier_failures(tmp_path):
+    coordinator = ShardCoordination("test", Shard(0, 2), str(tmp_path))
+    coordinator.start()
+    coordinator.report(success=False)
+
+    # A worker started after the failure waits for the next run
+    worker = ShardCoordination(
+        "test", Shard(1, 2), str(tmp_path), poll_interval_seconds=0.01
+    )
+    with pytest.raises(ShardError, match="timed out"):
+        worker.wait_for_publication(timeout_seconds=0.05)
+
+
+def test_shard_coordination_workers_do_not_join_earlier_runs(tmp_path, settings):
+    """
+    Test the workers do not join the run of a coordinator killed without reporting
+    its failure, e.g. by running out of memory, before the next run starts.
+    """
+    settings.IMPORT_SHARD_JOIN_WINDOW_SECONDS = 600
+    coordinator = ShardCoordination("test", Shard(0, 2), str(tmp_path))
+    coordinator.start()
+    coordinator.publish("test_1")
+    with coordinator._locked_state() as state:
+        state["started_at"] -= 601
+
+    worker = ShardCoordination(
+        "test", Shard(1, 2), str(tmp_path), poll_interval_seconds=0.01
+    )
+    with pytest.raises(ShardError, match="timed out"):
+        worker.wait_for_publication(timeout_seconds=0.05)
+
+    coordinator.start()
+    coordinator.publish("test_2")
+    assert worker.wait_for_publication(timeout_seconds=1) == "test_2"
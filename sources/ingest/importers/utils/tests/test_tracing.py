@@ -0,0 +1,87 @@
+from unittest.mock import Mock
+
+import pytest
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+from ingest.importers.utils.opening_hours import HaukiOpeningHoursFetcher
+from ingest.importers.utils.tracing import trace_span, trace_transaction
+from ingest.importers.utils.traffic import request_json
+
+
+class CapturingTransport(Transport):
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.events = []
+
+    def capture_envelope(self, envelope):
+        self.events.extend(
+            item.payload.json for item in envelope.items if item.type == "transaction"
+        )
+
+
+@pytest.fixture
+def sentry_transport():
+    transport = CapturingTransport()
+    client = sentry_sdk.Client(
+        dsn="https://public@sentry.example.com/1",
+        traces_sample_rate=1.0,
+        transport=transport,
+        default_integrations=False,
+    )
+    with sentry_sdk.isolation_scope() as scope:
+        scope.set_client(client)
+        yield transport
+    client.close()
+
+
+def get_spans(transport, op):
+    [transaction] = transport.events
+    return [span for span in transaction["spans"] if span["op"] == op]
+
+
+def test_trace_span_sets_data(sentry_transport):
+    with trace_transaction("test"):
+        with trace_span("fetch", "tpr_units", items=3) as span:
+            span.set_data("bytes", 1024)
+
+    [span] = get_spans(sentry_transport, "fetch")
+    assert span["description"] == "tpr_units"
+    assert span["data"]["items"] == 3
+    assert span["data"]["bytes"] == 1024
+
+
+def test_trace_span_without_transaction_is_noop(sentry_transport):
+    with trace_span("fetch", "tpr_units", items=3):
+        pass
+    assert sentry_transport.events == []
+
+
+def test_request_json_span(sentry_transport, mocker):
+    mocker.patch(
+        "ingest.importers.utils.traffic.requests.get",
+        return_value=Mock(content=b"[1, 2]", json=lambda: [1, 2]),
+    )
+    with trace_transaction("test"):
+        assert request_json("https://api.example.com/units/") == [1, 2]
+
+    [span] = get_spans(sentry_transport, "http.request_json")
+    assert span["data"]["url.host"] == "api.example.com"
+    assert span["data"]["http.response.body.size"] == 6
+    assert span["data"]["items"] == 2
+
+
+def test_hauki_batch_span(sentry_transport, mocker):
+    mocker.patch(
+        "ingest.importers.utils.opening_hours.request_json",
+        return_value={"results": []},
+    )
+    fetcher = HaukiOpeningHoursFetcher(["1", "2", "3"], batch_size=2)
+    with trace_transaction("test"):
+        fetcher.get_opening_hours_for_venue("1")
+        fetcher.get_opening_hours_for_venue("3")
+
+    spans = get_spans(sentry_transport, "http.hauki")
+    assert [span["data"]["venues"] for span in spans] == [2, 1]
+    assert spans[0]["data"]["url.host"] == "hauki.api.hel.fi"
+    assert spans[0]["data"]["results"] == 0
@@ -0,0 +1,40 @@
+"""
+Sentry performance tracing of the importers.
+
+The ingest_data management command runs every importer inside a Sentry transaction,
+and the importers add spans for their slow parts (base data fetches, Hauki batches,
+Elasticsearch bulk requests etc.) with trace_span(). When Sentry is not configured,
+or the transaction is not sampled, the spans are no-ops.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import sentry_sdk
+from sentry_sdk.tracing import Span
+
+
+@contextmanager
+def trace_transaction(name: str, op: str = "task") -> Iterator[Span]:
+    """
+    Start a Sentry transaction for a run outside a web request, e.g. a management
+    command. Sampled with settings.SENTRY_TRACES_SAMPLE_RATE.
+    """
+    with sentry_sdk.start_transaction(op=op, name=name) as transaction:
+        yield transaction
+
+
+@contextmanager
+def trace_span(op: str, name: str, **data: Any) -> Iterator[Span]:
+    """
+    Trace the wrapped block as a child span of the current span.
+
+    :param op: Span operation, e.g. "http.client" or "db.elasticsearch.bulk".
+    :param name: Human readable description of the span.
+    :param data: Span attributes, e.g. URL host, item counts and byte sizes. More
+        can be added to the yielded span with span.set_data(key, value).
+    """
+    with sentry_sdk.start_span(op=op, name=name) as span:
+        for key, value in data.items():
+            span.set_data(key, value)
+        yield span
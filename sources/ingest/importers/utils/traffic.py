@@ -1,8 +1,13 @@
 import logging
+import time
+from urllib.parse import urlparse
 
 import requests
 
-from ingest.importers.utils.retry import retry_twice_5s_intervals
+from ingest.importers.utils.host_limiter import get_host_limiter
+from ingest.importers.utils.instrumentation import get_current_import_stats
+from ingest.importers.utils.retry import HTTP_RETRY_POLICY
+from ingest.importers.utils.tracing import trace_span
 
 logger = logging.getLogger(__name__)
 
@@ -10,22 +15,40 @@ logger = logging.getLogger(__name__)
 def request_json(url, timeout_seconds=20):
     """
     Request a JSON response from the given URL
-    with the given timeout and max. 2 retries.
+    with the given timeout, retried with HTTP_RETRY_POLICY
+    and limited by the URL host's HostLimiter.
 
     :return: JSON response from the URL if successful,
              otherwise raises an exception.
     :raise: Exception if the request fails after retries.
+    :raise CircuitOpenError: If the host's circuit breaker is open.
     """
     logger.debug(f"Requesting URL {url}")
 
+    host = urlparse(url).hostname
+    limiter = get_host_limiter(host)
+
     def fetch_response():
-        response = requests.get(url, timeout=timeout_seconds)
-        response.raise_for_status()
-        return response
+        with limiter.request():
+            start = time.perf_counter()
+            try:
+                response = requests.get(url, timeout=timeout_seconds)
+            finally:
+                if stats := get_current_import_stats():
+                    stats.record_http_request(host, time.perf_counter() - start)
+            response.raise_for_status()
+            return response
 
     try:
-        response = retry_twice_5s_intervals(fetch_response)
-        return response.json()
+        with trace_span(
+            "http.request_json", f"GET {host}", **{"url.host": host}
+        ) as span:
+            response = HTTP_RETRY_POLICY.call(fetch_response)
+            span.set_data("http.response.body.size", len(response.content))
+            data = response.json()
+            if isinstance(data, list):
+                span.set_data("items", len(data))
+            return data
     except Exception as e:
         logger.error(f"Error while requesting {url}: {e}")
         raise
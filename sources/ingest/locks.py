@@ -0,0 +1,244 @@
+"""
+Run locks of the data importers.
+
+The importers are run by cron jobs, so nothing but a lock stops e.g. a slow location
+import from overlapping with the next one, both deleting the other's wip index and
+doubling the load on the data sources and Elasticsearch. Therefore the ingest_data
+command holds a lock per index alias while running an importer.
+
+The locks are documents in an Elasticsearch index (IMPORTER_LOCKS_INDEX, one document
+per lock), as Elasticsearch is the one service shared by all the importer runs. The
+lock holder renews the lock's expiry time periodically in a background thread (the
+heartbeat), and a lock whose holder has died is taken over once it has expired. The
+writes use optimistic concurrency control, so only one of competing runs succeeds.
+
+A run whose lock has expired, e.g. because its heartbeats failed, and been taken over
+by another run must not swap its import active, so the importers renew their locks
+before the swap, raising LockLost if they have been taken over.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import Optional
+
+from django.conf import settings
+from elasticsearch import ConflictError, Elasticsearch, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+IMPORTER_LOCKS_INDEX = "importer_locks"
+
+# How often a waiting run retries acquiring the lock
+POLL_INTERVAL_SECONDS = 5.0
+
+
+class LockPolicy(str, Enum):
+    """What to do when the lock is held by another run."""
+
+    WAIT = "wait"  # Wait for the lock until settings.IMPORT_LOCK_WAIT_SECONDS
+    SKIP = "skip"  # Skip the run
+    FAIL = "fail"  # Fail the run
+
+
+class LockNotAcquired(Exception):
+    """Raised when the lock is held by another run."""
+
+
+class LockLost(Exception):
+    """Raised when the lock has been taken over by another run while held."""
+
+
+class ImporterLock:
+    """
+    Run lock of an importer, see the module docstring.
+
+    Usage:
+
+    lock = ImporterLock(es, "location")
+    wait_seconds = lock.acquire(LockPolicy.WAIT)
+    try:
+        run_the_importer()
+        lock.check_held()  # Before swapping the import active
+    finally:
+        lock.release()
+
+    :param name: Name of the lock, e.g. the index alias.
+    :param ttl_seconds: How long the lock is valid without a heartbeat.
+    :param heartbeat_seconds: How often the lock holder renews the lock.
+    """
+
+    def __init__(
+        self,
+        es: Elasticsearch,
+        name: str,
+        ttl_seconds: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+    ):
+        self.es = es
+        self.name = name
+        self.ttl_seconds = ttl_seconds or settings.IMPORT_LOCK_TTL_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or self.ttl_seconds / 4
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Sequence number and primary term of the lock document's last write by us
+        self._version: Optional[dict] = None
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        # Serializes the renewals of the heartbeat and check_held()
+        self._renew_lock = threading.Lock()
+        # Set when the lock has been taken over by another run
+        self.lost = threading.Event()
+
+    def _document(self) -> dict:
+        now = time.time()
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "heartbeat_at": now,
+            "expires_at": now + self.ttl_seconds,
+        }
+
+    def _write(self, **kwargs) -> None:
+        response = self.es.index(
+            index=IMPORTER_LOCKS_INDEX,
+            id=self.name,
+            document=self._document(),
+            refresh=True,
+            **kwargs,
+        )
+        self._version = {
+            "if_seq_no": response["_seq_no"],
+            "if_primary_term": response["_primary_term"],
+        }
+
+    def try_acquire(self) -> bool:
+        """
+        Acquire the lock if it is free or expired.
+
+        :return: Whether the lock was acquired.
+        """
+        try:
+            self._write(op_type="create")
+            return True
+        except ConflictError:
+            pass
+
+        try:
+            existing = self.es.get(index=IMPORTER_LOCKS_INDEX, id=self.name)
+        except NotFoundError:
+            return False  # Released in between, retried on the next attempt
+        if existing["_source"]["expires_at"] > time.time():
+            return False
+        try:
+            self._write(
+                if_seq_no=existing["_seq_no"],
+                if_primary_term=existing["_primary_term"],
+            )
+        except ConflictError:
+            return False  # Taken over by another run first
+        logger.warning(
+            f"Took over lock {self.name} expired from {existing['_source']['owner']}"
+        )
+        return True
+
+    def acquire(self, policy: LockPolicy = LockPolicy.WAIT) -> float:
+        """
+        Acquire the lock and start its heartbeat.
+
+        :return: The time waited for the lock in seconds.
+        :raise LockNotAcquired: If the lock is held by another run, after waiting for
+            settings.IMPORT_LOCK_WAIT_SECONDS with the WAIT policy.
+        """
+        self.es.options(ignore_status=400).indices.create(
+            index=IMPORTER_LOCKS_INDEX, mappings={"dynamic": False}
+        )
+        start = time.monotonic()
+        while not self.try_acquire():
+            waited = time.monotonic() - start
+            if policy != LockPolicy.WAIT or waited >= settings.IMPORT_LOCK_WAIT_SECONDS:
+                raise LockNotAcquired(
+                    f"Lock {self.name} is held by {self.get_owner()}, "
+                    f"waited {waited:.0f} s."
+                )
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+        self.lost.clear()
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name=f"lock-heartbeat-{self.name}", daemon=True
+        )
+        self._heartbeat_thread.start()
+        return time.monotonic() - start
+
+    def _renew(self) -> None:
+        """
+        Renew the lock's expiry time.
+
+        :raise LockLost: If the lock has been taken over by another run.
+        """
+        with self._renew_lock:
+            if self.lost.is_set():
+                raise LockLost(f"Lost lock {self.name} to another run.")
+            try:
+                self._write(**self._version)
+            except ConflictError:
+                self.lost.set()
+                raise LockLost(f"Lost lock {self.name} to {self.get_owner()}.")
+
+    def _heartbeat(self) -> None:
+        while not self._heartbeat_stop.wait(self.heartbeat_seconds):
+            try:
+                self._renew()
+            except LockLost as e:
+                logger.error(str(e))
+                return
+            except Exception as e:  # noqa
+                # E.g. a connection error, the lock is valid until it expires
+                logger.warning(f"Could not renew lock {self.name}: {e}")
+
+    def check_held(self) -> None:
+        """
+        Check that the lock is still held by renewing it, e.g. right before swapping
+        an import active.
+
+        :raise LockLost: If the lock has been taken over by another run.
+        """
+        self._renew()
+
+    def release(self) -> None:
+        """
+        Stop the heartbeat and release the lock, unless it has been lost.
+
+        :raise LockLost: If the lock has been taken over by another run, i.e. the
+            run has not been protected by the lock.
+        """
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+        if self._version and not self.lost.is_set():
+            try:
+                self.es.delete(
+                    index=IMPORTER_LOCKS_INDEX,
+                    id=self.name,
+                    refresh=True,
+                    **self._version,
+                )
+            except (ConflictError, NotFoundError):
+                self.lost.set()
+        self._version = None
+        if self.lost.is_set():
+            raise LockLost(f"Lock {self.name} was lost before releasing it.")
+
+    def get_owner(self) -> Optional[str]:
+        """:return: The current holder of the lock, if any."""
+        try:
+            return self.es.get(index=IMPORTER_LOCKS_INDEX, id=self.name)["_source"][
+                "owner"
+            ]
+        except NotFoundError:
+            return None
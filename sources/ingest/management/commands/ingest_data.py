@@ -1,13 +1,22 @@
+import json
 import logging
-from typing import Dict, Optional, Type, Union
+from typing import Dict, List, Optional, Tuple, Type, Union
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
+from common.elasticsearch import get_elasticsearch_client
 from ingest.importers.administrative_division import AdministrativeDivisionImporter
+from ingest.importers.base import rollback_alias, RollbackError
 from ingest.importers.location import LocationImporter
 from ingest.importers.ontology_tree import OntologyTreeImporter
 from ingest.importers.ontology_word import OntologyWordImporter
+from ingest.importers.utils.instrumentation import ImportStats
+from ingest.importers.utils.sharding import Shard
+from ingest.importers.utils.tracing import trace_span, trace_transaction
+from ingest.locks import ImporterLock, LockLost, LockNotAcquired, LockPolicy
+from ingest.metrics import save_importer_lock_skip, save_importer_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +54,75 @@ class Command(BaseCommand):
             ),
         )
 
+        parser.add_argument(
+            "--stats-json",
+            dest="stats_json",
+            metavar="PATH",
+            default=None,
+            help=(
+                "Write the importers' timing and throughput statistics as JSON to "
+                "the given file path, or to standard output if the path is '-'."
+            ),
+        )
+
+        parser.add_argument(
+            "--only",
+            dest="only",
+            metavar="PARTIAL_UPDATE",
+            default=None,
+            help=(
+                "Only update the given part of the importers' data in the active "
+                "index in place instead of a full import, e.g. "
+                "'location --only opening_hours'."
+            ),
+        )
+
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            default=False,
+            help=(
+                "Resume the interrupted imports of the resumable importers, e.g. "
+                "'location', from their checkpoints instead of starting over."
+            ),
+        )
+
+        parser.add_argument(
+            "--shard",
+            dest="shard",
+            metavar="I/N",
+            default=None,
+            help=(
+                "Run the I-th of N shards of the import, e.g. 'location --shard 0/4'. "
+                "Shard 0 coordinates the import, and the others index their slices "
+                "of the data to it."
+            ),
+        )
+
+        parser.add_argument(
+            "--lock-policy",
+            dest="lock_policy",
+            choices=[policy.value for policy in LockPolicy],
+            default=None,
+            help=(
+                "What to do when another run holds an importer's run lock: wait for "
+                "it, skip the importer or fail. Defaults to IMPORT_LOCK_POLICY "
+                "setting."
+            ),
+        )
+
+        parser.add_argument(
+            "--rollback",
+            dest="rollback",
+            metavar="ALIAS",
+            default=None,
+            help=(
+                "Instead of importing, swap the given alias, e.g. 'location', back "
+                "to its previous index kept with IMPORT_KEEP_PREVIOUS_INDEX setting."
+            ),
+        )
+
         # Positional (optional) argument(s)
         parser.add_argument(
             "importer",
@@ -53,21 +131,70 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **kwargs):
+        lock_policy = LockPolicy(
+            kwargs.get("lock_policy") or settings.IMPORT_LOCK_POLICY
+        )
+        if kwargs.get("rollback"):
+            return self.handle_rollback(kwargs["rollback"], lock_policy)
+
         start_time = timezone.now()
         logger.info(f"Started at {start_time:%X}")
 
         importer_map = self.get_importer_map(kwargs["importer"])
-
-        self.handle_import(
-            importer_map,
-            use_fallback_languages=kwargs.get("use_fallback_languages", True),
+        only = kwargs.get("only")
+        if only:
+            self.check_partial_update(importer_map, only)
+        resume = kwargs.get("resume", False)
+        if only and resume:
+            raise CommandError("Partial updates cannot be resumed.")
+        shard = kwargs.get("shard") and self.get_shard(
+            importer_map, kwargs["shard"], only=only, resume=resume
         )
 
+        with trace_transaction("ingest_data"):
+            import_stats = self.handle_import(
+                importer_map,
+                use_fallback_languages=kwargs.get("use_fallback_languages", True),
+                only=only,
+                resume=resume,
+                shard=shard,
+                lock_policy=lock_policy,
+            )
+        if kwargs.get("stats_json"):
+            self.write_stats_json(import_stats, kwargs["stats_json"])
+
         end_time = timezone.now()
         logger.info(
             f"Completed at {end_time:%X}, took {(end_time - start_time).seconds} sec."
         )
 
+    def handle_rollback(
+        self, alias: str, lock_policy: LockPolicy = LockPolicy.FAIL
+    ) -> None:
+        """
+        Swap the alias back to its previous index, holding the alias' run lock, so
+        that the rollback does not race an import swapping or deleting its indexes.
+
+        :param lock_policy: What to do when another run holds the alias' lock.
+        """
+        try:
+            locks, _ = self.acquire_locks([alias], lock_policy)
+        except LockNotAcquired as e:
+            if lock_policy != LockPolicy.SKIP:
+                raise CommandError(str(e))
+            logger.warning(f"Skipping rollback of {alias}: {e}")
+            return
+
+        try:
+            index = rollback_alias(get_elasticsearch_client(), alias)
+        except Exception as e:
+            self.release_locks(locks, report_lost=False)
+            if isinstance(e, RollbackError):
+                raise CommandError(str(e))
+            raise
+        self.release_locks(locks)
+        self.stdout.write(f"Alias {alias} now points to index {index}.")
+
     def get_importer_map(self, importer_names: Optional[str]) -> ImporterMap:
         importer_map: ImporterMap = {}
         for importer_name in importer_names or self.all_importers.keys():
@@ -80,13 +207,219 @@ class Command(BaseCommand):
                 )
         return importer_map
 
-    def handle_import(
-        self, importer_map: ImporterMap, use_fallback_languages: bool
-    ) -> None:
+    @staticmethod
+    def check_partial_update(importer_map: ImporterMap, only: str) -> None:
         for importer_name, importer_class in importer_map.items():
-            logger.info(f"Importing {importer_name}")
+            if only not in importer_class.partial_updates:
+                raise CommandError(
+                    f"Unknown partial update for importer '{importer_name}': "
+                    f"'{only}', allowed: {list(importer_class.partial_updates)}."
+                )
+
+    @classmethod
+    def get_shard(
+        cls, importer_map: ImporterMap, value: str, only: Optional[str], resume: bool
+    ) -> Shard:
+        if only or resume:
+            raise CommandError("Sharded imports cannot be partial or resumed.")
+        if len(importer_map) != 1 or not next(iter(importer_map.values())).resumable:
+            resumable_importers = [
+                name
+                for name, importer_class in cls.all_importers.items()
+                if importer_class.resumable
+            ]
+            raise CommandError(
+                "Sharded imports need a single importer, "
+                f"allowed: {resumable_importers}."
+            )
+        try:
+            return Shard.parse(value)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def handle_import(
+        self,
+        importer_map: ImporterMap,
+        use_fallback_languages: bool,
+        only: Optional[str] = None,
+        resume: bool = False,
+        shard: Optional[Shard] = None,
+        lock_policy: LockPolicy = LockPolicy.FAIL,
+    ) -> Dict[str, dict]:
+        """
+        Run the given importers, each holding its run locks, see ingest.locks.
+
+        :param only: Name of the partial update to run instead of full imports.
+        :param resume: Resume the resumable importers' interrupted imports, the other
+            importers start over.
+        :param shard: The shard of the import to run.
+        :param lock_policy: What to do when another run holds an importer's lock.
+        :return: Mapping from importer name to its run's statistics summary.
+        """
+        import_stats = {}
+        for importer_class_name, importer_class in importer_map.items():
+            # Partial updates have metrics of their own, e.g. location:opening_hours
+            importer_name = (
+                f"{importer_class_name}:{only}" if only else importer_class_name
+            )
+            if shard and not shard.is_coordinator:
+                # The coordinator's metrics are the whole import's
+                importer_name = f"{importer_class_name}:shard_{shard.index}"
+
+            try:
+                locks, lock_wait_seconds = self.acquire_locks(
+                    self.get_lock_names(importer_class, shard), lock_policy
+                )
+            except LockNotAcquired as e:
+                if lock_policy != LockPolicy.SKIP:
+                    self.save_metrics(importer_name, None, False)
+                    raise CommandError(str(e))
+                logger.warning(f"Skipping {importer_name}: {e}")
+                self.save_lock_skip(importer_name)
+                continue
+
             try:
-                importer_class(use_fallback_languages=use_fallback_languages).base_run()
-            except Exception as e:  # noqa
-                logger.exception(e)
-                raise e
+                import_stats[importer_name] = self.run_importer(
+                    importer_name,
+                    importer_class,
+                    use_fallback_languages=use_fallback_languages,
+                    only=only,
+                    resume=resume,
+                    shard=shard,
+                    locks=locks,
+                    lock_wait_seconds=lock_wait_seconds if locks else None,
+                )
+            except Exception as e:
+                # The run's failure is reported instead of the locks' loss
+                self.release_locks(locks, report_lost=False)
+                if isinstance(e, LockLost):
+                    raise CommandError(str(e))
+                raise
+            self.release_locks(locks)
+        return import_stats
+
+    def run_importer(
+        self,
+        importer_name: str,
+        importer_class,
+        use_fallback_languages: bool,
+        only: Optional[str],
+        resume: bool,
+        shard: Optional[Shard],
+        locks: List[ImporterLock],
+        lock_wait_seconds: Optional[float],
+    ) -> dict:
+        """
+        :param locks: The run locks held, checked before the import is swapped active.
+        :return: The run's statistics summary.
+        """
+        logger.info(f"Importing {importer_name}")
+        importer = None
+        try:
+            with trace_span("importer", importer_name) as span:
+                if only:
+                    importer = importer_class.for_partial_update(
+                        use_fallback_languages=use_fallback_languages
+                    )
+                else:
+                    importer = importer_class(
+                        use_fallback_languages=use_fallback_languages,
+                        resume=resume and importer_class.resumable,
+                        shard=shard,
+                    )
+                importer.locks = locks
+                if lock_wait_seconds is not None:
+                    importer.stats.add_stage_timing("lock", lock_wait_seconds)
+                if only:
+                    importer.base_partial_update(only)
+                else:
+                    importer.base_run()
+                span.set_data("documents", importer.stats.documents_indexed)
+                span.set_data("bulk_errors", importer.stats.bulk.errors)
+        except Exception as e:  # noqa
+            logger.exception(e)
+            self.save_metrics(importer_name, importer and importer.stats, False)
+            raise e
+        self.save_metrics(importer_name, importer.stats, True)
+        return importer.stats.summary()
+
+    @staticmethod
+    def get_lock_names(importer_class, shard: Optional[Shard]) -> List[str]:
+        """
+        The importer's run locks, i.e. its index aliases. The partial updates take
+        the same locks, as they scroll and update the active index, which a full
+        import swaps and deletes. Sharded imports are locked by their coordinator.
+        """
+        if shard and not shard.is_coordinator:
+            return []
+        return sorted(importer_class.index_base_names)
+
+    @staticmethod
+    def acquire_locks(
+        lock_names: List[str], policy: LockPolicy
+    ) -> Tuple[List[ImporterLock], float]:
+        """
+        :return: The acquired locks and the total time waited for them in seconds.
+        :raise LockNotAcquired: If any of the locks is held by another run.
+        """
+        es = get_elasticsearch_client()
+        locks: List[ImporterLock] = []
+        wait_seconds = 0.0
+        try:
+            for name in lock_names:
+                lock = ImporterLock(es, name)
+                wait_seconds += lock.acquire(policy)
+                locks.append(lock)
+        except LockNotAcquired:
+            Command.release_locks(locks, report_lost=False)
+            raise
+        if locks:
+            logger.info(f"Acquired locks {lock_names} in {wait_seconds:.1f} s")
+        return locks, wait_seconds
+
+    @staticmethod
+    def release_locks(locks: List[ImporterLock], report_lost: bool = True) -> None:
+        """
+        Release all the locks.
+
+        :raise CommandError: If any of the locks was lost, i.e. the run has not been
+            protected by it, unless report_lost is False.
+        """
+        lost = []
+        for lock in reversed(locks):
+            try:
+                lock.release()
+            except LockLost as e:
+                lost.append(str(e))
+        if lost and report_lost:
+            raise CommandError(" ".join(lost))
+
+    @staticmethod
+    def save_metrics(
+        importer_name: str, stats: Optional[ImportStats], success: bool
+    ) -> None:
+        """
+        Persist the importer run's metrics for the /metrics endpoint. Failing to do
+        so is logged but does not fail the import.
+        """
+        try:
+            save_importer_metrics(
+                get_elasticsearch_client(), importer_name, stats, success
+            )
+        except Exception as e:  # noqa
+            logger.warning(f"Could not save metrics of {importer_name}: {e}")
+
+    @staticmethod
+    def save_lock_skip(importer_name: str) -> None:
+        try:
+            save_importer_lock_skip(get_elasticsearch_client(), importer_name)
+        except Exception as e:  # noqa
+            logger.warning(f"Could not save metrics of {importer_name}: {e}")
+
+    def write_stats_json(self, import_stats: Dict[str, dict], path: str) -> None:
+        stats_json = json.dumps(import_stats, indent=2)
+        if path == "-":
+            self.stdout.write(stats_json)
+        else:
+            with open(path, "w") as file:
+                file.write(stats_json)
@@ -0,0 +1,470 @@
+"""
+Prometheus metrics of the data importers.
+
+The importers are run by cron jobs in separate processes from the web application
+serving the /metrics endpoint, so the metrics are persisted to an Elasticsearch index
+(IMPORTER_METRICS_INDEX, one document per importer) by the ingest_data command after
+every importer run, and read from there by ImporterMetricsCollector. The scrapes are
+served by CachedMetricsCollector from the metrics collected in the background every
+METRICS_CACHE_TTL seconds.
+"""
+
+import logging
+import random
+import time
+from dataclasses import asdict
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from elastic_transport import TransportError
+from elasticsearch import ApiError, Elasticsearch
+from elasticsearch.exceptions import ConflictError, NotFoundError
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+
+from common.cache import BackgroundCache
+from common.elasticsearch import (
+    get_elasticsearch_client,
+    get_request_timeout,
+    INDEX_ALIASES,
+)
+from ingest.importers.utils.instrumentation import (
+    ImportStats,
+    LATENCY_BUCKETS,
+    LatencyHistogram,
+)
+
+logger = logging.getLogger(__name__)
+
+IMPORTER_METRICS_INDEX = "importer_metrics"
+
+# Upper bounds (in seconds) of the importer run duration histogram buckets
+DURATION_BUCKETS = (60, 300, 600, 1200, 1800, 3600, 7200)
+
+METRIC_PREFIX = "unified_search_sources"
+
+# How many times the metrics of an importer are read and updated again if another
+# run has updated them concurrently, and the maximum random delay in between, times
+# the attempt number
+MAX_UPDATE_ATTEMPTS = 10
+UPDATE_RETRY_DELAY_SECONDS = 0.05
+
+
+def _histogram_to_dict(histogram: LatencyHistogram) -> dict:
+    return asdict(histogram)
+
+
+def _histogram_from_dict(data: Optional[dict], bucket_count: int) -> LatencyHistogram:
+    if not data or len(data.get("bucket_counts", [])) != bucket_count:
+        return LatencyHistogram(bucket_counts=[0] * bucket_count)
+    return LatencyHistogram(**data)
+
+
+def _observe_duration(histogram: LatencyHistogram, seconds: float) -> None:
+    histogram.count += 1
+    histogram.sum_seconds += seconds
+    histogram.bucket_counts[
+        next(
+            (i for i, bound in enumerate(DURATION_BUCKETS) if seconds <= bound),
+            len(DURATION_BUCKETS),
+        )
+    ] += 1
+
+
+def get_importer_metrics(es: Elasticsearch, importer: str) -> dict:
+    return _get_importer_metrics_document(es, importer)[0]
+
+
+def _get_importer_metrics_document(
+    es: Elasticsearch, importer: str
+) -> Tuple[dict, Optional[dict]]:
+    """
+    :return: The persisted metrics of the importer and the sequence number and
+        primary term of their document, None if the document does not exist.
+    """
+    try:
+        document = es.get(index=IMPORTER_METRICS_INDEX, id=importer)
+    except NotFoundError:
+        return {"importer": importer}, None
+    return document["_source"], {
+        "if_seq_no": document["_seq_no"],
+        "if_primary_term": document["_primary_term"],
+    }
+
+
+def save_importer_metrics(
+    es: Elasticsearch,
+    importer: str,
+    stats: Optional[ImportStats],
+    success: bool,
+) -> None:
+    """
+    Update the persisted metrics of an importer with the results of a run.
+
+    :param importer: Name of the importer, e.g. "location".
+    :param stats: Statistics of the run, None if the importer failed before
+        collecting any.
+    :param success: Whether the run succeeded.
+    """
+
+    def update(metrics: dict) -> None:
+        now = time.time()
+        metrics["last_run_timestamp"] = now
+        metrics["last_run_success"] = success
+        metrics["runs_total"] = metrics.get("runs_total", 0) + 1
+        if success:
+            metrics["last_success_timestamp"] = now
+        else:
+            metrics["failures_total"] = metrics.get("failures_total", 0) + 1
+
+        if stats:
+            metrics["last_duration_seconds"] = stats.duration_seconds
+            metrics["last_documents_indexed"] = stats.documents_indexed
+            metrics["last_bulk_errors"] = stats.bulk.errors
+            metrics["bulk_errors_total"] = (
+                metrics.get("bulk_errors_total", 0) + stats.bulk.errors
+            )
+            metrics["retries_total"] = metrics.get("retries_total", 0) + sum(
+                stats.retries.values()
+            )
+            metrics["retries_exhausted_total"] = metrics.get(
+                "retries_exhausted_total", 0
+            ) + stats.counters.get("retries_exhausted", 0)
+            if "retry_wait" in stats.stages:
+                metrics["retry_wait_seconds_total"] = (
+                    metrics.get("retry_wait_seconds_total", 0.0)
+                    + stats.stages["retry_wait"].total_seconds
+                )
+            if "lock" in stats.stages:
+                metrics["last_lock_wait_seconds"] = stats.stages["lock"].total_seconds
+            # Optional data sources imported from their snapshots, see
+            # LocationImporter._fetch_optional_base_data()
+            metrics["last_source_fallbacks"] = sorted(
+                name.removeprefix("fallback.")
+                for name in stats.counters
+                if name.startswith("fallback.")
+            )
+            metrics["source_fallbacks_total"] = metrics.get(
+                "source_fallbacks_total", 0
+            ) + len(metrics["last_source_fallbacks"])
+
+            duration = _histogram_from_dict(
+                metrics.get("duration_histogram"), len(DURATION_BUCKETS) + 1
+            )
+            _observe_duration(duration, stats.duration_seconds)
+            metrics["duration_histogram"] = _histogram_to_dict(duration)
+
+            # Stored as a list because host names contain dots, which Elasticsearch
+            # would interpret as object paths if used as field names
+            http_requests = {
+                item["host"]: _histogram_from_dict(
+                    item["histogram"], len(LATENCY_BUCKETS) + 1
+                )
+                for item in metrics.get("http_requests", [])
+            }
+            for host, histogram in stats.http_requests.items():
+                http_requests[host] = http_requests.get(host, LatencyHistogram()).merge(
+                    histogram
+                )
+            metrics["http_requests"] = [
+                {"host": host, "histogram": _histogram_to_dict(histogram)}
+                for host, histogram in sorted(http_requests.items())
+            ]
+
+    _update_importer_metrics(es, importer, update)
+
+
+def save_importer_lock_skip(es: Elasticsearch, importer: str) -> None:
+    """
+    Update the persisted metrics of an importer whose run was skipped because
+    another run held its lock, see ingest.locks.
+    """
+
+    def update(metrics: dict) -> None:
+        metrics["lock_skips_total"] = metrics.get("lock_skips_total", 0) + 1
+        metrics["last_lock_skip_timestamp"] = time.time()
+
+    _update_importer_metrics(es, importer, update)
+
+
+def _update_importer_metrics(
+    es: Elasticsearch, importer: str, update: Callable[[dict], None]
+) -> None:
+    """
+    Update the persisted metrics of an importer with optimistic concurrency control,
+    so that concurrent runs, e.g. a run and a skipped one, do not lose each other's
+    updates: the metrics are read and updated again if another run has written them
+    in between, at most MAX_UPDATE_ATTEMPTS times.
+
+    :param update: Function updating the metrics dict in place.
+    :raise ConflictError: If the metrics were written by others on every attempt.
+    """
+    es.options(ignore_status=400).indices.create(
+        index=IMPORTER_METRICS_INDEX,
+        mappings={"dynamic": False},  # Only stored, not searched
+    )
+    for attempt in range(1, MAX_UPDATE_ATTEMPTS + 1):
+        metrics, version = _get_importer_metrics_document(es, importer)
+        metrics["importer"] = importer
+        update(metrics)
+        try:
+            es.index(
+                index=IMPORTER_METRICS_INDEX,
+                id=importer,
+                document=metrics,
+                **(version or {"op_type": "create"}),
+            )
+            return
+        except ConflictError:
+            if attempt == MAX_UPDATE_ATTEMPTS:
+                raise
+            logger.info(f"Metrics of {importer} were updated concurrently, retrying")
+            time.sleep(random.uniform(0, UPDATE_RETRY_DELAY_SECONDS * attempt))
+
+
+def _cumulative_buckets(
+    histogram: LatencyHistogram, bounds: Iterable[float]
+) -> List[tuple]:
+    buckets = []
+    cumulative = 0
+    for bound, count in zip([*map(str, bounds), "+Inf"], histogram.bucket_counts):
+        cumulative += count
+        buckets.append((bound, cumulative))
+    return buckets
+
+
+def elasticsearch_up_gauge(up: bool) -> GaugeMetricFamily:
+    return GaugeMetricFamily(
+        f"{METRIC_PREFIX}_elasticsearch_up",
+        "Whether the metrics could be collected from Elasticsearch (1) or not (0)",
+        value=int(up),
+    )
+
+
+class ImporterMetricsCollector(Collector):
+    """
+    Prometheus collector exporting the persisted importer metrics and the document
+    count and size of the index aliases.
+    """
+
+    def __init__(self, es: Elasticsearch):
+        self.es = es
+
+    def collect(self) -> Iterable[Metric]:
+        try:
+            metrics = [*self.collect_importer_metrics(), *self.collect_index_metrics()]
+            up = True
+        except (ApiError, TransportError) as e:
+            logger.warning(f"Collecting the metrics from Elasticsearch failed: {e}")
+            metrics, up = [], False
+        yield from metrics
+        yield elasticsearch_up_gauge(up)
+
+    def collect_importer_metrics(self) -> Iterable[Metric]:
+        try:
+            hits = self.es.search(
+                index=IMPORTER_METRICS_INDEX, size=100, query={"match_all": {}}
+            )["hits"]["hits"]
+        except NotFoundError:
+            hits = []
+
+        def gauge(name, documentation):
+            return GaugeMetricFamily(
+                f"{METRIC_PREFIX}_importer_{name}", documentation, labels=["importer"]
+            )
+
+        last_success = gauge(
+            "last_success_timestamp_seconds", "Time of the last successful run"
+        )
+        last_run = gauge("last_run_timestamp_seconds", "Time of the last run")
+        last_run_success = gauge(
+            "last_run_success", "Whether the last run succeeded (1) or failed (0)"
+        )
+        last_duration = gauge("last_duration_seconds", "Duration of the last run")
+        documents = gauge(
+            "last_documents_indexed", "Documents indexed during the last run"
+        )
+        bulk_errors = gauge("last_bulk_errors", "Bulk errors during the last run")
+        source_fallbacks = gauge(
+            "last_source_fallbacks",
+            "Optional data sources imported from their snapshots in the last run",
+        )
+        lock_wait = gauge(
+            "last_lock_wait_seconds", "Time the last run waited for the run lock"
+        )
+        runs = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_runs", "Importer runs", labels=["importer"]
+        )
+        failures = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_failures",
+            "Failed importer runs",
+            labels=["importer"],
+        )
+        bulk_errors_total = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_bulk_errors",
+            "Bulk errors of all importer runs",
+            labels=["importer"],
+        )
+        retries = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_retries",
+            "Retries of all importer runs",
+            labels=["importer"],
+        )
+        retries_exhausted = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_retries_exhausted",
+            "Retried calls of all importer runs that failed after all the retries",
+            labels=["importer"],
+        )
+        retry_wait = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_retry_wait_seconds",
+            "Time waited between retries in all importer runs",
+            labels=["importer"],
+        )
+        source_fallbacks_total = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_source_fallbacks",
+            "Optional data sources imported from their snapshots in all importer runs",
+            labels=["importer"],
+        )
+        lock_skips = CounterMetricFamily(
+            f"{METRIC_PREFIX}_importer_lock_skips",
+            "Importer runs skipped because another run held the run lock",
+            labels=["importer"],
+        )
+        duration = HistogramMetricFamily(
+            f"{METRIC_PREFIX}_importer_duration_seconds",
+            "Duration of importer runs",
+            labels=["importer"],
+        )
+        http_requests = HistogramMetricFamily(
+            f"{METRIC_PREFIX}_importer_upstream_request_duration_seconds",
+            "Latency of upstream HTTP requests made by importers",
+            labels=["importer", "host"],
+        )
+
+        for hit in hits:
+            metrics = hit["_source"]
+            labels = [metrics["importer"]]
+            for family, key in [
+                (last_success, "last_success_timestamp"),
+                (last_run, "last_run_timestamp"),
+                (last_duration, "last_duration_seconds"),
+                (documents, "last_documents_indexed"),
+                (bulk_errors, "last_bulk_errors"),
+                (lock_wait, "last_lock_wait_seconds"),
+            ]:
+                if key in metrics:
+                    family.add_metric(labels, metrics[key])
+            if "last_source_fallbacks" in metrics:
+                source_fallbacks.add_metric(
+                    labels, len(metrics["last_source_fallbacks"])
+                )
+            if "last_run_success" in metrics:
+                last_run_success.add_metric(labels, int(metrics["last_run_success"]))
+            runs.add_metric(labels, metrics.get("runs_total", 0))
+            failures.add_metric(labels, metrics.get("failures_total", 0))
+            bulk_errors_total.add_metric(labels, metrics.get("bulk_errors_total", 0))
+            retries.add_metric(labels, metrics.get("retries_total", 0))
+            retries_exhausted.add_metric(
+                labels, metrics.get("retries_exhausted_total", 0)
+            )
+            retry_wait.add_metric(labels, metrics.get("retry_wait_seconds_total", 0.0))
+            lock_skips.add_metric(labels, metrics.get("lock_skips_total", 0))
+            source_fallbacks_total.add_metric(
+                labels, metrics.get("source_fallbacks_total", 0)
+            )
+            if "duration_histogram" in metrics:
+                histogram = _histogram_from_dict(
+                    metrics["duration_histogram"], len(DURATION_BUCKETS) + 1
+                )
+                duration.add_metric(
+                    labels,
+                    _cumulative_buckets(histogram, DURATION_BUCKETS),
+                    histogram.sum_seconds,
+                )
+            for item in metrics.get("http_requests", []):
+                histogram = _histogram_from_dict(
+                    item["histogram"], len(LATENCY_BUCKETS) + 1
+                )
+                http_requests.add_metric(
+                    [*labels, item["host"]],
+                    _cumulative_buckets(histogram, LATENCY_BUCKETS),
+                    histogram.sum_seconds,
+                )
+
+        yield from [
+            last_success,
+            last_run,
+            last_run_success,
+            last_duration,
+            documents,
+            bulk_errors,
+            lock_wait,
+            source_fallbacks,
+            runs,
+            failures,
+            bulk_errors_total,
+            retries,
+            retries_exhausted,
+            retry_wait,
+            lock_skips,
+            source_fallbacks_total,
+            duration,
+            http_requests,
+        ]
+
+    def collect_index_metrics(self) -> Iterable[Metric]:
+        doc_count = GaugeMetricFamily(
+            f"{METRIC_PREFIX}_index_documents",
+            "Document count of the index an alias points to",
+            labels=["alias"],
+        )
+        size = GaugeMetricFamily(
+            f"{METRIC_PREFIX}_index_size_bytes",
+            "Store size of the index an alias points to",
+            labels=["alias"],
+        )
+        for alias in INDEX_ALIASES:
+            try:
+                primaries = self.es.indices.stats(
+                    index=alias, metric=["docs", "store"]
+                )["_all"]["primaries"]
+            except NotFoundError:
+                continue
+            doc_count.add_metric([alias], primaries["docs"]["count"])
+            size.add_metric([alias], primaries["store"]["size_in_bytes"])
+        yield from [doc_count, size]
+
+
+def collect_importer_metrics() -> List[Metric]:
+    return list(ImporterMetricsCollector(get_elasticsearch_client()).collect())
+
+
+class CachedMetricsCollector(Collector):
+    """
+    Prometheus collector serving the metrics of ImporterMetricsCollector collected in
+    the background every METRICS_CACHE_TTL seconds, so that the scrapes do not query
+    Elasticsearch. The first scrape of the process waits for the first collection at
+    most the request timeout of Elasticsearch.
+    """
+
+    def __init__(self):
+        self.cached_metrics = BackgroundCache(
+            "metrics",
+            collect_importer_metrics,
+            get_ttl=lambda: settings.METRICS_CACHE_TTL,
+        )
+
+    def collect(self) -> Iterable[Metric]:
+        result = self.cached_metrics.get_result(wait=get_request_timeout())
+        if result is None or result.value is None:
+            yield elasticsearch_up_gauge(False)
+        else:
+            yield from result.value
+
+
+cached_metrics_collector = CachedMetricsCollector()
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from common.elasticsearch import get_elasticsearch_client
+from common.fake_elasticsearch import get_fake_elasticsearch_cluster
+from ingest.locks import (
+    IMPORTER_LOCKS_INDEX,
+    ImporterLock,
+    LockLost,
+    LockNotAcquired,
+    LockPolicy,
+)
+
+
+@pytest.fixture
+def es(settings, mocker):
+    settings.ES_BACKEND = "fake"
+    settings.IMPORT_LOCK_WAIT_SECONDS = 0.05
+    mocker.patch("ingest.locks.POLL_INTERVAL_SECONDS", 0.01)
+    cluster = get_fake_elasticsearch_cluster()
+    cluster.reset()
+    yield get_elasticsearch_client()
+    cluster.reset()
+
+
+def get_lock_document(es, name: str) -> dict:
+    return es.get(index=IMPORTER_LOCKS_INDEX, id=name)["_source"]
+
+
+def test_acquire_and_release(es):
+    lock = ImporterLock(es, "location")
+    assert lock.acquire(LockPolicy.FAIL) < 1
+    assert lock.get_owner() == lock.owner
+
+    lock.release()
+    assert lock.get_owner() is None
+    # Released locks can be acquired again
+    lock.acquire(LockPolicy.FAIL)
+    lock.release()
+
+
+@pytest.mark.parametrize("policy", [LockPolicy.FAIL, LockPolicy.SKIP])
+def test_held_lock_is_not_acquired(es, policy):
+    holder = ImporterLock(es, "location")
+    holder.acquire()
+    try:
+        with pytest.raises(LockNotAcquired, match=f"held by {holder.owner}"):
+            ImporterLock(es, "location").acquire(policy)
+        # Other locks are independent
+        other = ImporterLock(es, "ontology_word")
+        other.acquire(policy)
+        other.release()
+    finally:
+        holder.release()
+    assert holder.get_owner() is None
+
+
+def test_wait_for_held_lock(es, settings):
+    settings.IMPORT_LOCK_WAIT_SECONDS = 10
+    holder = ImporterLock(es, "location")
+    holder.acquire()
+    waiter = ImporterLock(es, "location")
+    try_acquire = waiter.try_acquire
+
+    def release_on_second_attempt():
+        if holder.get_owner():
+            holder.release()
+            return False
+        return try_acquire()
+
+    waiter.try_acquire = release_on_second_attempt
+    assert waiter.acquire(LockPolicy.WAIT) > 0
+    assert waiter.get_owner() == waiter.owner
+    waiter.release()
+
+
+def test_wait_for_held_lock_times_out(es):
+    holder = ImporterLock(es, "location")
+    holder.acquire()
+    with pytest.raises(LockNotAcquired, match="waited"):
+        ImporterLock(es, "location").acquire(LockPolicy.WAIT)
+    holder.release()
+
+
+def test_expired_lock_is_taken_over(es):
+    dead_holder = ImporterLock(es, "location", ttl_seconds=0.01)
+    dead_holder.try_acquire()
+    time.sleep(0.02)
+
+    lock = ImporterLock(es, "location")
+    lock.acquire(LockPolicy.FAIL)
+    assert lock.get_owner() == lock.owner
+
+    # The dead holder does not release the lock it has lost, but reports the loss
+    with pytest.raises(LockLost):
+        dead_holder.release()
+    assert lock.get_owner() == lock.owner
+    lock.release()
+
+
+def test_lost_lock(es):
+    lock = ImporterLock(es, "location", ttl_seconds=0.05, heartbeat_seconds=0.01)
+    lock.acquire()
+    lock.check_held()
+
+    # Taken over while the heartbeats fail, e.g. because of a network partition
+    lock._heartbeat_stop.set()
+    lock._heartbeat_thread.join()
+    time.sleep(0.06)
+    other = ImporterLock(es, "location")
+    other.acquire(LockPolicy.FAIL)
+
+    with pytest.raises(LockLost, match=f"Lost lock location to {other.owner}"):
+        lock.check_held()
+    assert lock.lost.is_set()
+    with pytest.raises(LockLost, match="was lost before releasing it"):
+        lock.release()
+    assert other.get_owner() == other.owner
+    other.release()
+
+
+def test_heartbeat_renews_lock(es):
+    lock = ImporterLock(es, "location", ttl_seconds=0.2, heartbeat_seconds=0.01)
+    lock.acquire()
+    expires_at = get_lock_document(es, "location")["expires_at"]
+    time.sleep(0.3)
+    try:
+        assert get_lock_document(es, "location")["expires_at"] > expires_at
+        with pytest.raises(LockNotAcquired):
+            ImporterLock(es, "location").acquire(LockPolicy.FAIL)
+    finally:
+        lock.release()
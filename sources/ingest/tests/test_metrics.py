@@ -0,0 +1,189 @@
+from unittest.mock import MagicMock
+
+from elastic_transport import ConnectionError
+from elasticsearch.exceptions import ConflictError, NotFoundError
+from prometheus_client import generate_latest
+
+from ingest.importers.utils.instrumentation import ImportStats
+from ingest.metrics import (
+    IMPORTER_METRICS_INDEX,
+    ImporterMetricsCollector,
+    save_importer_lock_skip,
+    save_importer_metrics,
+)
+
+
+def make_es(stored_metrics=None):
+    es = MagicMock()
+    if stored_metrics is None:
+        es.get.side_effect = NotFoundError("not found", MagicMock(), {})
+    else:
+        es.get.return_value = {
+            "_source": stored_metrics,
+            "_seq_no": 1,
+            "_primary_term": 1,
+        }
+    return es
+
+
+def make_stats():
+    stats = ImportStats(importer="LocationImporter")
+    stats.record_bulk(documents=100, size_bytes=1000, seconds=1.0, errors=2)
+    stats.record_retry("fetch_tpr_units")
+    stats.record_http_request("www.hel.fi", 0.3)
+    stats.record_http_request("hauki.api.hel.fi", 2.0)
+    stats.finish()
+    return stats
+
+
+def saved_metrics(es) -> dict:
+    kwargs = es.index.call_args.kwargs
+    assert kwargs["index"] == IMPORTER_METRICS_INDEX
+    return kwargs["document"]
+
+
+def test_save_importer_metrics_first_successful_run():
+    es = make_es()
+    save_importer_metrics(es, "location", make_stats(), success=True)
+
+    metrics = saved_metrics(es)
+    assert es.index.call_args.kwargs["id"] == "location"
+    assert metrics["last_run_success"] is True
+    assert metrics["last_success_timestamp"] == metrics["last_run_timestamp"]
+    assert metrics["runs_total"] == 1
+    assert metrics["last_documents_indexed"] == 98
+    assert metrics["last_bulk_errors"] == 2
+    assert metrics["retries_total"] == 1
+    assert metrics["retries_exhausted_total"] == 0
+    assert metrics["retry_wait_seconds_total"] == 0
+    assert metrics["duration_histogram"]["count"] == 1
+    assert [item["host"] for item in metrics["http_requests"]] == [
+        "hauki.api.hel.fi",
+        "www.hel.fi",
+    ]
+
+
+def test_save_importer_metrics_accumulates_over_runs():
+    es = make_es()
+    save_importer_metrics(es, "location", make_stats(), success=True)
+    es = make_es(saved_metrics(es))
+    save_importer_metrics(es, "location", None, success=False)
+    es = make_es(saved_metrics(es))
+    save_importer_metrics(es, "location", make_stats(), success=True)
+
+    metrics = saved_metrics(es)
+    assert metrics["runs_total"] == 3
+    assert metrics["failures_total"] == 1
+    assert metrics["bulk_errors_total"] == 4
+    assert metrics["retries_total"] == 2
+    assert metrics["duration_histogram"]["count"] == 2
+    assert all(item["histogram"]["count"] == 2 for item in metrics["http_requests"])
+
+
+def test_save_importer_metrics_with_optimistic_concurrency_control():
+    es = make_es()
+    save_importer_metrics(es, "location", None, success=True)
+    assert es.index.call_args.kwargs["op_type"] == "create"
+
+    stored_metrics = saved_metrics(es)
+    es = make_es(stored_metrics)
+    concurrently_updated = {**stored_metrics, "runs_total": 2}
+    es.get.side_effect = [
+        es.get.return_value,
+        {"_source": concurrently_updated, "_seq_no": 2, "_primary_term": 1},
+    ]
+    es.index.side_effect = [ConflictError("conflict", MagicMock(), {}), MagicMock()]
+    save_importer_metrics(es, "location", None, success=True)
+
+    assert es.index.call_count == 2
+    assert es.index.call_args.kwargs["if_seq_no"] == 2
+    assert saved_metrics(es)["runs_total"] == 3
+
+
+def test_save_importer_lock_skip_and_wait():
+    es = make_es()
+    save_importer_lock_skip(es, "location")
+    metrics = saved_metrics(es)
+    assert metrics["lock_skips_total"] == 1
+    assert "last_run_success" not in metrics
+
+    es = make_es(metrics)
+    stats = make_stats()
+    stats.add_stage_timing("lock", 12.5)
+    save_importer_metrics(es, "location", stats, success=True)
+    metrics = saved_metrics(es)
+    assert metrics["lock_skips_total"] == 1
+    assert metrics["last_lock_wait_seconds"] == 12.5
+
+    es.search.return_value = {"hits": {"hits": [{"_source": metrics}]}}
+    es.indices.stats.side_effect = NotFoundError("not found", MagicMock(), {})
+    output = generate_latest(ImporterMetricsCollector(es)).decode()
+    assert (
+        'unified_search_sources_importer_lock_skips_total{importer="location"} 1.0'
+        in output
+    )
+
+
+def test_save_importer_metrics_source_fallbacks():
+    es = make_es()
+    stats = make_stats()
+    stats.increment("fallback.connections")
+    stats.increment("fallback.event_counts")
+    stats.increment("degraded.opening_hours")
+    save_importer_metrics(es, "location", stats, success=True)
+    metrics = saved_metrics(es)
+    assert metrics["last_source_fallbacks"] == ["connections", "event_counts"]
+    assert metrics["source_fallbacks_total"] == 2
+
+    es.search.return_value = {"hits": {"hits": [{"_source": metrics}]}}
+    es.indices.stats.side_effect = NotFoundError("not found", MagicMock(), {})
+    output = generate_latest(ImporterMetricsCollector(es)).decode()
+    assert (
+        'unified_search_sources_importer_last_source_fallbacks{importer="location"} 2.0'
+        in output
+    )
+
+
+def test_collector_exports_importer_and_index_metrics():
+    es = make_es()
+    save_importer_metrics(es, "location", make_stats(), success=True)
+    es.search.return_value = {"hits": {"hits": [{"_source": saved_metrics(es)}]}}
+    es.indices.stats.return_value = {
+        "_all": {
+            "primaries": {"docs": {"count": 1234}, "store": {"size_in_bytes": 5678}}
+        }
+    }
+
+    output = generate_latest(ImporterMetricsCollector(es)).decode()
+
+    for expected_line in [
+        'importer_last_run_success{importer="location"} 1.0',
+        'importer_last_documents_indexed{importer="location"} 98.0',
+        'importer_retries_total{importer="location"} 1.0',
+        "importer_upstream_request_duration_seconds_bucket"
+        '{host="www.hel.fi",importer="location",le="0.5"} 1.0',
+        'index_documents{alias="location"} 1234.0',
+        'index_size_bytes{alias="location"} 5678.0',
+    ]:
+        assert f"unified_search_sources_{expected_line}\n" in output
+
+
+def test_collector_without_stored_metrics_or_indexes():
+    es = MagicMock()
+    es.search.side_effect = NotFoundError("not found", MagicMock(), {})
+    es.indices.stats.side_effect = NotFoundError("not found", MagicMock(), {})
+
+    output = generate_latest(ImporterMetricsCollector(es)).decode()
+
+    assert "importer=" not in output
+    assert "alias=" not in output
+
+
+def test_collector_with_elasticsearch_unreachable():
+    es = MagicMock()
+    es.search.side_effect = ConnectionError("Connection refused")
+
+    output = generate_latest(ImporterMetricsCollector(es)).decode()
+
+    assert "unified_search_sources_elasticsearch_up 0.0\n" in output
+    assert "importer=" not in output
@@ -1,6 +1,6 @@
 from csp.constants import NONE
 
-# The readiness/healthz JSON endpoints don't need much,
+# The readiness/healthz JSON endpoints and the metrics endpoint don't need much,
 # so let's set a very restrictive CSP.
 #
 # Available CSP settings are documented at
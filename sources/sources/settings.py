@@ -38,7 +38,7 @@ env = environ.Env(
     SENTRY_PROFILE_SESSION_SAMPLE_RATE=(float, None),
     SENTRY_RELEASE=(str, None),
     SENTRY_TRACES_SAMPLE_RATE=(float, None),
-    SENTRY_TRACES_IGNORE_PATHS=(list, ["/healthz", "/readiness"]),
+    SENTRY_TRACES_IGNORE_PATHS=(list, ["/healthz", "/readiness", "/metrics"]),
 )
 
 SENTRY_TRACES_SAMPLE_RATE = env("SENTRY_TRACES_SAMPLE_RATE")
@@ -83,6 +83,107 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ES_URI = [uri.strip() for uri in os.getenv("ES_URI", "").split(",")]
 ES_USERNAME = os.getenv("ES_USERNAME", "")
 ES_PASSWORD = os.getenv("ES_PASSWORD", "")
+# "elasticsearch" for a real cluster at ES_URI, or "fake" for an in-process fake
+# cluster (see common/fake_elasticsearch.py) for load testing without services:
+ES_BACKEND = os.getenv("ES_BACKEND", "elasticsearch")
+# Transport of the process wide Elasticsearch client (see common/elasticsearch.py):
+# connections per node, gzip compression of the request bodies (e.g. bulk requests),
+# retries of failed requests, including timed out ones, and discovering the
+# cluster's nodes from the ES_URI nodes (only if the nodes are reachable directly):
+ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "10"))
+ES_HTTP_COMPRESS = env.bool("ES_HTTP_COMPRESS", default=True)
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "3"))
+ES_RETRY_ON_TIMEOUT = env.bool("ES_RETRY_ON_TIMEOUT", default=True)
+ES_SNIFF = env.bool("ES_SNIFF", default=False)
+# Request timeouts in seconds per operation as JSON, overriding the defaults
+# {"default": 10, "import": 60, "health_check": 5}, e.g. {"import": 120}:
+ES_REQUEST_TIMEOUTS = env.json("ES_REQUEST_TIMEOUTS", default={})
+# The health checks of Elasticsearch are run in the background every
+# ES_HEALTH_CHECK_TTL seconds and served from cache, and reported as unavailable
+# if the last check is older than ES_HEALTH_CHECK_MAX_AGE seconds:
+ES_HEALTH_CHECK_TTL = float(os.getenv("ES_HEALTH_CHECK_TTL", "10"))
+ES_HEALTH_CHECK_MAX_AGE = float(os.getenv("ES_HEALTH_CHECK_MAX_AGE", "60"))
+# The metrics served by the /metrics endpoint are collected from Elasticsearch in the
+# background every METRICS_CACHE_TTL seconds:
+METRICS_CACHE_TTL = float(os.getenv("METRICS_CACHE_TTL", "30"))
+# Maximum age in seconds of the index aliases' imports before their health checks
+# report them stale, as JSON by alias, overriding the default {"default": 172800}
+# (2 days), e.g. {"location": 86400}:
+ES_INDEX_MAX_AGE_SECONDS = env.json("ES_INDEX_MAX_AGE_SECONDS", default={})
+# Simulated latency of the fake cluster's every request, and its simulated
+# throughput in request body bytes per second (0 for unlimited):
+ES_FAKE_LATENCY_SECONDS = float(os.getenv("ES_FAKE_LATENCY_SECONDS", "0"))
+ES_FAKE_BYTES_PER_SECOND = int(os.getenv("ES_FAKE_BYTES_PER_SECOND", "0"))
+
+# Validation of the imported data before swapping it active. Fail the import if its
+# bulk error rate is higher, or if it has fewer documents than this ratio of the
+# previous import's:
+IMPORT_MAX_BULK_ERROR_RATE = float(os.getenv("IMPORT_MAX_BULK_ERROR_RATE", "0.01"))
+IMPORT_MIN_DOCUMENT_COUNT_RATIO = float(
+    os.getenv("IMPORT_MIN_DOCUMENT_COUNT_RATIO", "0.9")
+)
+# Keep the previous index after an import for rolling back to it with
+# `ingest_data --rollback <alias>`, until the next import starts:
+IMPORT_KEEP_PREVIOUS_INDEX = env.bool("IMPORT_KEEP_PREVIOUS_INDEX", default=False)
+# Directory of the checkpoints for resuming interrupted imports with
+# `ingest_data --resume`. Must outlive the importer runs, e.g. a persistent volume:
+IMPORT_CHECKPOINT_DIR = os.getenv(
+    "IMPORT_CHECKPOINT_DIR", os.path.join(BASE_DIR, "import_checkpoints")
+)
+# Snapshots of the optional data sources of the imports, used instead of a source
+# failing to be fetched if not older than the max age. Must outlive the importer runs:
+IMPORT_SOURCE_SNAPSHOT_DIR = os.getenv(
+    "IMPORT_SOURCE_SNAPSHOT_DIR", os.path.join(BASE_DIR, "source_snapshots")
+)
+IMPORT_SOURCE_SNAPSHOT_MAX_AGE_SECONDS = int(
+    os.getenv("IMPORT_SOURCE_SNAPSHOT_MAX_AGE_SECONDS", str(3 * 24 * 3600))
+)
+# How long the shards of a sharded import (`ingest_data location --shard i/N`) wait
+# for the coordinator to start the import, and the coordinator for the shards to
+# complete it:
+IMPORT_SHARD_TIMEOUT_SECONDS = int(os.getenv("IMPORT_SHARD_TIMEOUT_SECONDS", "7200"))
+# The workers of a sharded import only join a run the coordinator started at most
+# this many seconds before the worker started, i.e. the shards of an import need to
+# be started together, so that they never join an earlier run of a dead coordinator:
+IMPORT_SHARD_JOIN_WINDOW_SECONDS = int(
+    os.getenv("IMPORT_SHARD_JOIN_WINDOW_SECONDS", "600")
+)
+# Run locks of the importers, see ingest/locks.py. What to do when another run holds
+# the lock: "wait" (for at most IMPORT_LOCK_WAIT_SECONDS), "skip" or "fail":
+IMPORT_LOCK_POLICY = os.getenv("IMPORT_LOCK_POLICY", "skip")
+IMPORT_LOCK_WAIT_SECONDS = int(os.getenv("IMPORT_LOCK_WAIT_SECONDS", "3600"))
+# Expiry time of a lock not renewed by its holder, e.g. after the holder has died:
+IMPORT_LOCK_TTL_SECONDS = int(os.getenv("IMPORT_LOCK_TTL_SECONDS", "300"))
+
+# Limits of the importers' requests per upstream host, see
+# ingest/importers/utils/host_limiter.py. Requests at a time and per second (0 for
+# unlimited), and the consecutive failures opening the host's circuit breaker, which
+# then fails the requests fast until a trial request after the reset time:
+UPSTREAM_MAX_CONCURRENT_REQUESTS = int(
+    os.getenv("UPSTREAM_MAX_CONCURRENT_REQUESTS", "8")
+)
+UPSTREAM_REQUESTS_PER_SECOND = float(os.getenv("UPSTREAM_REQUESTS_PER_SECOND", "10"))
+UPSTREAM_CIRCUIT_FAILURE_THRESHOLD = int(
+    os.getenv("UPSTREAM_CIRCUIT_FAILURE_THRESHOLD", "5")
+)
+UPSTREAM_CIRCUIT_RESET_SECONDS = float(
+    os.getenv("UPSTREAM_CIRCUIT_RESET_SECONDS", "60")
+)
+# Overrides of the above per host as JSON, e.g.
+# {"hauki.api.hel.fi": {"requests_per_second": 2, "max_concurrent_requests": 2}}:
+UPSTREAM_HOST_LIMITS = env.json("UPSTREAM_HOST_LIMITS", default={})
+# Fetch the location import's base data sources, their pages and the Hauki opening
+# hours batches concurrently with an async client instead of one by one, within the
+# above limits:
+IMPORT_ASYNC_FETCHING = env.bool("IMPORT_ASYNC_FETCHING", default=False)
+# Index the location import's documents with an AsyncElasticsearch client, the
+# transform overlapping with at most IMPORT_BULK_MAX_IN_FLIGHT bulk requests:
+IMPORT_ASYNC_INDEXING = env.bool("IMPORT_ASYNC_INDEXING", default=False)
+IMPORT_BULK_MAX_IN_FLIGHT = int(os.getenv("IMPORT_BULK_MAX_IN_FLIGHT", "4"))
+
+HAUKI_BASE_URL = os.getenv("HAUKI_BASE_URL", "https://hauki.api.hel.fi/v1/")
+# Number of days to fetch the venues' opening hours for, starting from today:
+HAUKI_DAYS_TO_FETCH = int(os.getenv("HAUKI_DAYS_TO_FETCH", "7"))
 
 DEBUG = os.getenv("DEBUG", "false").lower() in ("yes", "true", "t", "1")
 
@@ -242,11 +343,11 @@ APP_BUILD_TIME = datetime.fromtimestamp(os.path.getmtime(__file__))
 # https://github.com/adamchainz/django-cors-headers/tree/4.7.0?tab=readme-ov-file#configuration
 #
 # This is a very permissive CORS configuration,
-# which is suitable because only readiness/healthz endpoints are available,
+# which is suitable because only readiness/healthz/metrics endpoints are available,
 # see sources/sources/urls.py for available endpoints.
-CORS_ALLOW_ALL_ORIGINS = True  # Allow all origins for readiness/healthz endpoints
+CORS_ALLOW_ALL_ORIGINS = True  # Allow all origins for readiness/healthz/metrics
 CORS_ALLOW_CREDENTIALS = False  # Forbid cookies in cross-site requests
-CORS_ALLOW_METHODS = ["GET", "HEAD"]  # Only for readiness/healthz endpoints
+CORS_ALLOW_METHODS = ["GET", "HEAD"]  # Only for readiness/healthz/metrics endpoints
 CORS_ALLOW_HEADERS = (
     *default_headers,
     "baggage",
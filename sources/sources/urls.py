@@ -15,11 +15,14 @@ Including another URLconf
 """
 
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import path
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_http_methods
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from custom_health_checks.views import HealthCheckJSONView
+from ingest.metrics import cached_metrics_collector
 from sources import __version__
 
 
@@ -35,7 +38,16 @@ def readiness(*args, **kwargs):
     return JsonResponse(response_json, status=200)
 
 
+@never_cache
+@require_http_methods(["GET", "HEAD"])
+def metrics(*args, **kwargs):
+    return HttpResponse(
+        generate_latest(cached_metrics_collector), content_type=CONTENT_TYPE_LATEST
+    )
+
+
 urlpatterns = [
     path("healthz", HealthCheckJSONView.as_view(), name="healthz"),
     path("readiness", readiness, name="readiness"),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -0,0 +1,108 @@
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+from elastic_transport import HttpxAsyncHttpNode
+
+from common.elasticsearch import (
+    get_async_elasticsearch_client,
+    get_elasticsearch_client,
+    get_request_timeout,
+    measure_ndjson_request_bytes,
+    MeasuringNdjsonSerializer,
+    reset_elasticsearch_clients,
+)
+
+
+@pytest.fixture
+def elasticsearch():
+    """:return: Mock of the Elasticsearch class, creating a new mock client per call."""
+
+    def create_client(**kwargs):
+        create_client.clients.append(MagicMock())
+        return create_client.clients[-1]
+
+    create_client.clients = []
+    with patch(
+        "common.elasticsearch.Elasticsearch", side_effect=create_client
+    ) as elasticsearch:
+        yield elasticsearch
+
+
+@pytest.fixture(autouse=True)
+def es_settings(settings):
+    settings.ES_BACKEND = "elasticsearch"
+    settings.ES_URI = ["http://es-1:9200", "http://es-2:9200"]
+    settings.ES_USERNAME = ""
+    settings.ES_SNIFF = False
+    settings.ES_REQUEST_TIMEOUTS = {}
+    reset_elasticsearch_clients()
+    yield settings
+    reset_elasticsearch_clients()
+
+
+def test_client_is_shared(elasticsearch, es_settings):
+    client = get_elasticsearch_client()
+    get_elasticsearch_client("import")
+
+    assert elasticsearch.call_count == 1
+    assert elasticsearch.call_args.kwargs == {
+        "hosts": ["http://es-1:9200", "http://es-2:9200"],
+        "basic_auth": None,
+        "connections_per_node": es_settings.ES_CONNECTIONS_PER_NODE,
+        "http_compress": es_settings.ES_HTTP_COMPRESS,
+        "max_retries": es_settings.ES_MAX_RETRIES,
+        "retry_on_timeout": es_settings.ES_RETRY_ON_TIMEOUT,
+        "request_timeout": 10.0,
+        "serializers": {"application/x-ndjson": ANY},
+    }
+    assert isinstance(
+        elasticsearch.call_args.kwargs["serializers"]["application/x-ndjson"],
+        MeasuringNdjsonSerializer,
+    )
+    # Copies of the shared client with the operations' timeouts
+    shared_client = elasticsearch.side_effect.clients[0]
+    assert shared_client.options.call_args_list == [
+        ((), {"request_timeout": 10.0}),
+        ((), {"request_timeout": 60.0, "retry_on_timeout": False}),
+    ]
+    assert client is shared_client.options.return_value
+
+    # Changed settings create a new client
+    es_settings.ES_SNIFF = True
+    get_elasticsearch_client()
+    assert elasticsearch.call_count == 2
+    assert elasticsearch.call_args.kwargs["sniff_on_start"] is True
+    assert elasticsearch.call_args.kwargs["sniff_on_node_failure"] is True
+
+
+def test_request_timeouts_per_operation(es_settings):
+    es_settings.ES_REQUEST_TIMEOUTS = {"import": 120}
+
+    assert get_request_timeout() == 10
+    assert get_request_timeout("import") == 120
+    assert get_request_timeout("health_check") == 5
+    assert get_request_timeout("unknown") == 10
+
+
+def test_async_client_is_configured_the_same(es_settings):
+    client = get_async_elasticsearch_client("import")
+
+    nodes = client.transport.node_pool.all()
+    assert [node.__class__ for node in nodes] == [HttpxAsyncHttpNode] * 2
+    assert client._request_timeout == 60
+    assert client._retry_on_timeout is False
+
+
+def test_ndjson_request_bytes_are_measured():
+    serializer = MeasuringNdjsonSerializer()
+    lines = [b'{"index":{"_index":"test"}}', b'{"name":"a"}']
+
+    serializer.dumps(lines)
+    with measure_ndjson_request_bytes() as request_bytes:
+        body = serializer.dumps(lines)
+        with measure_ndjson_request_bytes() as nested_request_bytes:
+            serializer.dumps(lines[:1])
+    serializer.dumps(lines)
+
+    assert request_bytes == [len(body)]
+    assert nested_request_bytes == [len(lines[0]) + 1]
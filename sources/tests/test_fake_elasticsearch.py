@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from unittest.mock import patch
+
+import pytest
+from elasticsearch.exceptions import NotFoundError
+from elasticsearch.helpers import bulk, BulkIndexError, scan
+
+from common.elasticsearch import get_elasticsearch_client
+from common.fake_elasticsearch import get_fake_elasticsearch_cluster
+from ingest.importers.base import Importer
+from ingest.metrics import (
+    get_importer_metrics,
+    save_importer_lock_skip,
+    save_importer_metrics,
+)
+
+
+@dataclass
+class SomeData:
+    foo: str
+
+
+class SomeBulkImporter(Importer[SomeData]):
+    index_base_names = ("test",)
+    document_count = 250
+
+    def run(self):
+        self.add_data_bulk(
+            [SomeData(foo=f"document {i}") for i in range(self.document_count)]
+        )
+
+
+@pytest.fixture
+def fake_cluster(settings):
+    settings.ES_BACKEND = "fake"
+    cluster = get_fake_elasticsearch_cluster()
+    cluster.reset()
+    yield cluster
+    cluster.reset()
+
+
+def test_get_elasticsearch_client_uses_fake_backend(fake_cluster):
+    es = get_elasticsearch_client()
+    assert es.ping() is True
+    assert fake_cluster.stats.requests == {"ping": 1}
+
+
+def test_importer_alias_swap(fake_cluster):
+    es = get_elasticsearch_client()
+
+    SomeBulkImporter().base_run()
+    assert set(es.indices.get_alias(name="test")) == {"test_1"}
+    assert es.count(index="test")["count"] == SomeBulkImporter.document_count
+
+    importer = SomeBulkImporter()
+    importer.base_run()
+    assert set(es.indices.get_alias(name="test")) == {"test_2"}
+    assert set(fake_cluster.indices) == {"test_2"}
+    assert es.count(index="test")["count"] == SomeBulkImporter.document_count
+    with pytest.raises(NotFoundError):
+        es.indices.get_alias(name="test_wip")
+
+    assert importer.stats.bulk.documents == SomeBulkImporter.document_count
+    assert fake_cluster.stats.requests["bulk"] == 2
+    assert fake_cluster.stats.bulk_documents == 2 * SomeBulkImporter.document_count
+    assert fake_cluster.stats.request_bytes > 0
+    assert fake_cluster.stats.response_bytes > 0
+
+
+def test_delete_missing_index(fake_cluster):
+    es = get_elasticsearch_client()
+    with pytest.raises(NotFoundError) as exc_info:
+        es.indices.delete(index="missing")
+    assert exc_info.value.error == "index_not_found_exception"
+    assert es.options(ignore_status=404).indices.delete(index="missing")
+
+
+def test_bulk_errors_are_reported_per_item(fake_cluster):
+    es = get_elasticsearch_client()
+    es.index(index="test", id="1", document={"foo": "bar"})
+
+    with pytest.raises(BulkIndexError) as exc_info:
+        bulk(
+            es,
+            [
+                {"_op_type": "update", "_index": "test", "_id": "1", "doc": {"a": 1}},
+                {"_op_type": "update", "_index": "test", "_id": "2", "doc": {"a": 2}},
+            ],
+        )
+    [error] = exc_info.value.errors
+    assert error["update"]["_id"] == "2"
+    assert es.get(index="test", id="1")["_source"] == {"foo": "bar", "a": 1}
+
+
+def test_bulk_delete(fake_cluster):
+    es = get_elasticsearch_client()
+    bulk(es, [{"_index": "test", "_id": str(i), "foo": i} for i in range(3)])
+    seq_no = es.get(index="test", id="1")["_seq_no"]
+
+    with pytest.raises(BulkIndexError) as exc_info:
+        bulk(
+            es,
+            [
+                {"_op_type": "delete", "_index": "test", "_id": "0"},
+                {
+                    "_op_type": "delete",
+                    "_index": "test",
+                    "_id": "1",
+                    "if_seq_no": seq_no,
+                    "if_primary_term": 1,
+                },
+                {
+                    "_op_type": "delete",
+                    "_index": "test",
+                    "_id": "2",
+                    "if_seq_no": seq_no,
+                    "if_primary_term": 1,
+                },
+            ],
+        )
+    [error] = exc_info.value.errors
+    assert error["delete"]["_id"] == "2"
+    assert error["delete"]["status"] == 409
+    assert es.count(index="test")["count"] == 1
+
+
+def test_scan(fake_cluster):
+    es = get_elasticsearch_client()
+    bulk(
+        es,
+        [
+            {"_index": "test", "_id": str(i), "foo": {"bar": i, "baz": "x"}}
+            for i in range(25)
+        ],
+    )
+
+    hits = list(scan(es, index="test", query={"_source": ["foo.bar"]}, size=10))
+
+    assert sorted(hit["_source"]["foo"]["bar"] for hit in hits) == list(range(25))
+    assert all(hit["_source"] == {"foo": {"bar": int(hit["_id"])}} for hit in hits)
+    assert fake_cluster.stats.requests["scroll"] == 3
+    assert fake_cluster.scrolls == {}
+
+
+def test_simulated_latency(fake_cluster):
+    fake_cluster.latency_seconds = 0.01
+    fake_cluster.bytes_per_second = 1000
+    es = get_elasticsearch_client()
+    with patch("common.fake_elasticsearch.time.sleep") as sleep:
+        es.index(index="test", id="1", document={"foo": "x" * 90})
+    [((seconds,), _)] = sleep.call_args_list
+    assert seconds == pytest.approx(0.01 + 0.1)
+    assert fake_cluster.stats.simulated_latency_seconds == pytest.approx(seconds)
+
+
+def test_importer_metrics_round_trip(fake_cluster):
+    es = get_elasticsearch_client()
+    save_importer_metrics(es, "location", None, success=True)
+    save_importer_metrics(es, "location", None, success=False)
+    metrics = get_importer_metrics(es, "location")
+    assert metrics["runs_total"] == 2
+    assert metrics["failures_total"] == 1
+
+
+def test_importer_metrics_concurrent_updates(fake_cluster):
+    es = get_elasticsearch_client()
+    save_importer_metrics(es, "location", None, success=True)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(save, es, "location", *args)
+            for _ in range(4)
+            for save, args in [
+                (save_importer_lock_skip, ()),
+                (save_importer_metrics, (None, True)),
+            ]
+        ]
+    for future in futures:
+        future.result()
+    metrics = get_importer_metrics(es, "location")
+    assert metrics["runs_total"] == 5
+    assert metrics["lock_skips_total"] == 4
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from elastic_transport import ConnectionError
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from ingest.metrics import cached_metrics_collector
+
+
+@pytest.fixture(autouse=True)
+def metrics_cache():
+    cached_metrics_collector.cached_metrics.stop()
+    yield
+    cached_metrics_collector.cached_metrics.stop()
+
+
+def make_es():
+    es = MagicMock()
+    es.search.return_value = {"hits": {"hits": []}}
+    es.indices.stats.return_value = {
+        "_all": {"primaries": {"docs": {"count": 10}, "store": {"size_in_bytes": 20}}}
+    }
+    return es
+
+
+def test_metrics_endpoint(client):
+    with patch("ingest.metrics.get_elasticsearch_client", return_value=make_es()):
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == CONTENT_TYPE_LATEST
+    assert b'unified_search_sources_index_documents{alias="location"} 10.0' in (
+        response.content
+    )
+    assert b"unified_search_sources_elasticsearch_up 1.0" in response.content
+
+
+def test_metrics_endpoint_is_served_from_cache(client, settings):
+    settings.METRICS_CACHE_TTL = 60
+    es = make_es()
+    with patch("ingest.metrics.get_elasticsearch_client", return_value=es):
+        for _ in range(3):
+            assert client.get("/metrics").status_code == 200
+
+    assert es.search.call_count == 1
+
+
+def test_metrics_endpoint_with_elasticsearch_unreachable(client):
+    es = MagicMock()
+    es.search.side_effect = ConnectionError("Connection refused")
+    with patch("ingest.metrics.get_elasticsearch_client", return_value=es):
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert b"unified_search_sources_elasticsearch_up 0.0" in response.content
+    assert b"alias=" not in response.content
+
+
+def test_metrics_endpoint_only_allows_get_and_head(client):
+    assert client.post("/metrics").status_code == 405
@@ -17,6 +17,7 @@ def test_url_patterns():
     #       and update the openapi.yaml documentation.
     expected_url_patterns = [
         NamePattern("healthz", "healthz"),
+        NamePattern("metrics", "metrics"),
         NamePattern("readiness", "readiness"),
     ]
     assert url_patterns == expected_url_patterns